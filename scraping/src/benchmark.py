@@ -0,0 +1,852 @@
+"""
+Offline benchmarks for the scraping pipeline.
+Author: gabes-machado
+Created: 2026-10-16 22:10:27 UTC
+Updated: 2026-10-17 04:24:37 UTC
+
+Every benchmark runs without network access. HTTP benchmarks serve a
+fixture archive (recorded with ``main.py --record DIR``) from a local
+mock Planalto server with configurable latency and faults. They only
+measure: that the engines produce the same output is checked by the
+test suite (``python -m pytest scraping/tests``).
+
+Usage:
+    python benchmark.py scrape --fixtures DIR [--runs 5] [--latency 0.05 0.2]
+    python benchmark.py crawl --fixtures DIR [--repeat 20] [--error-rate 0.05]
+    python benchmark.py parsers [--html FILE | --archive DIR] [--scale 20] [--memory]
+    python benchmark.py parsers --engines bs4 parallel:bs4 --workers 8 --scale 20
+    python benchmark.py processor [--count 100000] [--runs 5]
+    python benchmark.py tree [--html FILE | --archive DIR | --synthetic 100000]
+    python benchmark.py json [--html FILE | --archive DIR | --synthetic 100000]
+    python benchmark.py sqlite [--synthetic 100000] [--query "direitos sociais"]
+    python benchmark.py parquet [--synthetic 100000] [--titulo II --classe inciso]
+    python benchmark.py formats [--input data/constitution.json] [--runs 5]
+    python benchmark.py schema [--html FILE | --archive DIR | --synthetic 100000]
+    python benchmark.py verify [--html FILE | --archive DIR | --synthetic 100000]
+    python benchmark.py transformer [--html FILE | --archive DIR | --synthetic 100000]
+    python benchmark.py nested [--synthetic 100000] [--laws 5]
+    python benchmark.py pipeline [--synthetic 100000] [--laws 20] [--engines vectorized polars]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+import jsonschema
+import pandas as pd
+from yarl import URL
+
+from scraper.constitution import ConstitutionScraper
+from utils.compact_tree import CompactTree
+from utils.data_transformer import ENGINES, ConstitutionTransformer
+from utils.constitution_structure import ConstitutionProcessor
+from utils.element_cache import ElementCache
+from utils.json_handler import HierarchyConfig, JSONHandler
+from utils.json_writer import TreeJSONWriter
+from utils.manifest import verify_file
+from utils.output_formats import available_formats, get_format
+from utils.sqlite_export import SQLiteExporter, search
+from utils.parquet_export import ParquetExporter, read_dispositivos
+from utils.schema import CONSTITUTION_SCHEMA, ConstitutionSchema
+from utils.encoding import sniff_charset
+from utils.html_archive import RawHTMLArchive
+from utils.html_parser import HTMLParser
+from utils.html_stream import StreamingHTMLParser
+from utils.http_client import STREAM_CHUNK_SIZE
+from utils.parallel_parser import parse_parallel
+from utils.http_fixtures import FixtureArchive
+from utils.mock_server import MockPlanaltoServer, MockServerConfig
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = Path(__file__).parent
+CONSTITUTION_URL = (
+    "https://www.planalto.gov.br/ccivil_03/constituicao/constituicao.htm"
+)
+_BODY = re.compile(rb'(<body[^>]*>)(.*)(</body>)', re.IGNORECASE | re.DOTALL)
+
+def _summarize(name: str, samples: List[float]) -> str:
+    """Format min/median/max of a list of durations"""
+    return (
+        f"{name}: n={len(samples)} "
+        f"min={min(samples):.3f}s "
+        f"median={statistics.median(samples):.3f}s "
+        f"max={max(samples):.3f}s"
+    )
+
+def _print_stats(title: str, stats: Dict[str, Any]) -> None:
+    print(f"{title}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+
+def _server_config(args: argparse.Namespace) -> MockServerConfig:
+    return MockServerConfig(
+        latency=tuple(args.latency),
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        seed=args.seed
+    )
+
+def _open_archive(args: argparse.Namespace) -> FixtureArchive:
+    archive = FixtureArchive(str(args.fixtures))
+    if not len(archive):
+        print(f"No fixtures found in {args.fixtures}", file=sys.stderr)
+        sys.exit(1)
+    return archive
+
+async def bench_scrape(args: argparse.Namespace) -> int:
+    """Time complete scrape() runs against the mock server"""
+    archive = _open_archive(args)
+    durations = []
+    failures = 0
+
+    async with MockPlanaltoServer(archive, _server_config(args)) as server:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for run in range(args.runs):
+                scraper = ConstitutionScraper(base_url=server.base_url)
+                start = time.perf_counter()
+                async with scraper:
+                    ok = await scraper.scrape(
+                        str(Path(tmp_dir) / f"run_{run}.json"),
+                        path=args.path,
+                        streaming=args.stream
+                    )
+                durations.append(time.perf_counter() - start)
+                failures += 0 if ok else 1
+
+        print(_summarize("scrape", durations))
+        print(f"failed runs: {failures}/{args.runs}")
+        _print_stats("server", server.get_stats())
+    return 0
+
+async def bench_crawl(args: argparse.Namespace) -> int:
+    """Measure fetch throughput of every archived document through one client"""
+    archive = _open_archive(args)
+    paths = [entry.url for entry in archive] * args.repeat
+
+    async with MockPlanaltoServer(archive, _server_config(args)) as server:
+        scraper = ConstitutionScraper(
+            base_url=server.base_url,
+            retry_budget=len(paths),
+            requests_per_second=args.rate,
+            burst=args.concurrency,
+            max_concurrency=args.concurrency
+        )
+        failures = 0
+        fetched_bytes = 0
+
+        async def fetch(url: str) -> None:
+            nonlocal failures, fetched_bytes
+            try:
+                # Keep path and query; the host is the mock server
+                document = await scraper._fetch_html(URL(url).path_qs)
+                fetched_bytes += len(document.content)
+            except Exception as e:
+                failures += 1
+                logger.debug(f"Fetch failed: {e}")
+
+        start = time.perf_counter()
+        async with scraper:
+            await asyncio.gather(*(fetch(url) for url in paths))
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"crawl: {len(paths)} documents in {elapsed:.3f}s "
+            f"({len(paths) / elapsed:.1f} docs/s, "
+            f"{fetched_bytes / elapsed / 1024 / 1024:.2f} MiB/s), "
+            f"failures={failures}, retries={scraper.retry_policy.retries_used}"
+        )
+        _print_stats("limiter", scraper.rate_limiter.get_stats())
+        _print_stats("server", server.get_stats())
+    return 0
+
+def _load_html(args: argparse.Namespace) -> bytes:
+    """Raw page bytes from --html or the raw HTML archive"""
+    if args.html:
+        return args.html.read_bytes()
+    return RawHTMLArchive(str(args.archive)).load(args.url)
+
+def _scale_html(content: bytes, factor: int) -> bytes:
+    """Repeat the document body to simulate a larger page"""
+    match = _BODY.search(content)
+    if factor <= 1 or not match:
+        return content
+    return (
+        content[:match.end(1)]
+        + match.group(2) * factor
+        + content[match.start(3):]
+    )
+
+def _parse_elements(
+    content: bytes,
+    charset: str,
+    engine: str,
+    workers: int = 0,
+    element_cache: ElementCache = None
+) -> List[tuple]:
+    """
+    Parse with a tree engine, the streaming parser ("stream"), a tree
+    engine across processes ("parallel:<engine>"), or load the elements
+    from a primed element cache ("cache")
+    """
+    if engine == 'cache':
+        return element_cache.load(ElementCache.content_key(content, 'bs4', charset))
+    if engine.startswith('parallel:'):
+        return parse_parallel(
+            content, charset, engine.split(':', 1)[1], workers or None
+        )
+    if engine == 'stream':
+        parser = StreamingHTMLParser(encoding=charset)
+        elements = []
+        for offset in range(0, len(content), STREAM_CHUNK_SIZE):
+            elements.extend(parser.feed(content[offset:offset + STREAM_CHUNK_SIZE]))
+        elements.extend(parser.close())
+        return elements
+
+    parser = HTMLParser(content, encoding=charset, engine=engine)
+    parser.remove_strike_tags()
+    return list(parser.iter_constitutional_elements())
+
+def _first_element_latency(content: bytes, charset: str) -> float:
+    """Seconds until the streaming parser releases its first element"""
+    start = time.perf_counter()
+    parser = StreamingHTMLParser(encoding=charset)
+    for offset in range(0, len(content), STREAM_CHUNK_SIZE):
+        if parser.feed(content[offset:offset + STREAM_CHUNK_SIZE]):
+            break
+    return time.perf_counter() - start
+
+def _peak_memory(content: bytes, charset: str, engine: str) -> int:
+    """Peak bytes allocated while parsing"""
+    tracemalloc.start()
+    try:
+        _parse_elements(content, charset, engine)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_parsers(args: argparse.Namespace) -> int:
+    """Time every parsing engine on the same page"""
+    content = _scale_html(_load_html(args), args.scale)
+    charset = sniff_charset(content)
+    print(f"document: {len(content) / 1024:.0f} KiB, charset={charset}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        return _time_engines(args, content, charset, cache_dir)
+
+def _time_engines(
+    args: argparse.Namespace,
+    content: bytes,
+    charset: str,
+    cache_dir: str
+) -> int:
+    timings = {}
+    element_cache = None
+    if 'cache' in args.engines:
+        element_cache = ElementCache(cache_dir)
+        element_cache.store(
+            ElementCache.content_key(content, 'bs4', charset),
+            _parse_elements(content, charset, 'bs4')
+        )
+    for engine in args.engines:
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            elements = _parse_elements(
+                content, charset, engine, args.workers, element_cache
+            )
+            durations.append(time.perf_counter() - start)
+        timings[engine] = statistics.median(durations)
+        print(_summarize(f"{engine} ({len(elements)} elements)", durations))
+        if engine == 'stream':
+            print(
+                f"stream: first element after "
+                f"{_first_element_latency(content, charset) * 1000:.1f}ms"
+            )
+        if args.memory and engine != 'cache':
+            peak = _peak_memory(content, charset, engine)
+            print(f"{engine}: peak memory {peak / 1024 / 1024:.1f} MiB")
+
+    base = timings[args.engines[0]]
+    for engine, median in timings.items():
+        print(f"{engine}: {base / median:.2f}x vs {args.engines[0]}")
+    return 0
+
+def _synthetic_elements(count: int) -> List[tuple]:
+    """
+    A law with about `count` dispositivos: títulos of capítulos of
+    artigos, each artigo with parágrafos, incisos and alíneas
+    """
+    elements = [('PREAMBULO', None, None, 'Nós, representantes do povo brasileiro...')]
+    titulo = capitulo = artigo = 0
+    while len(elements) < count:
+        titulo += 1
+        elements.append(('TITULO', str(titulo), 'Dos Princípios', f'TÍTULO {titulo}'))
+        for _ in range(5):
+            capitulo += 1
+            elements.append(('CAPITULO', str(capitulo), 'Disposições Gerais',
+                             f'CAPÍTULO {capitulo}'))
+            for _ in range(20):
+                artigo += 1
+                elements.append(('ARTIGO', f'{artigo}º', None,
+                                 f'Art. {artigo}º Todos são iguais perante a lei.'))
+                for paragrafo in range(1, 3):
+                    elements.append(('PARAGRAFO', f'{paragrafo}º', None,
+                                     f'§ {paragrafo}º Aplica-se o disposto no caput.'))
+                for inciso in ('I', 'II', 'III'):
+                    elements.append(('INCISO', inciso, None,
+                                     f'{inciso} - garantir o desenvolvimento nacional;'))
+                    for alinea in ('a', 'b'):
+                        elements.append(('ALINEA', alinea, None,
+                                         f'{alinea}) nos termos da lei;'))
+    return elements[:count]
+
+def _tree_elements(args: argparse.Namespace) -> List[tuple]:
+    """Element stream from --synthetic or by parsing the page once"""
+    if args.synthetic:
+        return _synthetic_elements(args.synthetic)
+    content = _scale_html(_load_html(args), args.scale)
+    return _parse_elements(content, sniff_charset(content), 'bs4')
+
+def _build_processor(elements: List[tuple]) -> ConstitutionProcessor:
+    processor = ConstitutionProcessor()
+    for element in elements:
+        processor.process_element(*element)
+    return processor
+
+def _retained_memory(build, elements: List[tuple]) -> int:
+    """Bytes still allocated by the object build() returns"""
+    tracemalloc.start()
+    try:
+        result = build(elements)
+        retained = tracemalloc.get_traced_memory()[0]
+        del result
+        return retained
+    finally:
+        tracemalloc.stop()
+
+def bench_tree(args: argparse.Namespace) -> int:
+    """Compare the object tree with the compact tree for memory and build time"""
+    elements = _tree_elements(args)
+    print(f"elements: {len(elements)}")
+
+    builders = {
+        'processor': _build_processor,
+        'compact': CompactTree.from_elements,
+    }
+    for name, build in builders.items():
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            build(elements)
+            durations.append(time.perf_counter() - start)
+        print(_summarize(f"{name} build", durations))
+        retained = _retained_memory(build, elements)
+        print(f"{name}: {retained / 1024 / 1024:.1f} MiB retained")
+
+    tree = CompactTree.from_elements(elements)
+    print(f"compact: {tree.nbytes() / 1024 / 1024:.1f} MiB in arrays and buffers")
+    return 0
+
+def bench_processor(args: argparse.Namespace) -> int:
+    """Measure ConstitutionProcessor throughput on a synthetic law"""
+    elements = _synthetic_elements(args.count)
+    durations = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        _build_processor(elements)
+        durations.append(time.perf_counter() - start)
+    print(_summarize(f"processor ({len(elements)} elements)", durations))
+    print(f"processor: {len(elements) / statistics.median(durations):,.0f} elements/s")
+    return 0
+
+def _dump_result(processor: ConstitutionProcessor, output_file: Path) -> None:
+    """What JSONHandler.save_json does with get_result()"""
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(processor.get_result(), f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def bench_json(args: argparse.Namespace) -> int:
+    """Compare json.dump of get_result() with the streaming tree writer"""
+    processor = _build_processor(_tree_elements(args))
+    writers = {
+        'json.dump': _dump_result,
+        'stream': TreeJSONWriter().write,
+        'stream-compact': TreeJSONWriter(compact=True).write,
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, write in writers.items():
+            output_file = Path(tmp_dir) / f"{name}.json"
+            durations = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                write(processor, output_file)
+                durations.append(time.perf_counter() - start)
+            print(_summarize(name, durations))
+
+            tracemalloc.start()
+            try:
+                write(processor, output_file)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            size = output_file.stat().st_size
+            print(f"{name}: peak memory {peak / 1024 / 1024:.1f} MiB, "
+                  f"output {size / 1024 / 1024:.1f} MiB")
+    return 0
+
+def bench_sqlite(args: argparse.Namespace) -> int:
+    """Time the SQLite export and full-text queries against it"""
+    elements = _tree_elements(args)
+    print(f"elements: {len(elements)}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = Path(tmp_dir) / "constitution.db"
+        start = time.perf_counter()
+        processor = ConstitutionProcessor(sinks=[SQLiteExporter(str(db_file))])
+        for element in elements:
+            processor.process_element(*element)
+        processor.close_sinks()
+        print(f"export: {time.perf_counter() - start:.3f}s, "
+              f"{db_file.stat().st_size / 1024 / 1024:.1f} MiB")
+
+        for query in args.query:
+            durations = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                results = search(str(db_file), query)
+                durations.append(time.perf_counter() - start)
+            print(
+                f"{query!r}: {len(results)} results, "
+                f"median={statistics.median(durations) * 1000:.2f}ms"
+            )
+    return 0
+
+def bench_parquet(args: argparse.Namespace) -> int:
+    """Time the Parquet export and a filtered scan of it"""
+    elements = _tree_elements(args)
+    print(f"elements: {len(elements)}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        parquet_file = Path(tmp_dir) / "constitution.parquet"
+        start = time.perf_counter()
+        processor = ConstitutionProcessor(sinks=[ParquetExporter(str(parquet_file))])
+        for element in elements:
+            processor.process_element(*element)
+        processor.close_sinks()
+        print(f"export: {time.perf_counter() - start:.3f}s, "
+              f"{parquet_file.stat().st_size / 1024 / 1024:.2f} MiB")
+
+        filters = [("titulo", "==", args.titulo), ("classe", "==", args.classe)]
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            table = read_dispositivos(str(parquet_file), filters=filters)
+            durations.append(time.perf_counter() - start)
+        print(
+            f"{args.classe} in título {args.titulo}: {table.num_rows} rows, "
+            f"median={statistics.median(durations) * 1000:.2f}ms"
+        )
+    return 0
+
+def bench_formats(args: argparse.Namespace) -> int:
+    """Compare size and encode/decode speed of every installed output format"""
+    with open(args.input, encoding="utf-8") as f:
+        data = json.load(f)
+    print(f"input: {args.input}")
+
+    for name in args.formats or available_formats():
+        output_format = get_format(name)
+        encode, decode = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            content = output_format.dumps(data)
+            encode.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            output_format.loads(content)
+            decode.append(time.perf_counter() - start)
+        print(
+            f"{name}: {len(content) / 1024:.0f} KiB, "
+            f"encode median={statistics.median(encode) * 1000:.2f}ms, "
+            f"decode median={statistics.median(decode) * 1000:.2f}ms"
+        )
+    return 0
+
+def bench_schema(args: argparse.Namespace) -> int:
+    """Time whole-tree schema validation against per-título validation"""
+    elements = _tree_elements(args)
+    print(f"elements: {len(elements)}")
+    schema = ConstitutionSchema()
+
+    def uncompiled() -> None:
+        """What scrape() used to do"""
+        try:
+            jsonschema.validate(instance=_build_processor(elements).get_result(),
+                                schema=CONSTITUTION_SCHEMA)
+        except jsonschema.ValidationError:
+            pass
+
+    def compiled() -> None:
+        schema.validate_data(_build_processor(elements).get_result())
+
+    def per_titulo() -> None:
+        processor = ConstitutionProcessor()
+        schema_check = schema.node_validator(processor)
+        for element in elements:
+            processor.process_element(*element)
+        schema_check.is_valid()
+
+    candidates = {
+        'jsonschema.validate': uncompiled,
+        'compiled': compiled,
+        'per-título': per_titulo,
+    }
+    for name, validate in candidates.items():
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            validate()
+            durations.append(time.perf_counter() - start)
+        print(_summarize(f"process + {name}", durations))
+    return 0
+
+def _peak_memory_of(function) -> Tuple[Any, int]:
+    """Result of function() and the peak bytes it allocated"""
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_verify(args: argparse.Namespace) -> int:
+    """Compare manifest verification with re-decoding and validating the output"""
+    logging.getLogger('utils.schema').setLevel(logging.CRITICAL)
+    logging.getLogger('utils.manifest').setLevel(logging.CRITICAL)
+    processor = _build_processor(_tree_elements(args))
+    schema = ConstitutionSchema()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = str(Path(tmp_dir) / "constitution.json")
+        start = time.perf_counter()
+        JSONHandler.save_tree(processor, output_file)
+        print(f"save with manifest: {time.perf_counter() - start:.3f}s, "
+              f"{Path(output_file).stat().st_size / 1024 / 1024:.1f} MiB")
+
+        def reload() -> bool:
+            with open(output_file, encoding="utf-8") as f:
+                return schema.validate_data(json.load(f))
+
+        checks = {
+            'json.load + validate': reload,
+            'manifest': lambda: verify_file(output_file, "json"),
+        }
+        for name, check in checks.items():
+            durations = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                check()
+                durations.append(time.perf_counter() - start)
+            print(_summarize(name, durations))
+            verdict, peak = _peak_memory_of(check)
+            print(f"{name}: {verdict}, peak memory {peak / 1024 / 1024:.1f} MiB")
+    return 0
+
+def _to_roman(number: int) -> str:
+    numerals = [(1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'), (100, 'C'), (90, 'XC'),
+                (50, 'L'), (40, 'XL'), (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')]
+    roman = ''
+    for value, numeral in numerals:
+        while number >= value:
+            roman += numeral
+            number -= value
+    return roman
+
+def _synthetic_paragraphs(count: int) -> List[str]:
+    """Paragraph texts of a synthetic law, headings numbered in Roman numerals"""
+    headings = {'TITULO': 'TÍTULO', 'CAPITULO': 'CAPÍTULO'}
+    paragraphs = []
+    for element_type, number, _, text in _synthetic_elements(count):
+        if element_type in headings:
+            text = f'{headings[element_type]} {_to_roman(int(number))}'
+        elif element_type == 'PARAGRAFO' and number == '2º':
+            text = 'Parágrafo único. Aplica-se o disposto no caput.'
+        paragraphs.append(text)
+    return paragraphs
+
+def bench_transformer(args: argparse.Namespace) -> int:
+    """Time the ConstitutionTransformer engines on many paragraphs"""
+    logging.getLogger('utils.data_transformer').setLevel(logging.ERROR)
+    if args.synthetic:
+        paragraphs = _synthetic_paragraphs(args.synthetic)
+    else:
+        paragraphs = [element[3] for element in _tree_elements(args)]
+    print(f"paragraphs: {len(paragraphs)}")
+
+    for engine in args.engines:
+        transformer = ConstitutionTransformer(engine=engine)
+        df = transformer.create_dataframe(paragraphs)
+        durations = []
+        for _ in range(args.runs):
+            frame = df.clone() if engine == 'polars' else df.copy()
+            start = time.perf_counter()
+            transformer.extract_hierarchical_structure(frame)
+            durations.append(time.perf_counter() - start)
+        print(_summarize(engine, durations))
+        print(f"{engine}: {len(paragraphs) / statistics.median(durations):,.0f} paragraphs/s")
+    return 0
+
+def _nested_dict_iterrows(df: pd.DataFrame) -> Dict[str, Any]:
+    """What JSONHandler.df_to_nested_dict did with iterrows()"""
+    root = {}
+    for _, row in df.iterrows():
+        current_level = root
+        row_dict = row.to_dict()
+        used_cols = [c for c in HierarchyConfig.get_columns() if pd.notna(row_dict.get(c))]
+        if not used_cols:
+            continue
+        entry = {
+            "classe": used_cols[-1],
+            "numero": row_dict.get(used_cols[-1]),
+            "texto": row_dict["texto"]
+        }
+        for col in used_cols:
+            plural_key = HierarchyConfig.get_plural_mapping()[col]
+            current_level.setdefault(plural_key, {})
+            current_level[plural_key].setdefault(str(row_dict.get(col)), {})
+            current_level = current_level[plural_key][str(row_dict.get(col))]
+        current_level.setdefault("conteudo", []).append(entry)
+    return root
+
+def _law_frames(args: argparse.Namespace) -> pd.DataFrame:
+    """Transformer output of --laws copies of a law, one after the other"""
+    if args.synthetic:
+        paragraphs = _synthetic_paragraphs(args.synthetic)
+    else:
+        paragraphs = [element[3] for element in _tree_elements(args)]
+    transformer = ConstitutionTransformer()
+    law = transformer.extract_hierarchical_structure(transformer.create_dataframe(paragraphs))
+    return pd.concat([law] * args.laws, ignore_index=True)
+
+def bench_nested(args: argparse.Namespace) -> int:
+    """Time df_to_nested_dict against the iterrows() conversion it replaced"""
+    logging.getLogger('utils.json_handler').setLevel(logging.WARNING)
+    df = _law_frames(args)
+    print(f"rows: {len(df)} ({args.laws} laws)")
+
+    converters = {
+        'iterrows': _nested_dict_iterrows,
+        'columns': JSONHandler.df_to_nested_dict,
+    }
+    for name, convert in converters.items():
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            convert(df)
+            durations.append(time.perf_counter() - start)
+        print(_summarize(name, durations))
+        print(f"{name}: {len(df) / statistics.median(durations):,.0f} rows/s")
+    return 0
+
+def bench_pipeline(args: argparse.Namespace) -> int:
+    """Time paragraphs to nested dict, per engine, on a corpus of many laws"""
+    logging.getLogger('utils.data_transformer').setLevel(logging.ERROR)
+    logging.getLogger('utils.json_handler').setLevel(logging.WARNING)
+    if args.synthetic:
+        law = _synthetic_paragraphs(args.synthetic)
+    else:
+        law = [element[3] for element in _tree_elements(args)]
+    paragraphs = law * args.laws
+    print(f"paragraphs: {len(paragraphs)} ({args.laws} laws)")
+
+    for engine in args.engines:
+        transformer = ConstitutionTransformer(engine=engine)
+        stages = {'create_dataframe': [], 'extract_hierarchical_structure': [],
+                  'df_to_nested_dict': [], 'total': []}
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            df = transformer.create_dataframe(paragraphs)
+            created = time.perf_counter()
+            df = transformer.extract_hierarchical_structure(df)
+            extracted = time.perf_counter()
+            JSONHandler.df_to_nested_dict(df)
+            end = time.perf_counter()
+            stages['create_dataframe'].append(created - start)
+            stages['extract_hierarchical_structure'].append(extracted - created)
+            stages['df_to_nested_dict'].append(end - extracted)
+            stages['total'].append(end - start)
+        for stage, durations in stages.items():
+            print(_summarize(f"{engine} {stage}", durations))
+        print(f"{engine}: {len(paragraphs) / statistics.median(stages['total']):,.0f} paragraphs/s")
+    return 0
+
+def _add_page_arguments(parser: argparse.ArgumentParser, synthetic: bool = False) -> None:
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--html', type=Path,
+                        help='Raw HTML file to parse')
+    source.add_argument('--archive', type=Path, default=SRC_DIR / 'archive',
+                        help='Raw HTML archive holding --url (default: src/archive)')
+    if synthetic:
+        source.add_argument('--synthetic', type=int, default=0, metavar='N',
+                            help='Use N generated dispositivos instead of a page')
+    parser.add_argument('--url', default=CONSTITUTION_URL,
+                        help='Archived page to parse')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='Repeat the document body N times')
+    parser.add_argument('--runs', type=int, default=3)
+
+def _add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--fixtures', type=Path, required=True,
+                        help='Fixture archive recorded with main.py --record')
+    parser.add_argument('--latency', type=float, nargs=2, default=[0.0, 0.0],
+                        metavar=('MIN', 'MAX'), help='Server latency range in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Probability of a 503 answer')
+    parser.add_argument('--burst-every', type=int, default=0,
+                        help='Start a 429 burst every N requests')
+    parser.add_argument('--burst-length', type=int, default=0,
+                        help='Consecutive 429 answers per burst')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for reproducible faults')
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Scraper benchmarks')
+    parser.add_argument('--log-level', default='WARNING',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scrape = commands.add_parser('scrape', help='Time full scrape runs')
+    _add_server_arguments(scrape)
+    scrape.add_argument('--runs', type=int, default=5)
+    scrape.add_argument('--path', default=None,
+                        help='Document path (defaults to the constitution)')
+    scrape.add_argument('--stream', action='store_true',
+                        help='Parse while downloading')
+    scrape.set_defaults(handler=bench_scrape)
+
+    crawl = commands.add_parser('crawl', help='Measure fetch throughput')
+    _add_server_arguments(crawl)
+    crawl.add_argument('--repeat', type=int, default=10,
+                       help='Times each archived document is fetched')
+    crawl.add_argument('--concurrency', type=int, default=10,
+                       help='Maximum adaptive concurrency')
+    crawl.add_argument('--rate', type=float, default=10.0,
+                       help='Requests per second allowed by the token bucket')
+    crawl.set_defaults(handler=bench_crawl)
+
+    parsers = commands.add_parser(
+        'parsers', help='Time the HTML parser engines'
+    )
+    _add_page_arguments(parsers)
+    parsers.add_argument('--engines', nargs='+', default=['bs4', 'lxml', 'stream', 'cache'],
+                         help='Engines to time; speedups are relative to the first')
+    parsers.add_argument('--workers', type=int, default=0,
+                         help='Processes for parallel:<engine> (default: CPU count)')
+    parsers.add_argument('--memory', action='store_true',
+                         help='Also measure peak memory per engine (slow)')
+    parsers.set_defaults(handler=bench_parsers)
+
+    processor = commands.add_parser(
+        'processor', help='Measure hierarchy placement throughput'
+    )
+    processor.add_argument('--count', type=int, default=100_000,
+                           help='Synthetic dispositivos to process')
+    processor.add_argument('--runs', type=int, default=5)
+    processor.set_defaults(handler=bench_processor)
+
+    tree = commands.add_parser(
+        'tree', help='Compare the object tree with the compact array tree'
+    )
+    _add_page_arguments(tree, synthetic=True)
+    tree.set_defaults(handler=bench_tree)
+
+    writer = commands.add_parser(
+        'json', help='Compare json.dump with the streaming JSON writer'
+    )
+    _add_page_arguments(writer, synthetic=True)
+    writer.set_defaults(handler=bench_json)
+
+    sqlite = commands.add_parser(
+        'sqlite', help='Time the SQLite export and full-text search'
+    )
+    _add_page_arguments(sqlite, synthetic=True)
+    sqlite.add_argument('--query', nargs='+',
+                        default=['principios', 'desenvolvimento nacional', 'disposicoes transitorias'],
+                        help='FTS5 queries to time')
+    sqlite.set_defaults(handler=bench_sqlite)
+
+    parquet = commands.add_parser(
+        'parquet', help='Time the Parquet export and a filtered scan'
+    )
+    _add_page_arguments(parquet, synthetic=True)
+    parquet.add_argument('--titulo', default='II', help='Título to filter on')
+    parquet.add_argument('--classe', default='inciso', help='Element type to filter on')
+    parquet.set_defaults(handler=bench_parquet)
+
+    formats = commands.add_parser(
+        'formats', help='Compare output formats for size and speed'
+    )
+    formats.add_argument('--input', type=Path, default=SRC_DIR / 'data' / 'constitution.json',
+                         help='Scraped constitution to re-encode')
+    formats.add_argument('--formats', nargs='+', default=None,
+                         help='Formats to compare (default: every installed one)')
+    formats.add_argument('--runs', type=int, default=5)
+    formats.set_defaults(handler=bench_formats)
+
+    schema = commands.add_parser(
+        'schema', help='Time whole-tree and per-título schema validation'
+    )
+    _add_page_arguments(schema, synthetic=True)
+    schema.set_defaults(handler=bench_schema)
+
+    verify = commands.add_parser(
+        'verify', help='Compare manifest verification with re-parsing the output'
+    )
+    _add_page_arguments(verify, synthetic=True)
+    verify.set_defaults(handler=bench_verify)
+
+    transformer = commands.add_parser(
+        'transformer', help='Time the DataFrame transformation engines'
+    )
+    _add_page_arguments(transformer, synthetic=True)
+    transformer.add_argument('--engines', nargs='+', choices=ENGINES,
+                             default=['rowwise', 'vectorized'],
+                             help='Engines to time')
+    transformer.set_defaults(handler=bench_transformer)
+
+    nested = commands.add_parser(
+        'nested', help='Time the DataFrame to nested dict conversion'
+    )
+    _add_page_arguments(nested, synthetic=True)
+    nested.add_argument('--laws', type=int, default=5,
+                        help='Copies of the law concatenated into one DataFrame')
+    nested.set_defaults(handler=bench_nested)
+
+    pipeline = commands.add_parser(
+        'pipeline', help='Time the engines from paragraphs to nested dict'
+    )
+    _add_page_arguments(pipeline, synthetic=True)
+    pipeline.add_argument('--laws', type=int, default=20,
+                          help='Copies of the law in the corpus')
+    pipeline.add_argument('--engines', nargs='+', choices=ENGINES,
+                          default=['vectorized', 'polars'],
+                          help='Engines to time')
+    pipeline.set_defaults(handler=bench_pipeline)
+
+    return parser.parse_args()
+
+def main():
+    """Entry point function"""
+    args = parse_arguments()
+    logging.basicConfig(level=getattr(logging, args.log_level))
+    result = args.handler(args)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    sys.exit(result)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 Main entry point for constitution scraping.
 Author: gabes-machado
 Created: 2025-01-17 01:52:27 UTC
+Updated: 2026-10-17 02:57:09 UTC
 """
 
 import asyncio
@@ -19,9 +20,29 @@ import platform
 DEFAULT_CONFIG = {
     "base_url": "https://www.planalto.gov.br",
     "max_retries": 3,
+    "retry_budget": 10,
+    "deadline": 300,
     "timeout": 30,
     "log_level": "INFO",
-    "output_format": "json"
+    "output_format": "json",
+    "cache_enabled": True,
+    "cache_max_mb": 256,
+    "connections_per_host": 8,
+    "dns_cache_ttl": 300,
+    "requests_per_second": 10.0,
+    "burst": 5,
+    "max_concurrency": 10,
+    "fixture_mode": None,
+    "fixture_dir": None,
+    "archive_enabled": True,
+    "parser_engine": "bs4",
+    "streaming": False,
+    "parse_workers": 0,
+    "element_cache_enabled": True,
+    "json_compact": False,
+    "ndjson_output": None,
+    "sqlite_output": None,
+    "parquet_output": None
 }
 
 class ScraperApp:
@@ -32,6 +53,7 @@ class ScraperApp:
         self.config = DEFAULT_CONFIG.copy()
         self.start_time = None
         self.output_file = None
+        self.from_archive = False
         self._shutdown_requested = False
 
     def setup_logging(self, log_level: str = "INFO") -> logging.Logger:
@@ -116,7 +138,9 @@ class ScraperApp:
             dirs = {
                 'data': Path(__file__).parent / "data",
                 'logs': Path(__file__).parent / "logs",
-                'temp': Path(__file__).parent / "temp"
+                'temp': Path(__file__).parent / "temp",
+                'cache': Path(__file__).parent / "cache",
+                'archive': Path(__file__).parent / "archive"
             }
             
             for name, path in dirs.items():
@@ -136,19 +160,76 @@ class ScraperApp:
         """
         try:
             from scraper.constitution import ConstitutionScraper
+            from utils.http_client import ConnectionPoolConfig
+            from utils.ndjson_export import NDJSONExporter
+            from utils.sqlite_export import SQLiteExporter
+            from utils.parquet_export import ParquetExporter
+            
+            cache_dir = (
+                Path(__file__).parent / "cache"
+                if self.config['cache_enabled'] else None
+            )
+            element_cache_dir = (
+                Path(__file__).parent / "cache" / "elements"
+                if self.config['element_cache_enabled'] else None
+            )
+            archive_dir = (
+                Path(__file__).parent / "archive"
+                if self.config['archive_enabled'] or self.from_archive else None
+            )
             
             scraper = ConstitutionScraper(
                 base_url=self.config['base_url'],
                 max_retries=self.config['max_retries'],
-                timeout=self.config['timeout']
+                retry_budget=self.config['retry_budget'],
+                deadline=self.config['deadline'],
+                requests_per_second=self.config['requests_per_second'],
+                burst=self.config['burst'],
+                max_concurrency=self.config['max_concurrency'],
+                fixture_mode=self.config['fixture_mode'],
+                fixture_dir=self.config['fixture_dir'],
+                archive_dir=str(archive_dir) if archive_dir else None,
+                parser_engine=self.config['parser_engine'],
+                element_cache_dir=(
+                    str(element_cache_dir) if element_cache_dir else None
+                ),
+                timeout=self.config['timeout'],
+                cache_dir=str(cache_dir) if cache_dir else None,
+                cache_max_bytes=int(self.config['cache_max_mb'] * 1024 * 1024),
+                pool_config=ConnectionPoolConfig(
+                    limit_per_host=self.config['connections_per_host'],
+                    ttl_dns_cache=self.config['dns_cache_ttl']
+                )
             )
             
-            success = await scraper.scrape(str(self.output_file))
+            sinks = []
+            if self.config['ndjson_output']:
+                sinks.append(NDJSONExporter(self.config['ndjson_output']))
+            if self.config['sqlite_output']:
+                sinks.append(SQLiteExporter(self.config['sqlite_output']))
+            if self.config['parquet_output']:
+                sinks.append(ParquetExporter(
+                    self.config['parquet_output'],
+                    document=f"{scraper.base_url}{scraper.constitution_path}"
+                ))
+            
+            async with scraper:
+                success = await scraper.scrape(
+                    str(self.output_file),
+                    from_archive=self.from_archive,
+                    streaming=self.config['streaming'],
+                    parse_workers=self.config['parse_workers'],
+                    compact=self.config['json_compact'],
+                    output_format=self.config['output_format'],
+                    sinks=sinks
+                )
             
             if success:
                 self.logger.info("Scraping completed successfully")
                 # Verify the output
-                if await scraper.verify_structure(str(self.output_file)):
+                if await scraper.verify_structure(
+                    str(self.output_file), self.config['output_format']
+                ):
                     self.logger.info("Output verification successful")
                 else:
                     self.logger.error("Output verification failed")
@@ -184,6 +265,63 @@ class ScraperApp:
             type=Path,
             help='Output file path'
         )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Disable the response cache and the parsed element cache'
+        )
+        fixtures = parser.add_mutually_exclusive_group()
+        fixtures.add_argument(
+            '--record',
+            type=Path,
+            metavar='DIR',
+            help='Record every HTTP response to a fixture archive'
+        )
+        fixtures.add_argument(
+            '--replay',
+            type=Path,
+            metavar='DIR',
+            help='Serve HTTP responses from a fixture archive (no network)'
+        )
+        parser.add_argument(
+            '--from-archive',
+            action='store_true',
+            help='Re-parse the latest archived HTML instead of fetching it'
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Parse the page incrementally while it downloads'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            metavar='N',
+            help='Parse large documents in N processes, split at títulos'
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Write the JSON output without indentation'
+        )
+        parser.add_argument(
+            '--ndjson',
+            type=Path,
+            metavar='FILE',
+            help='Also export one JSON line per dispositivo with its path'
+        )
+        parser.add_argument(
+            '--sqlite',
+            type=Path,
+            metavar='FILE',
+            help='Also export a SQLite database with a full-text index'
+        )
+        parser.add_argument(
+            '--parquet',
+            type=Path,
+            metavar='FILE',
+            help='Also export the flattened dispositivos as Parquet'
+        )
         return parser.parse_args()
 
     async def run(self) -> int:
@@ -202,6 +340,25 @@ class ScraperApp:
             
             # Load configuration
             self.load_config(args.config)
+            if args.no_cache:
+                self.config['cache_enabled'] = False
+                self.config['element_cache_enabled'] = False
+            if args.record or args.replay:
+                self.config['fixture_mode'] = 'record' if args.record else 'replay'
+                self.config['fixture_dir'] = str(args.record or args.replay)
+            self.from_archive = args.from_archive
+            if args.stream:
+                self.config['streaming'] = True
+            if args.workers is not None:
+                self.config['parse_workers'] = args.workers
+            if args.compact:
+                self.config['json_compact'] = True
+            if args.ndjson:
+                self.config['ndjson_output'] = str(args.ndjson)
+            if args.sqlite:
+                self.config['sqlite_output'] = str(args.sqlite)
+            if args.parquet:
+                self.config['parquet_output'] = str(args.parquet)
             
             # Setup signal handlers
             self.setup_signal_handlers()
@@ -209,10 +366,14 @@ class ScraperApp:
             # Create directories
             self.create_directories()
             
+            # Resolve the output format selected by the configuration
+            from utils.output_formats import get_format
+            output_format = get_format(self.config['output_format'])
+            
             # Set output file
             data_dir = Path(__file__).parent / "data"
             self.output_file = args.output or (
-                data_dir / "constitution.json"
+                data_dir / f"constitution{output_format.suffix}"
             )
             
             # Record start time
@@ -2,24 +2,45 @@
 Main constitution scraper implementation.
 Author: gabes-machado
 Created: 2025-01-17 01:50:49 UTC
-Updated: 2025-01-19 20:25:35 UTC
+Updated: 2026-10-17 03:34:18 UTC
 """
 
 import logging
-import asyncio
-import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 from datetime import datetime
 from pathlib import Path
 
-from utils.http_client import AsyncHTTPClient, HTTPClientError
+from utils.http_client import (
+    AsyncHTTPClient, 
+    HTTPClientError, 
+    ConnectionPoolConfig,
+    FetchedDocument,
+    STREAM_CHUNK_SIZE
+)
+from utils.http_cache import ResponseCache
+from utils.retry_policy import RetryPolicy
+from utils.rate_limiter import HostRateLimiter
+from utils.http_fixtures import FixtureArchive, FixtureMode
+from utils.html_archive import RawHTMLArchive, ArchiveWriter, HTMLArchiveError
 from utils.html_parser import HTMLParser
-from utils.constitution_structure import ConstitutionProcessor
-from utils.json_handler import JSONHandler
+from utils.element_cache import ElementCache
+from utils.html_stream import StreamingHTMLParser
+from utils.parallel_parser import parse_parallel_async
+from utils.constitution_structure import (
+    ConstitutionProcessor,
+    ElementSink,
+    ElementSinkError,
+    StructureType,
+    KEYS
+)
+from utils.json_handler import JSONHandler, JSONHandlerError
+from utils.manifest import TreeDigest, manifest_path, read_manifest, verify_file
 from utils.schema import ConstitutionSchema
 
 logger = logging.getLogger(__name__)
 
+Element = Tuple[str, Optional[str], Optional[str], str]
+
 class ConstitutionScraperError(Exception):
     """Custom exception for constitution scraping errors"""
     pass
@@ -31,15 +52,46 @@ class ConstitutionScraper:
         self, 
         base_url: str = "https://www.planalto.gov.br",
         max_retries: int = 3,
-        timeout: int = 30
+        timeout: int = 30,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        retry_budget: int = 10,
+        deadline: Optional[float] = None,
+        requests_per_second: float = 10.0,
+        burst: int = 5,
+        max_concurrency: int = 10,
+        fixture_dir: Optional[str] = None,
+        fixture_mode: Optional[str] = None,
+        archive_dir: Optional[str] = None,
+        parser_engine: str = "bs4",
+        element_cache_dir: Optional[str] = None
     ):
         """
         Initialize the constitution scraper
         
         Args:
             base_url: Base URL for the Planalto website
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts per request
             timeout: Request timeout in seconds
+            cache_dir: Directory for the conditional-GET response cache
+                (caching is disabled when None)
+            cache_max_bytes: Maximum size of the response cache in bytes
+            pool_config: Connection pool tuning for the shared HTTP client
+            retry_budget: Total number of retries allowed for the whole run
+            deadline: Overall time limit in seconds for all requests of a run
+            requests_per_second: Sustained request rate allowed per host
+            burst: Requests that may be sent back to back per host
+            max_concurrency: Upper bound of the adaptive per-host concurrency
+            fixture_dir: Fixture archive directory for record/replay
+            fixture_mode: "record" to save every response to fixture_dir,
+                "replay" to serve responses from it without network access
+            archive_dir: Directory where every fetched page is kept as
+                compressed raw bytes (archiving is disabled when None)
+            parser_engine: HTML tree backend ("bs4", "lxml" or "auto");
+                lxml reads unclosed <p> tags differently (see LxmlBackend)
+            element_cache_dir: Directory caching the parsed elements of
+                each distinct page (disabled when None)
         """
         self.base_url = base_url.rstrip('/')
         self.constitution_path = "/ccivil_03/constituicao/constituicao.htm"
@@ -47,12 +99,78 @@ class ConstitutionScraper:
         self.timeout = timeout
         self.stats = self._init_stats()
         self.schema_validator = ConstitutionSchema()
+        self.response_cache = (
+            ResponseCache(cache_dir, max_bytes=cache_max_bytes)
+            if cache_dir else None
+        )
+        self.pool_config = pool_config
+        self.retry_policy = RetryPolicy(
+            max_attempts=max_retries,
+            retry_budget=retry_budget,
+            deadline=deadline
+        )
+        self.rate_limiter = HostRateLimiter(
+            requests_per_second=requests_per_second,
+            burst=burst,
+            max_concurrency=max_concurrency
+        )
+        self.fixture_mode = FixtureMode(fixture_mode) if fixture_mode else None
+        self.fixtures = (
+            FixtureArchive(fixture_dir) if self.fixture_mode else None
+        )
+        self.html_archive = RawHTMLArchive(archive_dir) if archive_dir else None
+        self.parser_engine = parser_engine
+        self.element_cache = (
+            ElementCache(element_cache_dir) if element_cache_dir else None
+        )
+        self._client: Optional[AsyncHTTPClient] = None
+        self._in_context = False
         
         logger.info(
             f"Initialized ConstitutionScraper "
             f"(base_url={base_url}, max_retries={max_retries})"
         )
 
+    async def __aenter__(self):
+        """Async context manager entry, keeping one client for the whole run"""
+        self._in_context = True
+        await self._get_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit closing the shared client"""
+        self._in_context = False
+        await self.close()
+
+    async def _get_client(self) -> AsyncHTTPClient:
+        """
+        Get the shared HTTP client, creating it on first use
+        
+        The same client (and therefore the same session and connection
+        pool) is reused across retries and across every fetched document.
+        """
+        if self._client is None:
+            self._client = AsyncHTTPClient(
+                timeout=self.timeout,
+                cache=self.response_cache,
+                pool_config=self.pool_config,
+                retry_policy=self.retry_policy,
+                rate_limiter=self.rate_limiter,
+                fixtures=self.fixtures,
+                fixture_mode=self.fixture_mode
+            )
+        if not self._client.is_open:
+            await self._client.create_session()
+        return self._client
+
+    async def close(self) -> None:
+        """Close the shared HTTP client, its connection pool and the fixture index"""
+        if self._client is not None:
+            await self._client.close_session()
+            self._client = None
+        if self.fixtures is not None:
+            self.fixtures.close()
+
     def _init_stats(self) -> Dict[str, Any]:
         """Initialize statistics tracking"""
         return {
@@ -82,9 +200,14 @@ class ConstitutionScraper:
 
     def _update_element_count(self, element_type: str) -> None:
         """Update element type counter"""
-        element_type = element_type.lower()
-        if element_type in self.stats["element_counts"]:
-            self.stats["element_counts"][element_type] += 1
+        try:
+            structure_type = StructureType[element_type.upper()]
+        except KeyError:
+            return
+        # Counters are keyed like the output ("titulos", "adct", ...)
+        key = KEYS.get(structure_type, structure_type.value.lower())
+        if key in self.stats["element_counts"]:
+            self.stats["element_counts"][key] += 1
 
     def _log_stats(self) -> None:
         """Log scraping statistics"""
@@ -107,44 +230,276 @@ class ConstitutionScraper:
             logger.info(f"Errors: {self.stats['errors']}")
             logger.info(f"Warnings: {self.stats['warnings']}")
 
-    async def _fetch_html(self) -> str:
+            if self.element_cache:
+                element_stats = self.element_cache.get_stats()
+                logger.info(
+                    f"Element cache: {element_stats['hits']} hits, "
+                    f"{element_stats['misses']} misses"
+                )
+
+            if self.response_cache:
+                cache_stats = self.response_cache.get_stats()
+                logger.info(
+                    f"Response cache: {cache_stats['hits']} hits, "
+                    f"{cache_stats['misses']} misses, "
+                    f"{cache_stats['load_errors']} unreadable bodies, "
+                    f"{cache_stats['bytes_saved']} bytes saved"
+                )
+
+            for host, host_stats in self.rate_limiter.get_stats().items():
+                logger.info(
+                    f"Concurrency limit for {host}: {host_stats['limit']}"
+                )
+
+    async def _fetch_html(self, path: Optional[str] = None) -> FetchedDocument:
         """
-        Fetch HTML content with retry logic
+        Fetch raw HTML content and its sniffed charset
+        
+        Retries happen inside the HTTP client under the scraper's
+        RetryPolicy, so the run retry budget and deadline bound the total
+        time spent here.
+        
+        Args:
+            path: Document path relative to base_url (defaults to the
+                constitution page)
         
         Returns:
-            str: HTML content
+            FetchedDocument: Raw HTML bytes and charset
             
         Raises:
             ConstitutionScraperError: If fetching fails after retries
         """
-        url = f"{self.base_url}{self.constitution_path}"
+        url = f"{self.base_url}{path or self.constitution_path}"
+        client = await self._get_client()
         
-        for attempt in range(self.max_retries):
+        try:
+            document = await client.get_document(url)
+        except HTTPClientError as e:
+            raise ConstitutionScraperError(
+                f"Failed to fetch {url} "
+                f"(retries used: {self.retry_policy.retries_used}): {e}"
+            ) from e
+            
+        if not document.content:
+            raise ConstitutionScraperError("Empty response received")
+            
+        logger.info(
+            f"Successfully fetched {len(document.content)} bytes "
+            f"(charset={document.charset}, cached={document.from_cache})"
+        )
+        
+        if self.html_archive:
             try:
-                async with AsyncHTTPClient(
-                    timeout=self.timeout,
-                    max_retries=2
-                ) as client:
-                    content = await client.get(url)
+                self.html_archive.store(url, document.content, document.charset)
+            except HTMLArchiveError as e:
+                logger.warning(f"Could not archive {url}: {e}")
+                self._update_stats(warnings=self.stats["warnings"] + 1)
+        return document
+
+    def _load_archived_html(self, path: Optional[str] = None) -> FetchedDocument:
+        """
+        Load the latest archived raw HTML instead of fetching it
+        
+        Args:
+            path: Document path relative to base_url (defaults to the
+                constitution page)
+        
+        Returns:
+            FetchedDocument: Archived HTML bytes and charset
+            
+        Raises:
+            ConstitutionScraperError: If no archived copy is available
+        """
+        url = f"{self.base_url}{path or self.constitution_path}"
+        if not self.html_archive:
+            raise ConstitutionScraperError("HTML archive is not configured")
+        
+        try:
+            page = self.html_archive.latest(url)
+            if page is None:
+                raise HTMLArchiveError(f"No archived version of {url}")
+            content = self.html_archive.load(url, page.content_sha256)
+        except HTMLArchiveError as e:
+            raise ConstitutionScraperError(str(e)) from e
+        
+        logger.info(
+            f"Loaded archived {url} ({len(content)} bytes, "
+            f"sha256={page.content_sha256[:12]})"
+        )
+        return FetchedDocument(url=url, content=content, charset=page.charset)
+
+    async def _stream_elements(
+        self,
+        path: Optional[str] = None,
+        from_archive: bool = False
+    ) -> AsyncIterator[Element]:
+        """
+        Yield constitutional elements while the page is still downloading
+        
+        Response chunks go straight into a StreamingHTMLParser (and into
+        the raw HTML archive), so neither the body nor a document tree is
+        ever held in memory.
+        
+        Args:
+            path: Document path relative to base_url (defaults to the
+                constitution page)
+            from_archive: Parse the latest archived HTML instead of
+                fetching the page
+        
+        Yields:
+            Element: (element_type, number, title, text) in document order
+            
+        Raises:
+            ConstitutionScraperError: If fetching fails after retries
+        """
+        if from_archive:
+            document = self._load_archived_html(path)
+            parser = StreamingHTMLParser(encoding=document.charset)
+            for offset in range(0, len(document.content), STREAM_CHUNK_SIZE):
+                for element in parser.feed(
+                    document.content[offset:offset + STREAM_CHUNK_SIZE]
+                ):
+                    yield element
+            for element in parser.close():
+                yield element
+            return
+
+        url = f"{self.base_url}{path or self.constitution_path}"
+        client = await self._get_client()
+        stream = client.stream_document(url)
+        parser = None
+        writer = None
+        completed = False
+        
+        try:
+            async for chunk in stream:
+                if parser is None:
+                    parser = StreamingHTMLParser(encoding=stream.charset)
+                    writer = self._open_archive_writer(url)
+                if writer:
+                    try:
+                        writer.write(chunk)
+                    except HTMLArchiveError as e:
+                        logger.warning(f"Could not archive {url}: {e}")
+                        self._update_stats(warnings=self.stats["warnings"] + 1)
+                        writer = None
+                for element in parser.feed(chunk):
+                    yield element
                     
-                    if not content:
-                        raise ConstitutionScraperError("Empty response received")
-                        
+            if parser is None:
+                raise ConstitutionScraperError("Empty response received")
+            for element in parser.close():
+                yield element
+            completed = True
+            
+        except HTTPClientError as e:
+            raise ConstitutionScraperError(
+                f"Failed to fetch {url} "
+                f"(retries used: {self.retry_policy.retries_used}): {e}"
+            ) from e
+            
+        finally:
+            if writer and not completed:
+                writer.abort()
+                
+        logger.info(
+            f"Successfully streamed {stream.size} bytes "
+            f"(charset={parser.encoding}, cached={stream.from_cache})"
+        )
+        if writer:
+            try:
+                writer.commit(parser.encoding)
+            except HTMLArchiveError as e:
+                logger.warning(f"Could not archive {url}: {e}")
+                self._update_stats(warnings=self.stats["warnings"] + 1)
+
+    def _open_archive_writer(self, url: str) -> Optional[ArchiveWriter]:
+        """Start archiving a streamed page, if archiving is enabled"""
+        if not self.html_archive:
+            return None
+        try:
+            return self.html_archive.open_writer(url)
+        except HTMLArchiveError as e:
+            logger.warning(f"Could not archive {url}: {e}")
+            self._update_stats(warnings=self.stats["warnings"] + 1)
+            return None
+
+    async def _parse_document(
+        self,
+        document: FetchedDocument,
+        parse_workers: int = 0
+    ) -> List[Element]:
+        """
+        Parse a fetched page into its element stream
+        
+        Byte-identical pages already parsed by the current parser version,
+        with the same engine and charset, are served from the element
+        cache without parsing.
+        
+        Args:
+            document: Raw page bytes and charset
+            parse_workers: Processes for parallel parsing (see scrape)
+            
+        Returns:
+            List[Element]: (element_type, number, title, text) in document order
+        """
+        key = None
+        if self.element_cache:
+            key = ElementCache.content_key(
+                document.content, self.parser_engine, document.charset
+            )
+            elements = self.element_cache.load(key)
+            if elements is not None:
+                return elements
+
+        if parse_workers > 1:
+            elements = await parse_parallel_async(
+                document.content,
+                charset=document.charset,
+                engine=self.parser_engine,
+                workers=parse_workers
+            )
+        else:
+            parser = HTMLParser(
+                document.content,
+                encoding=document.charset,
+                engine=self.parser_engine
+            )
+            parser.remove_strike_tags()
+            elements = list(parser.iter_constitutional_elements())
+
+        if key:
+            self.element_cache.store(key, elements)
+        return elements
+
+    def _process_element(
+        self,
+        processor: ConstitutionProcessor,
+        idx: int,
+        element: Element,
+        total: Optional[int] = None
+    ) -> None:
+        """Feed one element to the processor, updating the statistics"""
+        element_type, number, title, text = element
+        try:
+            processor.process_element(element_type, number, title, text)
+            self._update_stats(processed_elements=idx)
+            self._update_element_count(element_type)
+            
+            if idx % 50 == 0:  # Progress update every 50 elements
+                if total:
                     logger.info(
-                        f"Successfully fetched {len(content)} bytes "
-                        f"(attempt {attempt + 1}/{self.max_retries})"
+                        f"Progress: {idx}/{total} ({idx/total*100:.1f}%)"
                     )
-                    return content
+                else:
+                    logger.info(f"Progress: {idx} elements")
                     
-            except HTTPClientError as e:
-                logger.warning(
-                    f"Attempt {attempt + 1}/{self.max_retries} failed: {e}"
-                )
-                if attempt == self.max_retries - 1:
-                    raise ConstitutionScraperError(
-                        f"Failed to fetch constitution after {self.max_retries} attempts"
-                    ) from e
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        except ElementSinkError:
+            # A broken export fails the run instead of being left incomplete
+            raise
+        except Exception as e:
+            logger.error(f"Error processing element {idx}: {e}")
+            self._update_stats(errors=self.stats["errors"] + 1)
 
     def _validate_output_path(self, output_file: str) -> None:
         """
@@ -166,63 +521,90 @@ class ConstitutionScraper:
         except Exception as e:
             raise ConstitutionScraperError(f"Invalid output path: {e}")
 
-    async def scrape(self, output_file: str) -> bool:
+    async def scrape(
+        self, 
+        output_file: str, 
+        path: Optional[str] = None,
+        from_archive: bool = False,
+        streaming: bool = False,
+        parse_workers: int = 0,
+        compact: bool = False,
+        output_format: str = "json",
+        sinks: Optional[List[ElementSink]] = None
+    ) -> bool:
         """
         Execute the complete scraping process
         
         Args:
             output_file: Path to save the JSON output
+            path: Document path relative to base_url (defaults to the
+                constitution page)
+            from_archive: Re-parse the latest archived HTML instead of
+                fetching the page
+            streaming: Parse the page incrementally while it downloads,
+                feeding each element to the processor as soon as its
+                paragraph closes
+            parse_workers: When above 1, split the page at título/livro
+                headings and parse the segments in that many processes
+                (ignored when streaming)
+            compact: Write the JSON without indentation
+            output_format: Format of the output file ("json", "orjson",
+                "msgpack" or "cbor")
+            sinks: Exports fed with every element while it is processed;
+                they are closed after the output is saved and aborted
+                if the run fails, including when one of them fails
             
         Returns:
             bool: True if successful, False otherwise
         """
         self._update_stats(start_time=datetime.utcnow())
+        # Every run gets the full retry budget and its own deadline
+        self.retry_policy.reset()
+        processor = ConstitutionProcessor(sinks=sinks)
+        # The schema is checked one título at a time while the tree is built
+        schema_check = self.schema_validator.node_validator(processor)
         
         try:
             # Validate output path
             self._validate_output_path(output_file)
+            
+            if streaming:
+                idx = 0
+                async for element in self._stream_elements(path, from_archive):
+                    idx += 1
+                    self._update_stats(total_elements=idx)
+                    self._process_element(processor, idx, element)
+            else:
+                # Fetch HTML content
+                if from_archive:
+                    document = self._load_archived_html(path)
+                else:
+                    document = await self._fetch_html(path)
+                if not document.content:
+                    raise ConstitutionScraperError("Failed to fetch HTML content")
 
-            # Fetch HTML content
-            html_content = await self._fetch_html()
-            if not html_content:
-                raise ConstitutionScraperError("Failed to fetch HTML content")
+                # Parse (or load the cached elements of identical bytes)
+                elements = await self._parse_document(document, parse_workers)
+                
+                # Process constitutional elements
+                self._update_stats(total_elements=len(elements))
+                
+                for idx, element in enumerate(elements, 1):
+                    self._process_element(processor, idx, element, len(elements))
 
-            # Initialize parser and processor
-            parser = HTMLParser(html_content)
-            parser.remove_strike_tags()
-            processor = ConstitutionProcessor()
-            
-            # Process constitutional elements
-            elements = list(parser.iter_constitutional_elements())
-            self._update_stats(total_elements=len(elements))
-            
-            for idx, (element_type, number, title, text) in enumerate(elements, 1):
-                try:
-                    processor.process_element(element_type, number, title, text)
-                    self._update_stats(processed_elements=idx)
-                    self._update_element_count(element_type)
-                    
-                    if idx % 50 == 0:  # Progress update every 50 elements
-                        logger.info(
-                            f"Progress: {idx}/{len(elements)} "
-                            f"({idx/len(elements)*100:.1f}%)"
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"Error processing element {idx}: {e}")
-                    self._update_stats(errors=self.stats["errors"] + 1)
-
-            # Get and validate result
-            result = processor.get_result()
-            if not result:
+            if not processor.ordinal:
                 raise ConstitutionScraperError("Empty processing result")
             
-            # Validate against schema before saving
-            if not self.schema_validator.validate_data(result):
+            # Closed títulos were validated as the next one started
+            if not schema_check.is_valid():
                 raise ConstitutionScraperError("Schema validation failed")
                 
-            # Save validated result
-            JSONHandler.save_json(result, output_file)
+            # Save validated result; stdlib JSON is streamed from the tree itself
+            if output_format == "json":
+                JSONHandler.save_tree(processor, output_file, compact=compact)
+            else:
+                JSONHandler.save_data(processor.get_result(), output_file, output_format)
+            processor.close_sinks()
             
             logger.info(f"Constitution successfully saved to: {output_file}")
             return True
@@ -230,18 +612,36 @@ class ConstitutionScraper:
         except Exception as e:
             logger.error(f"Scraping failed: {e}", exc_info=True)
             self._update_stats(errors=self.stats["errors"] + 1)
+            processor.abort_sinks()
             return False
             
         finally:
+            # Outside a context manager nobody else will close the client
+            if not self._in_context:
+                await self.close()
             self._update_stats(end_time=datetime.utcnow())
             self._log_stats()
 
-    async def verify_structure(self, output_file: str) -> bool:
+    async def verify_structure(
+        self,
+        output_file: str,
+        output_format: Optional[str] = None,
+        deep: bool = False
+    ) -> bool:
         """
         Verify the structure of a saved constitution file
         
+        Files written by scrape() were validated before saving and have a
+        manifest, so checking the SHA-256 of their bytes against it is
+        enough and needs one sequential read. Files without a manifest,
+        or a deep check, are decoded and validated against the schema.
+        
         Args:
-            output_file: Path to the JSON file
+            output_file: Path to the output file
+            output_format: Format the file was written in (guessed from
+                the suffix if None)
+            deep: Also decode the file, compare its Merkle hash with the
+                manifest and validate it
             
         Returns:
             bool: True if valid, False otherwise
@@ -251,15 +651,28 @@ class ConstitutionScraper:
                 logger.error(f"File not found: {output_file}")
                 return False
 
-            # Load and validate JSON
-            with open(output_file, 'r', encoding='utf-8') as f:
-                try:
-                    data = json.load(f)
-                    return self.schema_validator.validate_data(data)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON format: {e}")
+            has_manifest = manifest_path(output_file).exists()
+            if has_manifest:
+                if not verify_file(output_file, output_format):
+                    return False
+                if not deep:
+                    logger.info(f"{output_file} matches its manifest")
+                    return True
+
+            # Load and validate the decoded data
+            try:
+                data = JSONHandler.load_data(output_file, output_format)
+            except JSONHandlerError as e:
+                logger.error(f"Invalid {output_format or 'output'} format: {e}")
+                return False
+            if has_manifest:
+                digest = TreeDigest()
+                digest.digest(data)
+                if digest.root_hex != read_manifest(output_file).get("merkle_root"):
+                    logger.error(f"Merkle hash of {output_file} does not match its manifest")
                     return False
+            return self.schema_validator.validate_data(data)
             
         except Exception as e:
             logger.error(f"Verification failed: {e}")
-            return False
\ No newline at end of file
+            return False
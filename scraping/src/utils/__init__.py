@@ -5,6 +5,7 @@ Created: 2025-01-16 20:54:16 UTC
 """
 
 from .http_client import AsyncHTTPClient
+from .http_cache import ResponseCache
 from .text_processor import TextProcessor
 from .html_parser import HTMLParser
 from .data_transformer import ConstitutionTransformer
@@ -13,6 +14,7 @@ from .json_handler import JSONHandler
 # Define what should be available when someone does: from utils import *
 __all__ = [
     'AsyncHTTPClient',
+    'ResponseCache',
     'TextProcessor',
     'HTMLParser',
     'ConstitutionTransformer',
@@ -0,0 +1,270 @@
+"""
+Array-backed compact representation of a processed law.
+Author: gabes-machado
+Created: 2026-10-17 01:08:44 UTC
+Updated: 2026-10-17 01:27:13 UTC
+"""
+
+import logging
+from array import array
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .constitution_structure import StructureType, LEVELS, KEYS, MAX_LEVEL
+
+logger = logging.getLogger(__name__)
+
+Element = Tuple[str, Optional[str], Optional[str], str]
+
+NO_NODE = -1
+
+class CompactTreeError(Exception):
+    """Custom exception for compact tree errors"""
+    pass
+
+class CompactTree:
+    """
+    Same hierarchy ConstitutionProcessor builds, stored in parallel arrays.
+
+    Every dispositivo is a node index. Per node the tree keeps a type
+    code, its parent, first child, last child and next sibling, the id of
+    its interned number string and the offset of its text in one UTF-8
+    buffer; there are no per-node objects or content dicts.
+
+    Node 0 is the root (holding the preâmbulo paragraphs as children) and
+    node 1 holds the ADCT paragraphs. Elements are placed exactly as
+    ConstitutionProcessor places them, and to_dict() returns the same
+    dictionary as ConstitutionProcessor.get_result(), including its
+    overwrite rules for repeated keys.
+    """
+
+    ROOT = 0
+    ADCT = 1
+
+    # Type codes are positions in this tuple
+    _TYPES = tuple(StructureType)
+    _CODES = {element_type: code for code, element_type in enumerate(_TYPES)}
+    _PREAMBULO = _CODES[StructureType.PREAMBULO]
+    _ADCT = _CODES[StructureType.ADCT]
+    _LEVELS = tuple(LEVELS[element_type] for element_type in _TYPES)
+    _KEYS = tuple(KEYS.get(element_type) for element_type in _TYPES)
+    _CLASSES = tuple(element_type.value.lower() for element_type in _TYPES)
+
+    def __init__(self):
+        self.types = array('B')
+        self.parents = array('i')
+        self.first_child = array('i')
+        self.last_child = array('i')
+        self.next_sibling = array('i')
+        self.number_ids = array('i')
+        self.text_offsets = array('Q', [0])
+        self.text_buffer = bytearray()
+        self.numbers: List[str] = []
+        self.titles: Dict[int, str] = {}
+        self._number_ids: Dict[str, int] = {}
+        # Same ancestor table as ConstitutionProcessor.ancestors
+        self._ancestors = array('i', [self.ROOT] * (MAX_LEVEL + 1))
+
+        self._append(self._PREAMBULO, NO_NODE, None, None, "")
+        self._append(self._ADCT, NO_NODE, None, None, "")
+
+    @classmethod
+    def from_elements(cls, elements: Iterable[Element]) -> 'CompactTree':
+        """
+        Build a tree from parsed (element_type, number, title, text) tuples
+
+        Args:
+            elements: Elements as yielded by HTMLParser
+
+        Returns:
+            CompactTree: The populated tree
+        """
+        tree = cls()
+        for element in elements:
+            tree.add_element(*element)
+        logger.info(f"Built compact tree with {len(tree)} nodes")
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def _intern(self, number: Optional[str]) -> int:
+        if number is None:
+            return NO_NODE
+        number_id = self._number_ids.get(number)
+        if number_id is None:
+            number_id = self._number_ids[number] = len(self.numbers)
+            self.numbers.append(number)
+        return number_id
+
+    def _append(
+        self,
+        code: int,
+        parent: int,
+        number: Optional[str],
+        title: Optional[str],
+        text: str
+    ) -> int:
+        node = len(self.types)
+        self.types.append(code)
+        self.parents.append(parent)
+        self.first_child.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.number_ids.append(self._intern(number))
+        self.text_buffer += text.encode('utf-8')
+        self.text_offsets.append(len(self.text_buffer))
+        if title is not None:
+            self.titles[node] = title
+
+        if parent != NO_NODE:
+            last = self.last_child[parent]
+            if last == NO_NODE:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[last] = node
+            self.last_child[parent] = node
+        return node
+
+    def add_element(
+        self,
+        type_str: str,
+        number: Optional[str],
+        title: Optional[str],
+        text: str
+    ) -> int:
+        """
+        Place an element the way ConstitutionProcessor.process_element does
+
+        Args:
+            type_str: Type of the element as string
+            number: Number or identifier of the element
+            title: Title of the element (if applicable)
+            text: The actual text content
+
+        Returns:
+            int: Index of the new node
+
+        Raises:
+            CompactTreeError: If the element type is unknown
+        """
+        try:
+            code = self._CODES[StructureType[type_str.upper()]]
+        except KeyError as e:
+            raise CompactTreeError(f"Unknown element type: {type_str}") from e
+
+        if code == self._PREAMBULO:
+            return self._append(code, self.ROOT, None, None, text)
+        if code == self._ADCT:
+            return self._append(code, self.ADCT, number, None, text)
+
+        level = self._LEVELS[code]
+        node = self._append(code, self._ancestors[level - 1], number, title, text)
+        for deeper in range(level, MAX_LEVEL + 1):
+            self._ancestors[deeper] = node
+        return node
+
+    def node_type(self, node: int) -> StructureType:
+        """Type of a node"""
+        return self._TYPES[self.types[node]]
+
+    def number(self, node: int) -> Optional[str]:
+        """Number of a node, or None"""
+        number_id = self.number_ids[node]
+        return None if number_id == NO_NODE else self.numbers[number_id]
+
+    def title(self, node: int) -> Optional[str]:
+        """Title of a node, or None"""
+        return self.titles.get(node)
+
+    def text(self, node: int) -> str:
+        """Text of a node"""
+        return self.text_buffer[
+            self.text_offsets[node]:self.text_offsets[node + 1]
+        ].decode('utf-8')
+
+    def parent(self, node: int) -> int:
+        """Parent of a node, or NO_NODE for the root and ADCT"""
+        return self.parents[node]
+
+    def children(self, node: int) -> Iterator[int]:
+        """Children of a node in insertion order"""
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the arrays, buffer and interned strings"""
+        arrays = (
+            self.types, self.parents, self.first_child, self.last_child,
+            self.next_sibling, self.number_ids, self.text_offsets
+        )
+        return (
+            sum(len(values) * values.itemsize for values in arrays)
+            + len(self.text_buffer)
+            + sum(len(number) for number in self.numbers)
+            + sum(len(title) for title in self.titles.values())
+        )
+
+    def _entry(self, node: int) -> Dict[str, Any]:
+        return {
+            "classe": self._CLASSES[self.types[node]],
+            "numero": self.number(node),
+            "texto": self.text(node)
+        }
+
+    def _node_dict(self, node: int) -> Dict[str, Any]:
+        """Same output as ConstitutionalElement.to_dict() for this node"""
+        result: Dict[str, Any] = {}
+        groups: Dict[str, Any] = {}
+        content = [] if node in (self.ROOT, self.ADCT) else [self._entry(node)]
+
+        for child in self.children(node):
+            code = self.types[child]
+            if code == self._PREAMBULO or code == self._ADCT:
+                content.append(self._entry(child))
+                continue
+            # Same rules as ConstitutionalElement.add_child: a repeated
+            # number replaces the previous child, an unnumbered child
+            # replaces the whole group, and numbered children are ignored
+            # once the group holds an unnumbered one
+            base_key = self._KEYS[code]
+            number = self.number(child)
+            if number:
+                group = groups.setdefault(base_key, {})
+                if isinstance(group, dict):
+                    group[number] = child
+            else:
+                groups[base_key] = child
+
+        if content:
+            result["preambulo" if node == self.ROOT else "conteudo"] = content
+
+        for key, value in groups.items():
+            if isinstance(value, dict):
+                child_dict = {}
+                for number, child in value.items():
+                    child_data = self._node_dict(child)
+                    if child_data:
+                        child_dict[number] = child_data
+                if child_dict:
+                    result[key] = child_dict
+            else:
+                child_data = self._node_dict(value)
+                if child_data:
+                    result[key] = child_data
+
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the tree to the processor's dictionary representation
+
+        Returns:
+            Dict[str, Any]: Same structure as ConstitutionProcessor.get_result()
+        """
+        result = self._node_dict(self.ROOT)
+        adct_dict = self._node_dict(self.ADCT)
+        if adct_dict:
+            result["adct"] = adct_dict
+        return result
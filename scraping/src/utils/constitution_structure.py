@@ -2,11 +2,12 @@
 Constitution structure handling utilities.
 Author: gabes-machado
 Created: 2025-01-17 02:22:37 UTC
-Updated: 2025-01-19 19:59:45 UTC
+Updated: 2026-10-17 02:38:27 UTC
 """
 
 import logging
-from typing import Dict, Optional, Any, List
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Any, List, NamedTuple, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 
@@ -25,6 +26,79 @@ class StructureType(Enum):
     ALINEA = "ALINEA"
     ADCT = "ADCT"
 
+# Hierarchy level of each element type (0-8)
+LEVELS: Dict[StructureType, int] = {
+    StructureType.PREAMBULO: 0,
+    StructureType.TITULO: 1,
+    StructureType.CAPITULO: 2,
+    StructureType.SECAO: 3,
+    StructureType.SUBSECAO: 4,
+    StructureType.ARTIGO: 5,
+    StructureType.PARAGRAFO: 6,
+    StructureType.INCISO: 7,
+    StructureType.ALINEA: 8,
+    StructureType.ADCT: 1  # ADCT tem nível equivalente a título
+}
+
+# Key under which each element type is stored in its parent
+KEYS: Dict[StructureType, str] = {
+    StructureType.TITULO: "titulos",
+    StructureType.CAPITULO: "capitulos",
+    StructureType.SECAO: "secoes",
+    StructureType.SUBSECAO: "subsecoes",
+    StructureType.ARTIGO: "artigos",
+    StructureType.PARAGRAFO: "paragrafos",
+    StructureType.INCISO: "incisos",
+    StructureType.ALINEA: "alineas",
+    StructureType.ADCT: "adct"
+}
+
+# Deepest hierarchy level
+MAX_LEVEL = max(LEVELS.values())
+
+class PlacedElement(NamedTuple):
+    """An element as handed to sinks, in document order"""
+    ordinal: int  # 1-based position among all processed elements
+    type: StructureType
+    number: Optional[str]
+    title: Optional[str]
+    text: str
+    parent: int  # Ordinal of the parent element, 0 for the root
+    path: Tuple[Tuple[StructureType, Optional[str]], ...]  # Título down to the element
+
+    @property
+    def key(self) -> str:
+        """Key path of the element in get_result() (e.g. 'titulos/II/artigos/5')"""
+        if self.type in (StructureType.PREAMBULO, StructureType.ADCT):
+            return self.type.value.lower()
+        return "/".join(
+            f"{KEYS[element_type]}/{number}" if number else KEYS[element_type]
+            for element_type, number in self.path
+        )
+
+class ElementSinkError(Exception):
+    """Custom exception for sinks failing to handle an element"""
+    pass
+
+class ElementSink(ABC):
+    """
+    Receives every element as ConstitutionProcessor places it, so exports
+    can be written while the document is processed instead of from the
+    finished tree. Repeated numbers reach sinks each time they occur,
+    even though the nested result keeps only the last one.
+    """
+
+    @abstractmethod
+    def write(self, element: PlacedElement) -> None:
+        """Handle the next element"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Finish the export after the last element"""
+
+    def abort(self) -> None:
+        """Discard the export after a failed run"""
+
 @dataclass
 class ConstitutionalElement:
     """Represents a constitutional element with its content"""
@@ -44,16 +118,29 @@ class ConstitutionalElement:
             element: The constitutional element to add
         """
         parts = key.split('/')
-        base_key = parts[0]
+        self.attach(parts[0], parts[1] if len(parts) > 1 else None, element)
+
+    def attach(
+        self,
+        base_key: str,
+        number: Optional[str],
+        element: 'ConstitutionalElement'
+    ) -> None:
+        """
+        Add a child element under an already split key
         
-        if len(parts) > 1:
-            number = parts[1]
+        Args:
+            base_key: Group of the child (e.g., 'titulos', 'artigos')
+            number: Number of the child, or None for an unnumbered child
+            element: The constitutional element to add
+        """
+        if number is not None:
             if base_key not in self.children:
                 self.children[base_key] = {}
             if isinstance(self.children[base_key], dict):
                 self.children[base_key][number] = element
         else:
-            self.children[key] = element
+            self.children[base_key] = element
 
     def add_content(self, content_type: str, number: Optional[str], text: str) -> None:
         """
@@ -109,108 +196,74 @@ class ConstitutionalElement:
 class ConstitutionProcessor:
     """Processor for constitutional structure"""
     
-    def __init__(self):
-        # Initialize root structure with preambulo and ADCT
-        self.root = ConstitutionalElement(type=StructureType.PREAMBULO)
-        self.adct = ConstitutionalElement(type=StructureType.ADCT)
-        self.current_structure: Dict[StructureType, ConstitutionalElement] = {}
-        logger.info("Initialized ConstitutionProcessor")
-
-    def _get_hierarchy_level(self, element_type: StructureType) -> int:
-        """
-        Get the hierarchy level for a given element type
-        
-        Args:
-            element_type: The type of constitutional element
-            
-        Returns:
-            int: The hierarchy level (0-8)
-        """
-        hierarchy = {
-            StructureType.PREAMBULO: 0,
-            StructureType.TITULO: 1,
-            StructureType.CAPITULO: 2,
-            StructureType.SECAO: 3,
-            StructureType.SUBSECAO: 4,
-            StructureType.ARTIGO: 5,
-            StructureType.PARAGRAFO: 6,
-            StructureType.INCISO: 7,
-            StructureType.ALINEA: 8,
-            StructureType.ADCT: 1  # ADCT tem nível equivalente a título
-        }
-        return hierarchy[element_type]
-
-    def _get_element_key(self, element: ConstitutionalElement) -> str:
+    def __init__(self, sinks: Optional[List[ElementSink]] = None):
         """
-        Get the appropriate key for the element
+        Initialize the processor
         
         Args:
-            element: The constitutional element
-            
-        Returns:
-            str: The key to use in the structure
+            sinks: Exports fed with every element as it is placed
         """
-        type_mapping = {
-            StructureType.TITULO: "titulos",
-            StructureType.CAPITULO: "capitulos",
-            StructureType.SECAO: "secoes",
-            StructureType.SUBSECAO: "subsecoes",
-            StructureType.ARTIGO: "artigos",
-            StructureType.PARAGRAFO: "paragrafos",
-            StructureType.INCISO: "incisos",
-            StructureType.ALINEA: "alineas",
-            StructureType.ADCT: "adct"
-        }
-
-        base_key = type_mapping[element.type]
-        
-        # Return only base key for elements without number
-        if not element.number:
-            return base_key
-            
-        # For numbered elements, return in the correct format for the schema
-        return f"{base_key}/{element.number}"
-
-    def _update_structure(self, element: ConstitutionalElement) -> None:
-        """
-        Update current structure based on hierarchy level
-        
-        Args:
-            element: The new element being added
-        """
-        current_level = self._get_hierarchy_level(element.type)
-        
-        # Remove higher level elements from current structure
-        to_remove = [
-            t for t in self.current_structure.keys()
-            if self._get_hierarchy_level(t) >= current_level
-        ]
-        for t in to_remove:
-            self.current_structure.pop(t)
-        
-        # Add new element to current structure
-        self.current_structure[element.type] = element
+        # Initialize root structure with preambulo and ADCT
+        self.root = ConstitutionalElement(type=StructureType.PREAMBULO)
+        self.adct = ConstitutionalElement(type=StructureType.ADCT)
+        # ancestors[level] is the deepest open element at or above that
+        # level, so an element of level L is placed under ancestors[L - 1]
+        self.ancestors: List[ConstitutionalElement] = [self.root] * (MAX_LEVEL + 1)
+        self.sinks: List[ElementSink] = list(sinks or [])
+        self.ordinal = 0
+        # Ordinal and path of each ancestor, only maintained for sinks
+        self._ancestor_ordinals = [0] * (MAX_LEVEL + 1)
+        self._ancestor_paths: List[tuple] = [()] * (MAX_LEVEL + 1)
+        logger.info("Initialized ConstitutionProcessor")
 
     def _place_element(self, element: ConstitutionalElement) -> None:
         """
-        Place element in the appropriate location in the structure
+        Place element under its parent and make it the open ancestor of
+        every deeper level
         
         Args:
             element: The element to place in the hierarchy
         """
-        current_level = self._get_hierarchy_level(element.type)
-        parent = self.root
+        level = LEVELS[element.type]
+        ancestors = self.ancestors
+        ancestors[level - 1].attach(KEYS[element.type], element.number or None, element)
+        for deeper in range(level, MAX_LEVEL + 1):
+            ancestors[deeper] = element
 
-        # Find the closest parent in the current structure
-        for t, e in self.current_structure.items():
-            if self._get_hierarchy_level(t) < current_level:
-                parent = e
+    def _emit(self, element_type: StructureType, number: Optional[str],
+              title: Optional[str], text: str) -> None:
+        """Hand the element just processed to every sink"""
+        level = LEVELS[element_type]
+        if element_type in (StructureType.PREAMBULO, StructureType.ADCT):
+            parent, path = 0, ((element_type, number),)
+        else:
+            parent = self._ancestor_ordinals[level - 1]
+            path = self._ancestor_paths[level - 1] + ((element_type, number),)
+            for deeper in range(level, MAX_LEVEL + 1):
+                self._ancestor_ordinals[deeper] = self.ordinal
+                self._ancestor_paths[deeper] = path
 
-        # Create the appropriate key for the element
-        key = self._get_element_key(element)
-        
-        # Add to parent's children
-        parent.add_child(key, element)
+        placed = PlacedElement(self.ordinal, element_type, number, title, text, parent, path)
+        for sink in self.sinks:
+            try:
+                sink.write(placed)
+            except Exception as e:
+                raise ElementSinkError(
+                    f"{type(sink).__name__} failed on element {self.ordinal}: {e}"
+                ) from e
+
+    def close_sinks(self) -> None:
+        """Finish every export after the last element"""
+        for sink in self.sinks:
+            sink.close()
+
+    def abort_sinks(self) -> None:
+        """Discard every export, keeping going if one of them fails"""
+        for sink in self.sinks:
+            try:
+                sink.abort()
+            except Exception as e:
+                logger.warning(f"Failed to abort {type(sink).__name__}: {e}")
 
     def process_element(self, type_str: str, number: Optional[str], title: Optional[str], text: str) -> None:
         """
@@ -221,18 +274,26 @@ class ConstitutionProcessor:
             number: Number or identifier of the element
             title: Title of the element (if applicable)
             text: The actual text content
+
+        Raises:
+            ElementSinkError: If a sink fails to write the element
         """
         try:
             element_type = StructureType[type_str.upper()]
+            self.ordinal += 1
             
             # Special handling for preambulo
             if element_type == StructureType.PREAMBULO:
                 self.root.add_content("preambulo", None, text)
+                if self.sinks:
+                    self._emit(element_type, None, None, text)
                 return
 
             # Special handling for ADCT
             if element_type == StructureType.ADCT:
                 self.adct.add_content("adct", number, text)
+                if self.sinks:
+                    self._emit(element_type, number, None, text)
                 return
 
             # Create new element
@@ -249,9 +310,9 @@ class ConstitutionProcessor:
                 text
             )
 
-            # Update structure and place element
-            self._update_structure(element)
             self._place_element(element)
+            if self.sinks:
+                self._emit(element_type, number, title, text)
 
             logger.debug(f"Processed {element_type.value} {number or ''}")
 
@@ -266,17 +327,8 @@ class ConstitutionProcessor:
         Returns:
             Dict[str, Any]: The complete constitution structure as a dictionary
         """
-        result = {}
-        
-        # Add preambulo
-        preambulo_dict = self.root.to_dict()
-        if "preambulo" in preambulo_dict:
-            result["preambulo"] = preambulo_dict["preambulo"]
-        
-        # Add main content
-        for key, value in self.root.children.items():
-            if isinstance(value, dict) or isinstance(value, ConstitutionalElement):
-                result[key] = value.to_dict() if isinstance(value, ConstitutionalElement) else value
+        # Preambulo and main content (numbered children are converted too)
+        result = self.root.to_dict()
         
         # Add ADCT to final result
         adct_dict = self.adct.to_dict()
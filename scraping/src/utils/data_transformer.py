@@ -2,18 +2,61 @@
 Data transformation utilities for processing constitution text.
 Author: gabes-machado
 Created: 2025-01-17 01:40:48 UTC
+Updated: 2026-10-17 04:24:37 UTC
 """
 
+import re
+import numpy as np
 import pandas as pd
 import logging
 from typing import Dict, Any, List, Optional
 from .text_processor import TextProcessor
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 logger = logging.getLogger(__name__)
 
+# Ways the transformer can run: whole-column pandas string operations,
+# the original per-cell functions (kept as the reference), or a Polars
+# query whose string kernels run on all cores (frames are Polars too)
+ENGINES = ("vectorized", "rowwise", "polars")
+
+# TextProcessor.clean_whitespace for the Rust regex engine, whose \s
+# lacks the separators \x1c-\x1f that Python's \s matches
+POLARS_WHITESPACE_PATTERN = r'[\s\x1c-\x1f\u200b\u00a0]+'
+
+# OCR errors in incisos (see _safe_extract_inciso and _fix_special_cases)
+INCISO_FIXES = {"VIX": "IX", "IIV": "IV"}
+
+# Trailing number of an artigo/parágrafo match (see _extract_with_pattern)
+NUMBER_PATTERN = r'([IVXLCDM0-9A-Zº\-]+)$'
+
+def _ignoring_case(pattern: str) -> str:
+    """Pattern for Polars, case-insensitive like TextProcessor's compiled ones"""
+    return f"(?i){pattern}"
+
+def _uncaptured(pattern: str) -> str:
+    """Pattern with its capturing groups made non-capturing"""
+    return re.sub(r"(?<!\\)\((?!\?)", "(?:", pattern)
+
 class ConstitutionTransformer:
-    def __init__(self):
-        """Initialize the transformer with improved regex patterns"""
+    def __init__(self, engine: str = "vectorized"):
+        """
+        Initialize the transformer with improved regex patterns
+        
+        Args:
+            engine: "vectorized", "rowwise" (same output, slower) or
+                "polars" (same values in Polars DataFrames)
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}' (available: {', '.join(ENGINES)})")
+        if engine == "polars" and pl is None:
+            raise ValueError("The polars engine requires polars to be installed")
+        self.engine = engine
+
         # Patterns for structural elements with Roman numerals
         self.regex_map_roman = {
             "titulo": r"TÍTULO\s+([IVXLCDM]+)\s*[-–]?\s*",
@@ -36,7 +79,7 @@ class ConstitutionTransformer:
             "preambulo": r"(?i)PREÂMBULO"
         }
         
-        logger.info("Initialized ConstitutionTransformer with regex patterns")
+        logger.info(f"Initialized ConstitutionTransformer with regex patterns ({engine} engine)")
 
     def create_dataframe(self, paragraphs: List[str]) -> pd.DataFrame:
         """
@@ -46,17 +89,39 @@ class ConstitutionTransformer:
             paragraphs: List of paragraph texts
             
         Returns:
-            pd.DataFrame: DataFrame with cleaned paragraphs
+            pd.DataFrame: DataFrame with cleaned paragraphs (a Polars
+            DataFrame with the polars engine)
         """
         try:
-            df = pd.DataFrame({"texto": paragraphs})
-            df["texto"] = df["texto"].apply(self._clean_and_validate_text)
+            if self.engine == "polars":
+                df = self._create_polars(paragraphs)
+            else:
+                df = pd.DataFrame({"texto": paragraphs})
+                df["texto"] = df["texto"].apply(self._clean_and_validate_text)
             logger.info(f"Created DataFrame with {len(df)} paragraphs")
             return df
         except Exception as e:
             logger.error(f"Error creating DataFrame: {e}")
             raise
 
+    def _create_polars(self, paragraphs: List[str]) -> "pl.DataFrame":
+        """Clean the paragraphs with Polars string kernels"""
+        if not all(isinstance(text, str) for text in paragraphs):
+            logger.warning("Non-string input detected, converting to str")
+            paragraphs = [text if isinstance(text, str) else str(text) for text in paragraphs]
+
+        df = pl.LazyFrame({"texto": paragraphs}, schema={"texto": pl.String}).select(
+            pl.col("texto")
+            .str.normalize("NFKC")
+            .str.replace_all(POLARS_WHITESPACE_PATTERN, " ")
+            .str.strip_chars(" ")
+        ).collect()
+
+        empty = (df.get_column("texto") == "").sum()
+        if empty:
+            logger.warning(f"{empty} empty texts after cleaning")
+        return df
+
     def _clean_and_validate_text(self, text: str) -> str:
         """
         Clean and validate text with error handling
@@ -101,7 +166,7 @@ class ConstitutionTransformer:
                 return None
                 
             if '(' in pattern:
-                number_match = TextProcessor.search_regex(r'([IVXLCDM0-9A-Zº\-]+)$', match)
+                number_match = TextProcessor.search_regex(NUMBER_PATTERN, match)
                 return number_match if number_match else match
                 
             return match
@@ -117,12 +182,18 @@ class ConstitutionTransformer:
             df: DataFrame with text column
             
         Returns:
-            pd.DataFrame: DataFrame with hierarchical structure columns
+            pd.DataFrame: DataFrame with hierarchical structure columns (a
+            new Polars DataFrame with the polars engine)
         """
         try:
             if "texto" not in df.columns:
                 raise ValueError("DataFrame must contain 'texto' column")
 
+            if self.engine == "polars":
+                df = self._extract_polars(df)
+                logger.info("Successfully extracted hierarchical structure")
+                return df
+
             # Initialize columns
             hierarchical_cols = [
                 "titulo", "capitulo", "secao", "subsecao",
@@ -138,33 +209,10 @@ class ConstitutionTransformer:
                 regex=True
             )
 
-            # Extract roman numeral elements
-            for col, pattern in self.regex_map_roman.items():
-                logger.debug(f"Extracting {col} using pattern: {pattern}")
-                df[col] = df["texto"].apply(
-                    lambda x: self._safe_extract_roman(pattern, x)
-                )
-
-            # Extract articles and paragraphs
-            for col, pattern in self.regex_map_generic.items():
-                logger.debug(f"Extracting {col} using pattern: {pattern}")
-                df[col] = df["texto"].apply(
-                    lambda x: self._extract_with_pattern(x, pattern)
-                )
-
-            # Process unique paragraphs
-            df["paragrafo"] = df.apply(
-                lambda row: self._handle_paragraph(row["texto"], row["paragrafo"]),
-                axis=1
-            )
-
-            # Extract incisos and alíneas
-            df["inciso"] = df["texto"].apply(
-                lambda x: self._safe_extract_inciso(x)
-            )
-            df["alinea"] = df["texto"].apply(
-                lambda x: self._safe_extract_alinea(x)
-            )
+            if self.engine == "vectorized":
+                self._extract_vectorized(df)
+            else:
+                self._extract_rowwise(df)
 
             # Fix known special cases
             self._fix_special_cases(df)
@@ -179,13 +227,180 @@ class ConstitutionTransformer:
             logger.error(f"Error extracting hierarchical structure: {e}")
             raise
 
+    def _extract_rowwise(self, df: pd.DataFrame) -> None:
+        """Fill the hierarchy columns cell by cell"""
+        # Extract roman numeral elements
+        for col, pattern in self.regex_map_roman.items():
+            logger.debug(f"Extracting {col} using pattern: {pattern}")
+            df[col] = df["texto"].apply(
+                lambda x: self._safe_extract_roman(pattern, x)
+            )
+
+        # Extract articles and paragraphs
+        for col, pattern in self.regex_map_generic.items():
+            logger.debug(f"Extracting {col} using pattern: {pattern}")
+            df[col] = df["texto"].apply(
+                lambda x: self._extract_with_pattern(x, pattern)
+            )
+
+        # Process unique paragraphs
+        df["paragrafo"] = df.apply(
+            lambda row: self._handle_paragraph(row["texto"], row["paragrafo"]),
+            axis=1
+        )
+
+        # Extract incisos and alíneas
+        df["inciso"] = df["texto"].apply(
+            lambda x: self._safe_extract_inciso(x)
+        )
+        df["alinea"] = df["texto"].apply(
+            lambda x: self._safe_extract_alinea(x)
+        )
+
+    def _extract_vectorized(self, df: pd.DataFrame) -> None:
+        """
+        Fill the hierarchy columns with whole-column string operations
+
+        Every column matches _extract_rowwise value for value and dtype.
+        Texts are searched as Python objects so the compiled patterns keep
+        re's semantics (Unicode whitespace, case folding), and non-string cells
+        come out missing just like the per-cell functions return None.
+        """
+        texto = df["texto"].astype(object)
+        if not texto.map(type).eq(str).all():
+            texto = texto.where(texto.map(lambda x: isinstance(x, str)))
+
+        # Roman numerals are searched in upper case and must be plain
+        # IVXLCDM once matched (see _safe_extract_roman). Headings are
+        # rare, so one pass over all texts picks the rows matching any
+        # heading pattern and only those are searched per heading.
+        upper = texto.str.upper()
+        any_heading = "|".join(
+            f"(?:{_uncaptured(pattern)})" for pattern in self.regex_map_roman.values()
+        )
+        is_heading = upper.str.contains(
+            TextProcessor._get_compiled_pattern(any_heading), regex=True, na=False
+        ).to_numpy(dtype=bool)
+        headings = upper[is_heading]
+        for col, pattern in self.regex_map_roman.items():
+            logger.debug(f"Extracting {col} using pattern: {pattern}")
+            numeral = headings.str.extract(
+                TextProcessor._get_compiled_pattern(pattern), expand=False
+            )
+            plain = numeral.str.fullmatch(r"[IVXLCDM]+") == True  # noqa: E712
+            df[col] = self._as_applied(
+                self._spread(numeral.where(plain), is_heading, upper.index)
+            )
+
+        # Articles and paragraphs: the trailing number of the match, or
+        # the whole match if it has none (see _extract_with_pattern)
+        for col, pattern in self.regex_map_generic.items():
+            logger.debug(f"Extracting {col} using pattern: {pattern}")
+            found = self._extract_match(texto, pattern)
+            number = found.str.extract(
+                TextProcessor._get_compiled_pattern(NUMBER_PATTERN), expand=False
+            )
+            df[col] = self._as_applied(number.where(number.notna(), found))
+
+        # Process unique paragraphs
+        unico = texto.str.contains(
+            TextProcessor._get_compiled_pattern(self.special_patterns["paragrafo_unico"]),
+            regex=True,
+            na=False
+        )
+        paragrafo = df["paragrafo"].astype(object)
+        df["paragrafo"] = self._as_applied(paragrafo.mask(unico, "único"))
+
+        # Extract incisos and alíneas (whole matches, like search_regex)
+        inciso = self._extract_match(texto, self.special_patterns["inciso"])
+        df["inciso"] = self._as_applied(inciso.mask(inciso == "VIX", "IX"))
+        alinea = self._extract_match(texto, self.special_patterns["alinea"])
+        df["alinea"] = self._as_applied(alinea.where(alinea.str.islower() == True))  # noqa: E712
+
+    def _extract_polars(self, df: Any) -> "pl.DataFrame":
+        """
+        Build the hierarchy columns in one lazy Polars query
+
+        Values match _extract_rowwise for texts from create_dataframe;
+        missing values are nulls and the columns are Polars strings.
+        Polars evaluates the column expressions in parallel, each with
+        multi-threaded string kernels, and forward-fills in the same plan.
+        """
+        if isinstance(df, pd.DataFrame):
+            df = pl.from_pandas(df)
+        if df.schema["texto"] != pl.String:
+            raise ValueError("The polars engine needs a string 'texto' column")
+
+        texto = pl.col("texto")
+        upper = texto.str.to_uppercase()
+        columns = {}
+
+        # Roman numerals are searched in upper case and must be plain
+        # IVXLCDM once matched (see _safe_extract_roman)
+        for col, pattern in self.regex_map_roman.items():
+            numeral = upper.str.extract(_ignoring_case(pattern), 1)
+            columns[col] = pl.when(numeral.str.contains(r"^[IVXLCDM]+$")).then(numeral)
+
+        # Articles and paragraphs: the trailing number of the match, or
+        # the whole match if it has none (see _extract_with_pattern)
+        for col, pattern in self.regex_map_generic.items():
+            found = texto.str.extract(_ignoring_case(pattern), 0)
+            number = found.str.extract(_ignoring_case(NUMBER_PATTERN), 1)
+            columns[col] = pl.coalesce(number, found)
+
+        # Process unique paragraphs
+        unico = texto.str.contains(_ignoring_case(self.special_patterns["paragrafo_unico"]))
+        columns["paragrafo"] = pl.when(unico).then(pl.lit("único")).otherwise(columns["paragrafo"])
+
+        # Incisos and alíneas are whole matches; an alínea ("b) ") is
+        # lower case when its letter is (see _safe_extract_alinea)
+        columns["inciso"] = (
+            texto.str.extract(_ignoring_case(self.special_patterns["inciso"]), 0)
+            .replace(INCISO_FIXES)
+        )
+        alinea = texto.str.extract(_ignoring_case(self.special_patterns["alinea"]), 0)
+        columns["alinea"] = pl.when(alinea.str.contains(r"^\p{Ll}")).then(alinea)
+
+        return df.lazy().with_columns(
+            *(expr.forward_fill().alias(col) for col, expr in columns.items()),
+            texto.str.contains(self.special_patterns["preambulo"])
+            .fill_null(False)
+            .alias("is_preambulo")
+        ).collect()
+
+    @staticmethod
+    def _extract_match(texto: pd.Series, pattern: str) -> pd.Series:
+        """Whole match of pattern in each text (missing where none)"""
+        return texto.str.extract(
+            TextProcessor._get_compiled_pattern(f"({pattern})"), expand=True
+        )[0]
+
+    @staticmethod
+    def _spread(values: pd.Series, rows: np.ndarray, index: pd.Index) -> pd.Series:
+        """Values of the selected rows placed back over all rows (None elsewhere)"""
+        full = np.full(len(index), None, dtype=object)
+        full[rows] = values.to_numpy(dtype=object)
+        return pd.Series(full, index=index)
+
+    @staticmethod
+    def _as_applied(values: pd.Series) -> pd.Series:
+        """
+        Missing values as None and the dtype Series.apply would infer, so
+        columns are interchangeable with those of the row-wise engine
+        """
+        values = values.astype(object)
+        return values.where(values.notna(), None).infer_objects()
+
     def _safe_extract_roman(self, pattern: str, text: str) -> Optional[str]:
         """Safely extract Roman numerals with validation"""
         try:
             if not isinstance(text, str):
                 return None
             text = text.upper()
-            result = TextProcessor.extract_roman_number(pattern, text)
+            # The numeral is the pattern's capture group; extract_roman_number
+            # converts it to an int (and scans the heading word itself)
+            match = TextProcessor._get_compiled_pattern(pattern).search(text)
+            result = match.group(1) if match else None
             if result and not set(result).issubset(set('IVXLCDM')):
                 logger.warning(f"Invalid Roman numeral detected: {result}")
                 return None
@@ -0,0 +1,246 @@
+"""
+Persistent cache of parsed element streams keyed by the raw HTML hash.
+Author: gabes-machado
+Created: 2026-10-17 00:31:52 UTC
+"""
+
+import codecs
+import hashlib
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .html_parser import ElementType, PARSER_VERSION
+from .parser_backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+Element = Tuple[str, Optional[str], Optional[str], str]
+
+class ElementCacheError(Exception):
+    """Custom exception for element cache errors"""
+    pass
+
+class ElementCache:
+    """
+    Element streams of already parsed pages, stored as compact binary files.
+
+    Files live under ``<cache_dir>/v<PARSER_VERSION>/<content_key>.elem``,
+    so identical bytes parsed by the same parser version, engine and
+    charset are never parsed again, and bumping PARSER_VERSION makes every
+    older entry unreachable (older version directories are removed on
+    startup).
+
+    File format (zlib-compressed)::
+
+        magic "PLEL" | u16 parser version | u32 element count
+        per element: u8 type code, then number, title and text, each a
+        u32 byte length (0xFFFFFFFF for None) followed by UTF-8 bytes
+    """
+
+    MAGIC = b"PLEL"
+    SUFFIX = ".elem"
+    _HEADER = struct.Struct("<4sHI")
+    _LENGTH = struct.Struct("<I")
+    _NONE = 0xFFFFFFFF
+
+    # Type codes are positions in this tuple; append new types at the end
+    _TYPES = tuple(ElementType)
+    _CODES = {element_type.value: code for code, element_type in enumerate(_TYPES)}
+
+    def __init__(self, cache_dir: str, parser_version: int = PARSER_VERSION):
+        """
+        Initialize the element cache
+
+        Args:
+            cache_dir: Directory holding the cached element streams
+            parser_version: Version the entries must have been parsed with
+        """
+        self.root = Path(cache_dir)
+        self.parser_version = parser_version
+        self.version_dir = self.root / f"v{parser_version}"
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0}
+
+        try:
+            self.version_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise ElementCacheError(f"Cannot create element cache directory: {e}") from e
+        self._purge_stale_versions()
+
+    @staticmethod
+    def content_key(
+        content: bytes,
+        engine: str = "bs4",
+        charset: Optional[str] = None
+    ) -> str:
+        """
+        Cache key of raw page bytes parsed with an engine and charset
+
+        Engines may read malformed markup differently (see LxmlBackend)
+        and a charset override changes the decoded text, so both are part
+        of the key; "auto" and charset aliases share the key of what they
+        resolve to.
+
+        Args:
+            content: Raw page bytes
+            engine: Tree backend the elements are parsed with
+            charset: Charset the bytes are decoded with (None if sniffed)
+
+        Returns:
+            str: Hex key
+
+        Raises:
+            ParserBackendError: If the engine is unknown or unavailable
+        """
+        engine = get_backend(engine).name
+        if charset:
+            try:
+                charset = codecs.lookup(charset).name
+            except LookupError:
+                charset = charset.lower()
+        digest = hashlib.sha256(hashlib.sha256(content).digest())
+        digest.update(f"\0{engine}\0{charset or ''}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.version_dir / f"{key}{self.SUFFIX}"
+
+    def _purge_stale_versions(self) -> None:
+        """Remove entries written by other parser versions"""
+        for version_dir in self.root.glob("v*"):
+            if version_dir == self.version_dir or not version_dir.is_dir():
+                continue
+            for path in version_dir.glob(f"*{self.SUFFIX}"):
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"Failed to remove stale element cache {path}: {e}")
+            try:
+                version_dir.rmdir()
+                logger.info(f"Removed stale element cache {version_dir.name}")
+            except OSError:
+                pass
+
+    def encode(self, elements: List[Element]) -> bytes:
+        """
+        Serialize an element stream
+
+        Raises:
+            ElementCacheError: If an element has an unknown type
+        """
+        parts = [self._HEADER.pack(self.MAGIC, self.parser_version, len(elements))]
+        for element_type, number, title, text in elements:
+            try:
+                parts.append(bytes((self._CODES[element_type],)))
+            except KeyError as e:
+                raise ElementCacheError(f"Unknown element type: {element_type}") from e
+            for value in (number, title, text):
+                if value is None:
+                    parts.append(self._LENGTH.pack(self._NONE))
+                else:
+                    data = value.encode("utf-8")
+                    parts.append(self._LENGTH.pack(len(data)))
+                    parts.append(data)
+        return zlib.compress(b"".join(parts), 6)
+
+    def decode(self, blob: bytes) -> List[Element]:
+        """
+        Deserialize an element stream
+
+        Raises:
+            ElementCacheError: If the data is corrupt or from another version
+        """
+        try:
+            data = zlib.decompress(blob)
+            magic, version, count = self._HEADER.unpack_from(data, 0)
+            if magic != self.MAGIC or version != self.parser_version:
+                raise ElementCacheError(
+                    f"Unexpected element cache header {magic!r} v{version}"
+                )
+
+            elements: List[Element] = []
+            offset = self._HEADER.size
+            for _ in range(count):
+                element_type = self._TYPES[data[offset]].value
+                offset += 1
+                values = []
+                for _ in range(3):
+                    (length,) = self._LENGTH.unpack_from(data, offset)
+                    offset += self._LENGTH.size
+                    if length == self._NONE:
+                        values.append(None)
+                    else:
+                        values.append(data[offset:offset + length].decode("utf-8"))
+                        offset += length
+                elements.append((element_type, values[0], values[1], values[2]))
+        except ElementCacheError:
+            raise
+        except (zlib.error, struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ElementCacheError(f"Corrupt element cache entry: {e}") from e
+
+        if offset != len(data):
+            raise ElementCacheError("Trailing data in element cache entry")
+        return elements
+
+    def load(self, key: str) -> Optional[List[Element]]:
+        """
+        Load the element stream parsed from the bytes with this key
+
+        Args:
+            key: content_key() of the raw page bytes, engine and charset
+
+        Returns:
+            Optional[List[Element]]: Cached elements, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except OSError as e:
+            logger.warning(f"Element cache unavailable for {key[:12]}: {e}")
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            elements = self.decode(blob)
+        except ElementCacheError as e:
+            logger.warning(f"Discarding element cache entry {key[:12]}: {e}")
+            self.stats["misses"] += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        self.stats["hits"] += 1
+        logger.info(f"Element cache hit for {key[:12]} ({len(elements)} elements)")
+        return elements
+
+    def store(self, key: str, elements: List[Element]) -> None:
+        """
+        Persist the element stream parsed from the bytes with this key
+
+        Args:
+            key: content_key() of the raw page bytes, engine and charset
+            elements: Elements yielded by the parser
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        try:
+            blob = self.encode(elements)
+            tmp_path.write_bytes(blob)
+            os.replace(tmp_path, path)
+        except (OSError, ElementCacheError) as e:
+            logger.warning(f"Failed to cache elements for {key[:12]}: {e}")
+            return
+        self.stats["stores"] += 1
+        logger.debug(f"Cached {len(elements)} elements for {key[:12]} ({len(blob)} bytes)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get a copy of the cache statistics"""
+        return dict(self.stats)
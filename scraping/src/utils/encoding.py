@@ -0,0 +1,193 @@
+"""
+Charset sniffing and single-pass decoding of raw HTML bytes.
+Author: gabes-machado
+Created: 2026-10-16 21:05:48 UTC
+Updated: 2026-10-16 23:41:07 UTC
+"""
+
+import codecs
+import logging
+import re
+from typing import Optional, Tuple
+
+try:
+    from charset_normalizer import from_bytes as _detect_charset
+except ImportError:  # Statistical detection is optional
+    _detect_charset = None
+
+logger = logging.getLogger(__name__)
+
+# Encoding used when nothing is declared and the bytes are not valid UTF-8;
+# Planalto pages are legacy Windows-1252 documents
+FALLBACK_ENCODING = 'cp1252'
+
+# Bytes inspected for a <meta> charset declaration, as in the WHATWG prescan
+META_PRESCAN_BYTES = 4096
+
+# Bytes handed to the statistical detector
+DETECTION_SAMPLE_BYTES = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+_META_CHARSET = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-:.]+)',
+    re.IGNORECASE
+)
+
+# Browsers treat Latin-1 labels as Windows-1252 (WHATWG Encoding Standard)
+_ALIASES = {
+    'latin-1': 'cp1252',
+    'latin1': 'cp1252',
+    'iso-8859-1': 'cp1252',
+    'iso8859-1': 'cp1252',
+    'us-ascii': 'cp1252',
+    'ascii': 'cp1252',
+    'windows-1252': 'cp1252',
+}
+
+def normalize_charset(charset: Optional[str]) -> Optional[str]:
+    """
+    Normalize a charset label to a Python codec name
+
+    Args:
+        charset: Charset label from a header or meta tag
+
+    Returns:
+        Optional[str]: Codec name, or None if the label is unknown
+    """
+    if not charset:
+        return None
+    label = charset.strip().strip('"\'').lower()
+    label = _ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        logger.debug(f"Unknown charset label: {charset}")
+        return None
+
+def sniff_charset(content: bytes, declared: Optional[str] = None) -> Optional[str]:
+    """
+    Determine the charset of an HTML document without decoding it
+
+    Precedence: byte order mark, charset declared by the HTTP response,
+    <meta> declaration in the first bytes, statistical detection.
+
+    Args:
+        content: Raw document bytes
+        declared: Charset from the Content-Type header, if any
+
+    Returns:
+        Optional[str]: Codec name, or None if nothing conclusive was found
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+
+    charset = normalize_charset(declared)
+    if charset:
+        return charset
+
+    match = _META_CHARSET.search(content, 0, META_PRESCAN_BYTES)
+    if match:
+        charset = normalize_charset(match.group(1).decode('ascii', 'ignore'))
+        if charset:
+            return charset
+
+    if _detect_charset is not None:
+        best = _detect_charset(content[:DETECTION_SAMPLE_BYTES]).best()
+        if best is not None:
+            return normalize_charset(best.encoding)
+
+    return None
+
+def decode_html(content: bytes, charset: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Decode an HTML document in a single pass
+
+    Without a charset the bytes are decoded as UTF-8 and, only if that
+    fails, as Windows-1252.
+
+    Args:
+        content: Raw document bytes
+        charset: Charset previously returned by sniff_charset
+
+    Returns:
+        Tuple[str, str]: Decoded text and the codec actually used
+    """
+    if charset:
+        text = content.decode(charset, errors='replace')
+    else:
+        try:
+            return content.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            charset = FALLBACK_ENCODING
+            text = content.decode(charset, errors='replace')
+
+    replaced = text.count('�')
+    if replaced:
+        logger.warning(f"{replaced} undecodable characters with charset {charset}")
+    return text, charset
+
+class IncrementalHTMLDecoder:
+    """
+    Chunk-by-chunk counterpart of decode_html for streamed documents.
+
+    With a charset, chunks are decoded with replacement characters like
+    decode_html. Without one they are decoded as strict UTF-8 until the
+    first invalid sequence, after which the rest of the stream falls back
+    to Windows-1252 (text already returned cannot be re-decoded).
+    """
+
+    def __init__(self, charset: Optional[str] = None):
+        """
+        Initialize the decoder
+
+        Args:
+            charset: Charset previously returned by sniff_charset
+        """
+        self.charset = charset or 'utf-8'
+        self._strict = charset is None
+        self._decoder = codecs.getincrementaldecoder(self.charset)(
+            errors='strict' if self._strict else 'replace'
+        )
+        self.replaced = 0
+
+    def decode(self, data: bytes, final: bool = False) -> str:
+        """
+        Decode the next chunk
+
+        Args:
+            data: Raw bytes following the previous chunk
+            final: Whether this is the last chunk of the document
+
+        Returns:
+            str: Text decoded so far (incomplete sequences are buffered)
+        """
+        if self._strict:
+            pending = self._decoder.getstate()[0]
+            try:
+                return self._decoder.decode(data, final)
+            except UnicodeDecodeError:
+                logger.warning(
+                    f"Stream is not valid UTF-8, continuing as {FALLBACK_ENCODING}"
+                )
+                self.charset = FALLBACK_ENCODING
+                self._strict = False
+                self._decoder = codecs.getincrementaldecoder(self.charset)(
+                    errors='replace'
+                )
+                data = pending + data
+
+        text = self._decoder.decode(data, final)
+        replaced = text.count('�')
+        if replaced:
+            self.replaced += replaced
+        if final and self.replaced:
+            logger.warning(
+                f"{self.replaced} undecodable characters with charset {self.charset}"
+            )
+        return text
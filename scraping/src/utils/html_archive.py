@@ -0,0 +1,326 @@
+"""
+Compressed archive of raw fetched HTML, keyed by URL and content hash.
+Author: gabes-machado
+Created: 2026-10-16 22:31:09 UTC
+Updated: 2026-10-16 23:41:07 UTC
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, List, BinaryIO
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is used without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+class HTMLArchiveError(Exception):
+    """Custom exception for raw HTML archive errors"""
+    pass
+
+@dataclass
+class ArchivedPage:
+    """Metadata of one archived page version"""
+    url: str
+    content_sha256: str
+    size: int
+    charset: Optional[str]
+    codec: str
+    stored_at: float
+
+class ArchiveWriter:
+    """
+    Archives a streamed page chunk by chunk.
+
+    Bytes are hashed and compressed into a temporary file as they arrive;
+    commit() names the file after the content hash once it is known.
+    """
+
+    def __init__(self, archive: 'RawHTMLArchive', url: str):
+        self._archive = archive
+        self.url = url
+        self._url_dir = archive._url_dir(url)
+        self._url_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(suffix=".tmp", dir=self._url_dir)
+        self._tmp_path = Path(tmp_name)
+        self._raw: Optional[BinaryIO] = os.fdopen(fd, "wb")
+        if archive.codec == "zstd":
+            self._file = zstandard.ZstdCompressor(
+                level=archive.ZSTD_LEVEL
+            ).stream_writer(self._raw, closefd=False)
+        else:
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Hash and compress the next chunk
+
+        Raises:
+            HTMLArchiveError: If the chunk cannot be written
+        """
+        self._digest.update(chunk)
+        try:
+            self._file.write(chunk)
+        except OSError as e:
+            self.abort()
+            raise HTMLArchiveError(f"Failed to archive {self.url}: {e}") from e
+        self.size += len(chunk)
+
+    def commit(self, charset: Optional[str] = None) -> ArchivedPage:
+        """
+        Finish the compressed file and record it as the latest version
+
+        Args:
+            charset: Charset sniffed for the bytes
+
+        Returns:
+            ArchivedPage: Metadata of the stored version
+
+        Raises:
+            HTMLArchiveError: If the page cannot be written
+        """
+        try:
+            self._file.close()
+            self._raw.close()
+            self._raw = None
+            digest = self._digest.hexdigest()
+            extension = self._archive.EXTENSIONS[self._archive.codec]
+            page_path = self._url_dir / f"{digest}{extension}"
+            if page_path.exists():
+                self._tmp_path.unlink()
+            else:
+                os.replace(self._tmp_path, page_path)
+                logger.info(
+                    f"Archived {self.url} ({self.size} -> "
+                    f"{page_path.stat().st_size} bytes, {self._archive.codec})"
+                )
+            page = ArchivedPage(
+                url=self.url,
+                content_sha256=digest,
+                size=self.size,
+                charset=charset,
+                codec=self._archive.codec,
+                stored_at=time.time()
+            )
+            self._archive._write_latest(self._url_dir, page)
+        except OSError as e:
+            self.abort()
+            raise HTMLArchiveError(f"Failed to archive {self.url}: {e}") from e
+        return page
+
+    def abort(self) -> None:
+        """Discard the partially written page"""
+        if self._raw is not None:
+            self._raw.close()
+            self._raw = None
+        try:
+            self._tmp_path.unlink()
+        except OSError:
+            pass
+
+class RawHTMLArchive:
+    """
+    Keeps every distinct version of each fetched page compressed on disk.
+
+    Layout::
+
+        <root>/<sha256(url)>/<sha256(content)>.html.zst   (or .html.gz)
+        <root>/<sha256(url)>/latest.json                  ArchivedPage
+
+    Storing the raw bytes lets a parser change be re-run over local data
+    (``ConstitutionScraper.scrape(..., from_archive=True)``) instead of
+    downloading the pages again.
+    """
+
+    LATEST_FILE = "latest.json"
+    ZSTD_LEVEL = 10
+    EXTENSIONS = {"zstd": ".html.zst", "gzip": ".html.gz"}
+
+    def __init__(self, root: str):
+        """
+        Initialize the archive
+
+        Args:
+            root: Archive directory
+        """
+        self.root = Path(root)
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        if self.codec == "gzip":
+            logger.warning("zstandard not installed, archiving HTML with gzip")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise HTMLArchiveError(f"Cannot create archive directory: {e}") from e
+
+    @staticmethod
+    def _hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _url_dir(self, url: str) -> Path:
+        return self.root / self._hash(url.encode("utf-8"))
+
+    def _compress(self, content: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.ZSTD_LEVEL).compress(content)
+        return gzip.compress(content)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        """
+        Decompress an archived page
+
+        Raises:
+            HTMLArchiveError: If the data cannot be decompressed
+        """
+        if codec == "zstd":
+            if zstandard is None:
+                raise HTMLArchiveError("zstandard is required to read .zst pages")
+            # Pages archived by ArchiveWriter are streamed, so their frame
+            # header has no content size and decompress() would refuse them
+            try:
+                with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+                    return reader.readall()
+            except zstandard.ZstdError as e:
+                raise HTMLArchiveError(f"Cannot decompress archived page: {e}") from e
+        try:
+            return gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as e:
+            raise HTMLArchiveError(f"Cannot decompress archived page: {e}") from e
+
+    def store(
+        self,
+        url: str,
+        content: bytes,
+        charset: Optional[str] = None
+    ) -> ArchivedPage:
+        """
+        Archive a fetched page (no-op if this exact version is already stored)
+
+        Args:
+            url: Page URL
+            content: Raw response bytes
+            charset: Charset sniffed for the bytes
+
+        Returns:
+            ArchivedPage: Metadata of the stored version
+        """
+        digest = self._hash(content)
+        url_dir = self._url_dir(url)
+        page_path = url_dir / f"{digest}{self.EXTENSIONS[self.codec]}"
+        page = ArchivedPage(
+            url=url,
+            content_sha256=digest,
+            size=len(content),
+            charset=charset,
+            codec=self.codec,
+            stored_at=time.time()
+        )
+
+        try:
+            url_dir.mkdir(parents=True, exist_ok=True)
+            if not page_path.exists():
+                compressed = self._compress(content)
+                tmp_path = page_path.with_name(page_path.name + ".tmp")
+                tmp_path.write_bytes(compressed)
+                os.replace(tmp_path, page_path)
+                logger.info(
+                    f"Archived {url} ({len(content)} -> {len(compressed)} bytes, "
+                    f"{self.codec})"
+                )
+            self._write_latest(url_dir, page)
+        except OSError as e:
+            raise HTMLArchiveError(f"Failed to archive {url}: {e}") from e
+
+        return page
+
+    def _write_latest(self, url_dir: Path, page: ArchivedPage) -> None:
+        latest_path = url_dir / self.LATEST_FILE
+        tmp_path = latest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(page)), encoding="utf-8")
+        os.replace(tmp_path, latest_path)
+
+    def open_writer(self, url: str) -> ArchiveWriter:
+        """
+        Start archiving a page whose bytes arrive in chunks
+
+        Args:
+            url: Page URL
+
+        Returns:
+            ArchiveWriter: Writer to feed the raw bytes to
+
+        Raises:
+            HTMLArchiveError: If the archive directory is not writable
+        """
+        try:
+            return ArchiveWriter(self, url)
+        except OSError as e:
+            raise HTMLArchiveError(f"Failed to archive {url}: {e}") from e
+
+    def latest(self, url: str) -> Optional[ArchivedPage]:
+        """Get metadata of the most recently archived version of a URL"""
+        latest_path = self._url_dir(url) / self.LATEST_FILE
+        if not latest_path.exists():
+            return None
+        try:
+            return ArchivedPage(**json.loads(latest_path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError) as e:
+            raise HTMLArchiveError(f"Invalid archive metadata for {url}: {e}") from e
+
+    def versions(self, url: str) -> List[str]:
+        """List the content hashes archived for a URL"""
+        url_dir = self._url_dir(url)
+        if not url_dir.exists():
+            return []
+        return sorted(
+            path.name.split(".", 1)[0]
+            for path in url_dir.iterdir()
+            if path.name.endswith(tuple(self.EXTENSIONS.values()))
+        )
+
+    def load(self, url: str, content_sha256: Optional[str] = None) -> bytes:
+        """
+        Load archived raw bytes
+
+        Args:
+            url: Page URL
+            content_sha256: Version to load (defaults to the latest)
+
+        Returns:
+            bytes: Raw page bytes
+
+        Raises:
+            HTMLArchiveError: If the version is not archived or corrupt
+        """
+        if content_sha256 is None:
+            page = self.latest(url)
+            if page is None:
+                raise HTMLArchiveError(f"No archived version of {url}")
+            content_sha256 = page.content_sha256
+
+        url_dir = self._url_dir(url)
+        for codec, extension in self.EXTENSIONS.items():
+            page_path = url_dir / f"{content_sha256}{extension}"
+            if page_path.exists():
+                try:
+                    data = page_path.read_bytes()
+                except OSError as e:
+                    raise HTMLArchiveError(f"Cannot read {page_path}: {e}") from e
+                content = self._decompress(data, codec)
+                if self._hash(content) != content_sha256:
+                    raise HTMLArchiveError(f"Corrupt archived page {page_path}")
+                return content
+
+        raise HTMLArchiveError(f"Version {content_sha256} of {url} not archived")
@@ -1,19 +1,25 @@
 """
-HTML parsing utilities using BeautifulSoup.
+HTML parsing utilities with selectable tree backends (BeautifulSoup or lxml).
 Author: gabes-machado
 Created: 2025-01-17 01:42:33 UTC
-Updated: 2025-01-19 20:04:33 UTC
+Updated: 2026-10-17 00:52:16 UTC
 """
 
-from bs4 import BeautifulSoup, Tag
-from typing import Iterator, Tuple, Optional, Dict, Pattern
+from typing import Iterator, List, Tuple, Optional, Dict, Pattern, Union
 import re
 import logging
 from dataclasses import dataclass
 from enum import Enum
 
+from .encoding import sniff_charset, decode_html
+from .parser_backends import ParserBackend, get_backend
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever the elements produced for the same bytes may change, so
+# cached element streams (utils/element_cache.py) are invalidated
+PARSER_VERSION = 1
+
 class ElementType(Enum):
     """Types of constitutional elements"""
     PREAMBULO = "PREAMBULO"
@@ -30,59 +36,140 @@ class ElementType(Enum):
 @dataclass
 class RegexPatterns:
     """Compiled regex patterns for better performance"""
-    ROMAN_NUMERAL: Pattern = re.compile(r'[IVXLCDM]+')
-    ARTICLE: Pattern = re.compile(r'Art\.\s*(\d+)')
-    PARAGRAPH: Pattern = re.compile(r'§\s*(\d+)')
-    INCISO: Pattern = re.compile(r'^[IVXLCDM]+\s*[-–]')
-    INCISO_NUMBER: Pattern = re.compile(r'^([IVXLCDM]+)')
-    ALINEA: Pattern = re.compile(r'^[a-z]\)')
-    ALINEA_LETTER: Pattern = re.compile(r'^([a-z])')
-    ADCT: Pattern = re.compile(r'ATO\s+DAS\s+DISPOSIÇÕES\s+CONSTITUCIONAIS\s+TRANSITÓRIAS', re.IGNORECASE)
+    # One anchored alternation typing a paragraph from its prefix. The
+    # outer named group is the ElementType value; the inner lowercase
+    # group captures the element number. SUBSEÇÃO precedes SEÇÃO.
+    ELEMENT: Pattern = re.compile(
+        r'(?P<ADCT>ATO\s+DAS\s+DISPOSIÇÕES\s+CONSTITUCIONAIS\s+TRANSITÓRIAS)'
+        r'|(?P<TITULO>TÍTULO\b(?:\s+(?P<titulo>(?-i:[IVXLCDM]+))\b)?)'
+        r'|(?P<CAPITULO>CAPÍTULO\b(?:\s+(?P<capitulo>(?-i:[IVXLCDM]+))\b)?)'
+        r'|(?P<SUBSECAO>SUBSEÇÃO\b(?:\s+(?P<subsecao>(?-i:[IVXLCDM]+))\b)?)'
+        r'|(?P<SECAO>SEÇÃO\b(?:\s+(?P<secao>(?-i:[IVXLCDM]+))\b)?)'
+        r'|(?P<ARTIGO>(?-i:Art\.)\s*(?P<artigo>\d+))'
+        r'|(?P<PARAGRAFO>(?:§|PARÁGRAFO)\s*(?:(?P<paragrafo>\d+)|(?P<unico>ÚNICO))?)'
+        r'|(?P<INCISO>(?P<inciso>(?-i:[IVXLCDM]+))\s*[-–])'
+        r'|(?P<ALINEA>(?P<alinea>(?-i:[a-z]))\))',
+        re.IGNORECASE
+    )
+
+# Element types whose title is the following paragraph
+STRUCTURAL_TYPES = frozenset({
+    ElementType.TITULO,
+    ElementType.CAPITULO,
+    ElementType.SECAO,
+    ElementType.SUBSECAO
+})
+
+# Keywords that disqualify the paragraph following a structural element as its title
+TITLE_STOP_WORDS = ('TÍTULO', 'CAPÍTULO', 'SEÇÃO', 'SUBSEÇÃO', 'ART.', 'ATO DAS DISPOSIÇÕES')
+
+PATTERNS = RegexPatterns()
+
+def clean_text(text: str) -> str:
+    """Clean and normalize text"""
+    if not isinstance(text, str):
+        return ""
+    return " ".join(text.strip().split())
+
+def classify_text(text: str) -> Optional[Tuple[ElementType, Optional[str]]]:
+    """
+    Type a cleaned paragraph and extract its number in a single match
+    
+    Only the paragraph prefix is examined, so the cost does not grow
+    with the length of the text.
+    
+    Args:
+        text: Cleaned paragraph text
+        
+    Returns:
+        Optional[Tuple[ElementType, Optional[str]]]: (element type, number),
+        or None if the paragraph is not a constitutional element
+    """
+    match = PATTERNS.ELEMENT.match(text)
+    if match is None:
+        return None
+
+    element_type = ElementType(match.lastgroup)
+    if element_type is ElementType.ADCT:
+        return element_type, None
+    if element_type is ElementType.PARAGRAFO and match.group('unico'):
+        return element_type, 'único'
+    return element_type, match.group(match.lastgroup.lower())
+
+def title_from_text(text: str) -> Optional[str]:
+    """
+    Accept a cleaned paragraph as the title of the preceding structural element
+    
+    Args:
+        text: Cleaned text of the following paragraph
+        
+    Returns:
+        Optional[str]: The title, or None if the paragraph is itself a heading
+    """
+    if text and not any(keyword in text.upper() for keyword in TITLE_STOP_WORDS):
+        return text
+    return None
 
 class HTMLParser:
-    def __init__(self, html_content: str):
-        """Initialize the HTML parser with content and patterns"""
+    def __init__(
+        self, 
+        html_content: Union[str, bytes], 
+        encoding: Optional[str] = None,
+        engine: str = "bs4",
+        fragment: bool = False
+    ):
+        """
+        Initialize the HTML parser with content and patterns
+        
+        Raw bytes are decoded exactly once, with the given encoding or one
+        sniffed from the bytes, and the document is parsed exactly once.
+        
+        Args:
+            html_content: Decoded HTML text or raw response bytes
+            encoding: Charset of the raw bytes, if already known
+            engine: Tree backend ("bs4", "lxml" or "auto"). The engines
+                agree on well-formed pages; unclosed <p> tags are read
+                differently by lxml (see LxmlBackend)
+            fragment: The content is one part of a larger document, so
+                the whole-document tag checks are skipped
+        """
         try:
-            # Try UTF-8 first
-            self.soup = BeautifulSoup(html_content, 'html.parser', from_encoding='utf-8')
+            if isinstance(html_content, bytes):
+                charset = encoding or sniff_charset(html_content)
+                html_content, self.encoding = decode_html(html_content, charset)
+            else:
+                self.encoding = encoding
             
-            # Check if parsing was successful
-            if not self._validate_content_encoding():
-                # Try ISO-8859-1 if UTF-8 fails
-                self.soup = BeautifulSoup(html_content, 'html.parser', from_encoding='iso-8859-1')
-                
-                if not self._validate_content_encoding():
-                    logger.warning("Content encoding issues detected")
-            
-            self.patterns = RegexPatterns()
-            self._validate_html_content()
-            logger.info("HTML Parser initialized successfully")
+            self.backend: ParserBackend = get_backend(engine)(html_content)
+            self.engine = self.backend.name
+            self.patterns = PATTERNS
+            self.paragraph_texts: Optional[List[str]] = None
+            self._next_sibling: List[int] = []
+            if not fragment:
+                self._validate_html_content()
+            logger.info(
+                f"HTML Parser initialized successfully "
+                f"(encoding={self.encoding}, engine={self.engine})"
+            )
         except Exception as e:
             logger.error(f"Failed to initialize HTML parser: {e}")
             raise
 
-    def _validate_content_encoding(self) -> bool:
-        """Validate if the content was parsed with correct encoding"""
-        sample_text = self.soup.get_text()[:1000]
-        return not any('�' in text for text in sample_text)
-
     def _validate_html_content(self) -> None:
         """Validate the HTML content structure"""
-        if not self.soup.find():
+        if not self.backend.has_elements():
             raise ValueError("Empty or invalid HTML content")
         
         required_tags = ['p', 'font']
         for tag in required_tags:
-            if not self.soup.find(tag):
+            if not self.backend.has_tag(tag):
                 logger.warning(f"Missing required tag: {tag}")
 
     def remove_strike_tags(self) -> None:
         """Remove strike tags from HTML with validation"""
         try:
-            strike_tags = self.soup.find_all('strike')
-            count = len(strike_tags)
-            for strike in strike_tags:
-                strike.decompose()
+            count = self.backend.remove_tags('strike')
+            self.paragraph_texts = None
             logger.info(f"Removed {count} strike tags")
         except Exception as e:
             logger.error(f"Error removing strike tags: {e}")
@@ -99,9 +186,12 @@ class HTMLParser:
             yield from self._process_preambulo()
 
             # Process all other elements
-            for p in self.soup.find_all('p'):
+            self._index_paragraphs()
+            for index in range(len(self.paragraph_texts)):
                 try:
-                    yield from self._process_paragraph(p)
+                    element = self._process_paragraph(index)
+                    if element is not None:
+                        yield element
                 except Exception as e:
                     logger.error(f"Error processing paragraph: {e}")
                     continue
@@ -110,167 +200,69 @@ class HTMLParser:
             logger.error(f"Error in constitutional elements iteration: {e}")
             raise
 
+    def _index_paragraphs(self) -> None:
+        """
+        Build the flat paragraph arrays, once per document state
+        
+        paragraph_texts holds the cleaned text of every <p> in document
+        order, and _next_sibling the index of its next <p> sibling (-1 if
+        none). Siblings share a parent and appear in document order, so
+        the next sibling is the next paragraph seen with the same parent.
+        """
+        if self.paragraph_texts is not None:
+            return
+
+        nodes = self.backend.paragraphs()
+        self.paragraph_texts = [self._clean_text(self.backend.text(p)) for p in nodes]
+        self._next_sibling = [-1] * len(nodes)
+
+        # Parents stay referenced while their id() is used as a key
+        parents = [self.backend.parent(p) for p in nodes]
+        last_by_parent: Dict[int, int] = {}
+        for index, parent in enumerate(parents):
+            previous = last_by_parent.get(id(parent))
+            if previous is not None:
+                self._next_sibling[previous] = index
+            last_by_parent[id(parent)] = index
+
     def _process_preambulo(self) -> Iterator[Tuple[str, Optional[str], Optional[str], str]]:
         """Process preâmbulo section"""
         try:
-            preambulo = self.soup.find('font', face='Arial')
-            if preambulo:
-                text = self._clean_text(preambulo.get_text())
+            preambulo = self.backend.find_font('Arial')
+            if preambulo is not None:
+                text = self._clean_text(self.backend.text(preambulo))
                 if text:
                     logger.info("Found preâmbulo")
                     yield ElementType.PREAMBULO.value, None, None, text
         except Exception as e:
             logger.error(f"Error processing preâmbulo: {e}")
 
-    def _process_paragraph(self, p: Tag) -> Iterator[Tuple[str, Optional[str], Optional[str], str]]:
-        """Process a single paragraph with type detection"""
-        text = self._clean_text(p.get_text())
+    def _process_paragraph(self, index: int) -> Optional[Tuple[str, Optional[str], Optional[str], str]]:
+        """Type one indexed paragraph, taking a heading's title from its next sibling"""
+        text = self.paragraph_texts[index]
         if not text:
-            return
+            return None
 
         logger.debug(f"Processing text: {text[:100]}...")
 
-        # Define element checks in order of specificity
-        element_checks = [
-            (self._check_adct, ElementType.ADCT),
-            (self._check_titulo, ElementType.TITULO),
-            (self._check_capitulo, ElementType.CAPITULO),
-            (self._check_secao, ElementType.SECAO),
-            (self._check_subsecao, ElementType.SUBSECAO),
-            (self._check_artigo, ElementType.ARTIGO),
-            (self._check_paragrafo, ElementType.PARAGRAFO),
-            (self._check_inciso, ElementType.INCISO),
-            (self._check_alinea, ElementType.ALINEA)
-        ]
-
-        for check_func, element_type in element_checks:
-            result = check_func(text, p)
-            if result:
-                number, title = result
-                logger.info(f"Found {element_type.value} {number or ''}")
-                yield element_type.value, number, title, text
-                return
-
-    def _clean_text(self, text: str) -> str:
-        """Clean and normalize text"""
-        if not isinstance(text, str):
-            return ""
-        return " ".join(text.strip().split())
-
-    def _check_adct(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        """Check if text is ADCT header"""
-        if self.patterns.ADCT.search(text):
-            return None, text
-        return None
-
-    def _check_structural_element(self, text: str, p: Tag, keyword: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        """Generic checker for structural elements (título, capítulo, seção, subseção)"""
-        if keyword in text.upper():
-            number = self._extract_roman_numeral(text)
-            next_p = p.find_next_sibling('p')
-            title = self._extract_title(next_p) if next_p else None
-            return number, title
-        return None
-
-    def _check_titulo(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        return self._check_structural_element(text, p, 'TÍTULO')
-
-    def _check_capitulo(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        return self._check_structural_element(text, p, 'CAPÍTULO')
-
-    def _check_secao(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        return self._check_structural_element(text, p, 'SEÇÃO')
-
-    def _check_subsecao(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], Optional[str]]]:
-        return self._check_structural_element(text, p, 'SUBSEÇÃO')
-
-    def _check_artigo(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], None]]:
-        if self.patterns.ARTICLE.match(text):
-            return self._extract_article_number(text), None
-        return None
-
-    def _check_paragrafo(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], None]]:
-        if text.startswith('§') or text.lower().startswith('parágrafo'):
-            return self._extract_paragraph_number(text), None
-        return None
-
-    def _check_inciso(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], None]]:
-        if self._is_inciso(text):
-            return self._extract_inciso_number(text), None
-        return None
-
-    def _check_alinea(self, text: str, p: Tag) -> Optional[Tuple[Optional[str], None]]:
-        if self._is_alinea(text):
-            return self._extract_alinea_letter(text), None
-        return None
-
-    def _extract_roman_numeral(self, text: str) -> Optional[str]:
-        """Extract Roman numeral with validation"""
-        try:
-            match = self.patterns.ROMAN_NUMERAL.search(text)
-            if match:
-                numeral = match.group(0)
-                if set(numeral).issubset(set('IVXLCDM')):
-                    return numeral
-                logger.warning(f"Invalid Roman numeral found: {numeral}")
-        except Exception as e:
-            logger.error(f"Error extracting Roman numeral: {e}")
-        return None
-
-    def _extract_title(self, p: Optional[Tag]) -> Optional[str]:
-        """Extract title with validation"""
-        try:
-            if p and isinstance(p, Tag):
-                text = self._clean_text(p.get_text())
-                if text and not any(keyword in text.upper() for keyword in 
-                    ['TÍTULO', 'CAPÍTULO', 'SEÇÃO', 'SUBSEÇÃO', 'ART.', 'ATO DAS DISPOSIÇÕES']):
-                    return text
-        except Exception as e:
-            logger.error(f"Error extracting title: {e}")
-        return None
-
-    def _extract_article_number(self, text: str) -> Optional[str]:
-        """Extract article number with validation"""
-        try:
-            match = self.patterns.ARTICLE.search(text)
-            return match.group(1) if match else None
-        except Exception as e:
-            logger.error(f"Error extracting article number: {e}")
+        classified = self.classify(text)
+        if classified is None:
             return None
 
-    def _extract_paragraph_number(self, text: str) -> Optional[str]:
-        """Extract paragraph number with special case handling"""
-        try:
-            if 'único' in text.lower():
-                return 'único'
-            match = self.patterns.PARAGRAPH.search(text)
-            return match.group(1) if match else None
-        except Exception as e:
-            logger.error(f"Error extracting paragraph number: {e}")
-            return None
+        element_type, number = classified
+        title = None
+        if element_type in STRUCTURAL_TYPES:
+            sibling = self._next_sibling[index]
+            if sibling != -1:
+                title = title_from_text(self.paragraph_texts[sibling])
 
-    def _is_inciso(self, text: str) -> bool:
-        """Check if text is an inciso"""
-        return bool(self.patterns.INCISO.match(text))
+        logger.info(f"Found {element_type.value} {number or ''}")
+        return element_type.value, number, title, text
 
-    def _extract_inciso_number(self, text: str) -> Optional[str]:
-        """Extract inciso number with validation"""
-        try:
-            match = self.patterns.INCISO_NUMBER.match(text)
-            return match.group(1) if match else None
-        except Exception as e:
-            logger.error(f"Error extracting inciso number: {e}")
-            return None
+    def classify(self, text: str) -> Optional[Tuple[ElementType, Optional[str]]]:
+        """Type a cleaned paragraph (see classify_text)"""
+        return classify_text(text)
 
-    def _is_alinea(self, text: str) -> bool:
-        """Check if text is an alínea"""
-        return bool(self.patterns.ALINEA.match(text))
-
-    def _extract_alinea_letter(self, text: str) -> Optional[str]:
-        """Extract alínea letter with validation"""
-        try:
-            match = self.patterns.ALINEA_LETTER.match(text)
-            return match.group(1) if match else None
-        except Exception as e:
-            logger.error(f"Error extracting alínea letter: {e}")
-            return None
\ No newline at end of file
+    def _clean_text(self, text: str) -> str:
+        """Clean and normalize text"""
+        return clean_text(text)
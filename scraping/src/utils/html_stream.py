@@ -0,0 +1,276 @@
+"""
+Incremental HTML parsing yielding constitutional elements as paragraphs close.
+Author: gabes-machado
+Created: 2026-10-16 23:41:07 UTC
+"""
+
+import logging
+from collections import deque
+from html.parser import HTMLParser as _TokenParser
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .encoding import IncrementalHTMLDecoder, META_PRESCAN_BYTES, sniff_charset
+from .html_parser import (
+    ElementType,
+    STRUCTURAL_TYPES,
+    classify_text,
+    clean_text,
+    title_from_text
+)
+
+logger = logging.getLogger(__name__)
+
+Element = Tuple[str, Optional[str], Optional[str], str]
+
+# Elements that never have children (BeautifulSoup closes them immediately)
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed',
+    'frame', 'hr', 'image', 'img', 'input', 'isindex', 'keygen', 'link',
+    'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr'
+})
+
+# Text inside these elements is not part of get_text()
+SKIPPED_TEXT = frozenset({'script', 'style', 'template'})
+
+ROOT_ID = 0
+
+class _Paragraph:
+    """A <p> element from its start tag until it is emitted"""
+
+    __slots__ = (
+        'node_id', 'parent_id', 'parts', 'closed',
+        'element', 'title_source', 'awaiting_title'
+    )
+
+    def __init__(self, node_id: int, parent_id: int):
+        self.node_id = node_id
+        self.parent_id = parent_id
+        self.parts: List[str] = []
+        self.closed = False
+        self.element: Optional[Element] = None
+        self.title_source: Optional['_Paragraph'] = None
+        self.awaiting_title = False
+
+    @property
+    def ready(self) -> bool:
+        return self.closed and not self.awaiting_title
+
+class StreamingHTMLParser(_TokenParser):
+    """
+    Push parser producing the same elements as HTMLParser without a tree.
+
+    Raw bytes are fed in chunks; each call returns the elements completed
+    so far. Tree semantics follow BeautifulSoup's html.parser builder:
+    an end tag closes every element opened after its start tag, <strike>
+    text is dropped, and the title of a título/capítulo/seção/subseção is
+    the next <p> with the same parent. A structural element is therefore
+    held back until that sibling closes, and every element is held until
+    the preâmbulo (first <font face="Arial">) has closed, so the output
+    order matches the tree parsers.
+    """
+
+    def __init__(self, encoding: Optional[str] = None):
+        """
+        Initialize the parser
+
+        Args:
+            encoding: Charset declared by the response; the bytes are
+                sniffed otherwise (BOM and <meta> in the first bytes)
+        """
+        super().__init__(convert_charrefs=True)
+        self.declared_encoding = encoding
+        self.encoding: Optional[str] = None
+        self._decoder: Optional[IncrementalHTMLDecoder] = None
+        self._head = b''
+
+        self._stack: List[Tuple[str, int]] = []
+        self._next_id = ROOT_ID + 1
+        self._strike_depth = 0
+        self._skip_depth = 0
+
+        self._open: Dict[int, _Paragraph] = {}
+        self._pending: Deque[_Paragraph] = deque()
+        self._awaiting: List[_Paragraph] = []
+
+        self._preambulo_id: Optional[int] = None
+        self._preambulo_parts: List[str] = []
+        self._preambulo_done = False
+        self._output: List[Element] = []
+
+    def feed(self, data: bytes) -> List[Element]:
+        """
+        Feed the next chunk of raw bytes
+
+        Args:
+            data: Raw document bytes following the previous chunk
+
+        Returns:
+            List[Element]: Elements completed by this chunk
+        """
+        if self._decoder is None:
+            self._head += data
+            if len(self._head) < META_PRESCAN_BYTES:
+                return []
+            data, self._head = self._head, b''
+            self._start_decoding(data)
+        super().feed(self._decoder.decode(data))
+        return self._drain()
+
+    def close(self) -> List[Element]:
+        """
+        Finish the document
+
+        Returns:
+            List[Element]: Every element still held back
+        """
+        data, self._head = self._head, b''
+        if self._decoder is None:
+            self._start_decoding(data)
+        super().feed(self._decoder.decode(data, final=True))
+        super().close()
+        while self._stack:
+            self._pop()
+        self._finish_preambulo()
+        for paragraph in self._awaiting:
+            paragraph.awaiting_title = False
+        self._awaiting.clear()
+        return self._drain()
+
+    def _start_decoding(self, head: bytes) -> None:
+        charset = sniff_charset(head, self.declared_encoding)
+        self._decoder = IncrementalHTMLDecoder(charset)
+        self.encoding = self._decoder.charset
+        logger.info(f"Streaming parser decoding as {self.encoding}")
+
+    # Tokenizer callbacks
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in VOID_ELEMENTS:
+            return
+
+        node_id = self._next_id
+        self._next_id += 1
+        parent_id = self._stack[-1][1] if self._stack else ROOT_ID
+        self._stack.append((tag, node_id))
+
+        if tag == 'strike':
+            self._strike_depth += 1
+        elif tag in SKIPPED_TEXT:
+            self._skip_depth += 1
+        elif tag == 'p':
+            self._start_paragraph(node_id, parent_id)
+        elif (tag == 'font' and self._preambulo_id is None
+                and dict(attrs).get('face') == 'Arial'):
+            self._preambulo_id = node_id
+
+    def handle_startendtag(self, tag: str, attrs) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in VOID_ELEMENTS:
+            return
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                while len(self._stack) > index:
+                    self._pop()
+                return
+
+    def handle_data(self, data: str) -> None:
+        if self._strike_depth or self._skip_depth:
+            return
+        for paragraph in self._open.values():
+            paragraph.parts.append(data)
+        if self._preambulo_id is not None and not self._preambulo_done:
+            self._preambulo_parts.append(data)
+
+    # Tree bookkeeping
+
+    def _pop(self) -> None:
+        tag, node_id = self._stack.pop()
+        if tag == 'strike':
+            self._strike_depth -= 1
+        elif tag in SKIPPED_TEXT:
+            self._skip_depth -= 1
+        elif tag == 'p':
+            self._close_paragraph(self._open.pop(node_id))
+        elif node_id == self._preambulo_id:
+            self._finish_preambulo()
+
+        # Structural elements still waiting for a sibling never get a title
+        if self._awaiting:
+            remaining = []
+            for paragraph in self._awaiting:
+                if paragraph.parent_id == node_id and paragraph.title_source is None:
+                    paragraph.awaiting_title = False
+                else:
+                    remaining.append(paragraph)
+            self._awaiting = remaining
+
+    def _start_paragraph(self, node_id: int, parent_id: int) -> None:
+        paragraph = _Paragraph(node_id, parent_id)
+        for waiting in self._awaiting:
+            if waiting.parent_id == parent_id and waiting.title_source is None:
+                waiting.title_source = paragraph
+                break
+        self._open[node_id] = paragraph
+        self._pending.append(paragraph)
+
+    def _close_paragraph(self, paragraph: _Paragraph) -> None:
+        paragraph.closed = True
+        text = clean_text(''.join(paragraph.parts))
+        paragraph.parts = []
+
+        # Resolve the structural elements this paragraph is the title of
+        if self._awaiting:
+            remaining = []
+            for waiting in self._awaiting:
+                if waiting.title_source is paragraph:
+                    element_type, number, _, heading = waiting.element
+                    waiting.element = (element_type, number, title_from_text(text), heading)
+                    waiting.awaiting_title = False
+                    waiting.title_source = None
+                else:
+                    remaining.append(waiting)
+            self._awaiting = remaining
+
+        if not text:
+            return
+        classified = classify_text(text)
+        if classified is None:
+            return
+
+        element_type, number = classified
+        paragraph.element = (element_type.value, number, None, text)
+        if element_type in STRUCTURAL_TYPES:
+            paragraph.awaiting_title = True
+            self._awaiting.append(paragraph)
+
+    def _finish_preambulo(self) -> None:
+        if self._preambulo_done:
+            return
+        self._preambulo_done = True
+        text = clean_text(''.join(self._preambulo_parts))
+        self._preambulo_parts = []
+        if text:
+            logger.info("Found preâmbulo")
+            self._output.append((ElementType.PREAMBULO.value, None, None, text))
+
+    def _drain(self) -> List[Element]:
+        """Collect elements that can no longer change, in document order"""
+        # The preâmbulo comes first; until its <font> has closed (or the
+        # document ended without one) nothing else is released
+        if not self._preambulo_done:
+            return []
+
+        while self._pending and self._pending[0].ready:
+            paragraph = self._pending.popleft()
+            if paragraph.element is not None:
+                logger.info(
+                    f"Found {paragraph.element[0]} {paragraph.element[1] or ''}"
+                )
+                self._output.append(paragraph.element)
+
+        output, self._output = self._output, []
+        return output
@@ -0,0 +1,383 @@
+"""
+On-disk response cache supporting HTTP conditional requests.
+Author: gabes-machado
+Created: 2026-10-16 19:30:12 UTC
+Updated: 2026-10-16 23:41:07 UTC
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+class ResponseCacheError(Exception):
+    """Custom exception for response cache errors"""
+    pass
+
+@dataclass
+class CacheEntry:
+    """Metadata stored alongside a cached response body"""
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    charset: Optional[str] = None
+    size: int = 0
+    stored_at: float = 0.0
+
+class CacheWriter:
+    """
+    Writes a streamed response body into the cache chunk by chunk.
+
+    The body goes to a temporary file that only replaces the cached entry
+    on commit(), so an interrupted download never leaves a partial body.
+    """
+
+    def __init__(self, cache: 'ResponseCache', entry: CacheEntry):
+        self._cache = cache
+        self._entry = entry
+        self._key = cache._key(entry.url)
+        self._body_path = cache._body_path(self._key)
+        self._tmp_path = self._body_path.with_suffix(self._body_path.suffix + ".tmp")
+        self._file: Optional[BinaryIO] = open(self._tmp_path, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, giving up once the body exceeds the cache size"""
+        if self._file is None:
+            return
+        self._entry.size += len(chunk)
+        if self._entry.size > self._cache.max_bytes:
+            logger.debug(f"Response for {self._entry.url} exceeds cache size, not caching")
+            self.abort()
+            return
+        try:
+            self._file.write(chunk)
+        except OSError as e:
+            logger.warning(f"Failed to cache response for {self._entry.url}: {e}")
+            self.abort()
+
+    def commit(self) -> None:
+        """Move the complete body into place and write its metadata"""
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp_path, self._body_path)
+            self._entry.stored_at = time.time()
+            self._cache._atomic_write(
+                self._cache._meta_path(self._key),
+                json.dumps(asdict(self._entry)).encode("utf-8")
+            )
+            self._cache.stats["stores"] += 1
+            logger.debug(f"Cached {self._entry.size} bytes for {self._entry.url}")
+        except OSError as e:
+            logger.warning(f"Failed to cache response for {self._entry.url}: {e}")
+            self._cache._remove(self._key)
+            return
+        self._cache._evict()
+
+    def abort(self) -> None:
+        """Discard the partial body"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            self._tmp_path.unlink()
+        except OSError:
+            pass
+
+class ResponseCache:
+    """
+    Size-bounded on-disk cache of raw response bodies.
+
+    Each entry is stored as two files named after the SHA-256 of the URL:
+    the raw bytes (``.body``) and a small JSON metadata file (``.meta``)
+    holding the validators (ETag / Last-Modified) used to revalidate it.
+    Least recently used entries are evicted once ``max_bytes`` is exceeded.
+    """
+
+    BODY_SUFFIX = ".body"
+    META_SUFFIX = ".meta"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the response cache
+
+        Args:
+            cache_dir: Directory where cached responses are stored
+            max_bytes: Maximum total size of cached bodies in bytes
+        """
+        if max_bytes <= 0:
+            raise ResponseCacheError("max_bytes must be positive")
+
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "load_errors": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bytes_saved": 0
+        }
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise ResponseCacheError(f"Cannot create cache directory: {e}") from e
+
+        logger.info(
+            f"Initialized ResponseCache (dir={self.cache_dir}, "
+            f"max_bytes={max_bytes})"
+        )
+
+    @staticmethod
+    def _key(url: str) -> str:
+        """Get the cache key for a URL"""
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.BODY_SUFFIX}"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.META_SUFFIX}"
+
+    def get_entry(self, url: str) -> Optional[CacheEntry]:
+        """
+        Get cached metadata for a URL
+
+        Args:
+            url: The requested URL
+
+        Returns:
+            Optional[CacheEntry]: Cached metadata or None if not cached
+        """
+        key = self._key(url)
+        meta_path = self._meta_path(key)
+        if not meta_path.exists() or not self._body_path(key).exists():
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Discarding corrupt cache entry for {url}: {e}")
+            self._remove(key)
+            return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Build conditional request headers for a cached URL
+
+        This is the cache lookup of a request, so a URL without a usable
+        entry counts as a miss.
+
+        Args:
+            url: The requested URL
+
+        Returns:
+            Dict[str, str]: If-None-Match / If-Modified-Since headers
+        """
+        entry = self.get_entry(url)
+        if not entry:
+            self.stats["misses"] += 1
+            return {}
+
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def load_body(self, url: str) -> Optional[bytes]:
+        """
+        Load the cached body after a successful revalidation (HTTP 304)
+
+        Args:
+            url: The requested URL
+
+        Returns:
+            Optional[bytes]: Cached raw body or None if missing
+        """
+        body_path = self._body_path(self._key(url))
+        try:
+            content = body_path.read_bytes()
+        except OSError as e:
+            logger.warning(f"Cached body unavailable for {url}: {e}")
+            self.stats["load_errors"] += 1
+            return None
+
+        # Refresh access time so LRU eviction keeps hot entries
+        os.utime(body_path, None)
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += len(content)
+        logger.debug(f"Cache hit for {url} ({len(content)} bytes)")
+        return content
+
+    def open_body(self, url: str) -> Optional[BinaryIO]:
+        """
+        Open the cached body for streaming after a revalidation (HTTP 304)
+
+        Args:
+            url: The requested URL
+
+        Returns:
+            Optional[BinaryIO]: Binary file positioned at the start of the
+            body, or None if missing
+        """
+        body_path = self._body_path(self._key(url))
+        try:
+            f = open(body_path, "rb")
+            size = os.fstat(f.fileno()).st_size
+        except OSError as e:
+            logger.warning(f"Cached body unavailable for {url}: {e}")
+            self.stats["misses"] += 1
+            return None
+
+        os.utime(body_path, None)
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += size
+        logger.debug(f"Cache hit for {url} ({size} bytes, streamed)")
+        return f
+
+    def open_writer(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        charset: Optional[str] = None
+    ) -> Optional[CacheWriter]:
+        """
+        Start caching a streamed response body
+
+        Args:
+            url: The requested URL
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            charset: Charset declared by the response
+
+        Returns:
+            Optional[CacheWriter]: Writer to feed the body to, or None if
+            the response cannot be revalidated and is not cached
+        """
+        self.stats["misses"] += 1
+        if not etag and not last_modified:
+            logger.debug(f"Response for {url} has no validators, not caching")
+            return None
+        entry = CacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            charset=charset
+        )
+        try:
+            return CacheWriter(self, entry)
+        except OSError as e:
+            logger.warning(f"Failed to cache response for {url}: {e}")
+            return None
+
+    def store(
+        self,
+        url: str,
+        content: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        charset: Optional[str] = None
+    ) -> None:
+        """
+        Store a response body with its validators
+
+        Responses without ETag or Last-Modified cannot be revalidated and
+        are not cached.
+
+        Args:
+            url: The requested URL
+            content: Raw response body
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            charset: Charset declared by the response
+        """
+        if not etag and not last_modified:
+            logger.debug(f"Response for {url} has no validators, not caching")
+            return
+        if len(content) > self.max_bytes:
+            logger.debug(f"Response for {url} exceeds cache size, not caching")
+            return
+
+        key = self._key(url)
+        entry = CacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            charset=charset,
+            size=len(content),
+            stored_at=time.time()
+        )
+
+        try:
+            self._atomic_write(self._body_path(key), content)
+            self._atomic_write(
+                self._meta_path(key),
+                json.dumps(asdict(entry)).encode("utf-8")
+            )
+            self.stats["stores"] += 1
+            logger.debug(f"Cached {len(content)} bytes for {url}")
+        except OSError as e:
+            logger.warning(f"Failed to cache response for {url}: {e}")
+            self._remove(key)
+            return
+
+        self._evict()
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        """Write data to a temporary file and rename it into place"""
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, key: str) -> None:
+        """Remove both files of a cache entry"""
+        for path in (self._body_path(key), self._meta_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to remove cache file {path}: {e}")
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the size bound holds"""
+        bodies = []
+        total = 0
+        for body_path in self.cache_dir.glob(f"*{self.BODY_SUFFIX}"):
+            try:
+                st = body_path.stat()
+            except FileNotFoundError:
+                continue
+            bodies.append((st.st_mtime, st.st_size, body_path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, body_path in sorted(bodies):
+            if total <= self.max_bytes:
+                break
+            self._remove(body_path.name[:-len(self.BODY_SUFFIX)])
+            total -= size
+            self.stats["evictions"] += 1
+            logger.debug(f"Evicted cache entry {body_path.name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get a copy of the cache statistics"""
+        return dict(self.stats)
@@ -2,16 +2,19 @@
 HTTP client utilities for making resilient async requests.
 Author: gabes-machado
 Created: 2025-01-17 01:44:34 UTC
+Updated: 2026-10-16 23:41:07 UTC
 """
 
 import asyncio
+import importlib.util
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
+from dataclasses import dataclass
 import datetime
 import time
 
 import aiohttp
-from aiohttp import ClientTimeout, ClientResponse
+from aiohttp import ClientTimeout, ClientResponse, TCPConnector
 from asyncio import TimeoutError
 from aiohttp.client_exceptions import (
     ClientError, 
@@ -19,54 +22,163 @@ from aiohttp.client_exceptions import (
     ServerDisconnectedError,
     TooManyRedirects
 )
-import backoff
 from yarl import URL
 
+from .http_cache import ResponseCache
+from .retry_policy import RetryPolicy
+from .rate_limiter import HostRateLimiter
+from .encoding import sniff_charset, decode_html
+from .http_fixtures import FixtureArchive, FixtureMode, FixtureError
+
 logger = logging.getLogger(__name__)
 
+# Bytes read from the socket per streamed chunk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _supported_content_encodings() -> str:
+    """
+    Content codings aiohttp can transparently decompress here
+    
+    Brotli is only advertised when a Brotli binding is installed, since
+    aiohttp cannot decode "br" responses without one.
+    """
+    encodings = ['gzip', 'deflate']
+    if any(importlib.util.find_spec(m) for m in ('brotli', 'brotlicffi')):
+        encodings.append('br')
+    return ', '.join(encodings)
+
 class HTTPClientError(Exception):
     """Custom exception for HTTP client errors with detailed information"""
-    def __init__(self, message: str, url: str, status: Optional[int] = None):
+    def __init__(
+        self, 
+        message: str, 
+        url: str, 
+        status: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None
+    ):
         self.url = url
         self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
         super().__init__(f"{message} (URL: {url}, Status: {status})")
 
+@dataclass
+class ConnectionPoolConfig:
+    """Tuning for the TCP connector shared by all requests of a client"""
+    limit: int = 100  # Total simultaneous connections
+    limit_per_host: int = 8  # Simultaneous connections to the same host
+    keepalive_timeout: float = 30.0  # Seconds an idle connection is kept
+    ttl_dns_cache: int = 300  # Seconds DNS lookups are cached
+
+@dataclass
+class FetchedDocument:
+    """Raw response body together with the charset sniffed for it"""
+    url: str
+    content: bytes
+    charset: Optional[str] = None
+    status: int = 200
+    from_cache: bool = False
+
+    def text(self) -> str:
+        """Decode the body once with the sniffed charset"""
+        return decode_html(self.content, self.charset)[0]
+
+class DocumentStream:
+    """
+    Response body delivered as an async iterator of raw byte chunks.
+
+    ``charset`` (as declared by the response), ``status`` and
+    ``from_cache`` are set when the headers arrive, before the first chunk.
+    Failures before the first chunk are retried like get_document(); once
+    bytes have been delivered a failure is raised to the consumer.
+    """
+
+    def __init__(
+        self,
+        client: 'AsyncHTTPClient',
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        **kwargs
+    ):
+        self.url = url
+        self.params = params
+        self.chunk_size = chunk_size
+        self.kwargs = kwargs
+        self.charset: Optional[str] = None
+        self.status: Optional[int] = None
+        self.from_cache = False
+        self.size = 0
+        self._client = client
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._client._iter_document(self)
+
 class AsyncHTTPClient:
     """Asynchronous HTTP client with retry logic and encoding handling"""
     
-    # Common Brazilian Portuguese encodings
-    ENCODINGS = ['iso-8859-1', 'utf-8', 'cp1252', 'latin1']
-    
     def __init__(
         self,
         timeout: int = 30,
         max_retries: int = 5,
         backoff_factor: float = 1.0,
         status_forcelist: tuple = (429, 500, 502, 503, 504),
-        max_concurrent_requests: int = 10
+        max_concurrent_requests: int = 10,
+        cache: Optional[ResponseCache] = None,
+        pool_config: Optional[ConnectionPoolConfig] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        fixtures: Optional[FixtureArchive] = None,
+        fixture_mode: Optional[FixtureMode] = None
     ):
         """
         Initialize the HTTP client with configuration
         
         Args:
             timeout: Request timeout in seconds
-            max_retries: Maximum number of retry attempts
-            backoff_factor: Exponential backoff multiplier
+            max_retries: Maximum number of attempts per request
+                (ignored when retry_policy is given)
+            backoff_factor: Base backoff delay in seconds
+                (ignored when retry_policy is given)
             status_forcelist: HTTP status codes to retry on
-            max_concurrent_requests: Maximum concurrent requests
+                (ignored when retry_policy is given)
+            max_concurrent_requests: Maximum concurrent requests per host
+                (ignored when rate_limiter is given)
+            cache: Optional on-disk cache used for conditional requests
+            pool_config: Connection pool tuning (defaults are used if None)
+            retry_policy: Shared retry policy holding the run retry budget
+                and deadline
+            rate_limiter: Shared per-host token bucket and adaptive
+                concurrency limiter
+            fixtures: Fixture archive used by fixture_mode
+            fixture_mode: RECORD saves every response to the archive,
+                REPLAY serves responses from it without network access
         """
+        if fixture_mode and fixtures is None:
+            raise ValueError("fixture_mode requires a fixture archive")
+
+        self.request_timeout = timeout
         self.timeout = ClientTimeout(
             total=timeout,
             connect=timeout/2,
             sock_read=timeout
         )
-        self.max_retries = max_retries
-        self.backoff_factor = backoff_factor
-        self.status_forcelist = status_forcelist
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=max_retries,
+            base_delay=backoff_factor,
+            retry_statuses=tuple(status_forcelist)
+        )
+        self.max_retries = self.retry_policy.max_attempts
+        self.status_forcelist = self.retry_policy.retry_statuses
         self._session: Optional[aiohttp.ClientSession] = None
-        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
-        self._last_request_time = 0
-        self._min_request_interval = 0.1  # 100ms between requests
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            max_concurrency=max_concurrent_requests
+        )
+        self.cache = cache
+        self.pool_config = pool_config or ConnectionPoolConfig()
+        self.fixtures = fixtures
+        self.fixture_mode = fixture_mode
         
         logger.info(
             f"Initialized AsyncHTTPClient (timeout={timeout}s, "
@@ -84,11 +196,28 @@ class AsyncHTTPClient:
         if exc_type:
             logger.error(f"Error in context: {exc_type.__name__}: {exc_val}")
 
+    @property
+    def is_open(self) -> bool:
+        """Whether the underlying session is open"""
+        return self._session is not None and not self._session.closed
+
+    def _create_connector(self) -> TCPConnector:
+        """Create the pooled TCP connector used by the session"""
+        return TCPConnector(
+            limit=self.pool_config.limit,
+            limit_per_host=self.pool_config.limit_per_host,
+            keepalive_timeout=self.pool_config.keepalive_timeout,
+            ttl_dns_cache=self.pool_config.ttl_dns_cache,
+            use_dns_cache=True
+        )
+
     async def create_session(self) -> None:
         """Create aiohttp session with custom configuration"""
         if self._session is None or self._session.closed:
             self._session = aiohttp.ClientSession(
+                connector=self._create_connector(),
                 timeout=self.timeout,
+                auto_decompress=True,
                 headers=self._get_default_headers(),
                 raise_for_status=True,
                 trust_env=True
@@ -101,9 +230,6 @@ class AsyncHTTPClient:
             try:
                 await self._session.close()
                 logger.debug("Closed aiohttp session")
-                
-                # Wait for all connections to close
-                await asyncio.sleep(0.25)
             except Exception as e:
                 logger.warning(f"Error closing session: {e}")
 
@@ -117,6 +243,7 @@ class AsyncHTTPClient:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9',
             'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
             'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.3',
+            'Accept-Encoding': _supported_content_encodings(),
             'Connection': 'keep-alive'
         }
 
@@ -140,60 +267,52 @@ class AsyncHTTPClient:
             ServerDisconnectedError
         ))
 
-    async def _decode_response(
-        self, 
-        response: ClientResponse, 
-        content: bytes
-    ) -> str:
+    async def _read_content(self, response: ClientResponse, cache_key: str) -> bytes:
         """
-        Attempt to decode response content with multiple encodings
+        Read the response body, using the cache for 304 responses
         
         Args:
             response: The aiohttp response
-            content: The raw content bytes
+            cache_key: URL (with query) identifying the cache entry
             
         Returns:
-            str: Decoded content
+            bytes: The raw content bytes
             
         Raises:
-            UnicodeError: If content cannot be decoded
+            HTTPClientError: If a 304 is received without a cached body
         """
-        # Try content-type encoding first
-        if response.charset:
-            try:
-                return content.decode(response.charset)
-            except UnicodeError:
-                logger.debug(f"Failed to decode with charset {response.charset}")
+        if response.status == 304 and self.cache:
+            content = self.cache.load_body(cache_key)
+            if content is None:
+                raise HTTPClientError(
+                    "Not Modified received without cached body",
+                    cache_key,
+                    response.status
+                )
+            return content
 
-        # Try common encodings
-        errors = []
-        for encoding in self.ENCODINGS:
-            try:
-                return content.decode(encoding)
-            except UnicodeError as e:
-                errors.append(f"{encoding}: {str(e)}")
+        content = await response.read()
+        if self.cache and response.status == 200:
+            self.cache.store(
+                cache_key,
+                content,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                charset=response.charset
+            )
+        return content
+
+    def _response_charset(
+        self, 
+        response: ClientResponse, 
+        cache_key: str
+    ) -> Optional[str]:
+        """Get the declared charset, falling back to the cached one on 304"""
+        if response.status == 304 and self.cache:
+            entry = self.cache.get_entry(cache_key)
+            return entry.charset if entry else None
+        return response.charset
 
-        # If all fails, try with 'ignore' error handler
-        logger.warning(
-            f"Failed to decode with encodings: {', '.join(errors)}. "
-            "Falling back to utf-8 with ignore."
-        )
-        return content.decode('utf-8', errors='ignore')
-
-    async def _throttle_request(self) -> None:
-        """Implement request throttling"""
-        now = time.time()
-        time_since_last = now - self._last_request_time
-        if time_since_last < self._min_request_interval:
-            await asyncio.sleep(self._min_request_interval - time_since_last)
-        self._last_request_time = time.time()
-
-    @backoff.on_exception(
-        backoff.expo,
-        (TimeoutError, ClientError, ConnectionError, ServerDisconnectedError),
-        max_tries=5,
-        logger=logger
-    )
     async def get(
         self, 
         url: str, 
@@ -201,7 +320,7 @@ class AsyncHTTPClient:
         **kwargs
     ) -> str:
         """
-        Perform an async GET request with automatic retries and throttling
+        Perform an async GET request and return the decoded text
         
         Args:
             url: The URL to request
@@ -214,30 +333,255 @@ class AsyncHTTPClient:
         Raises:
             HTTPClientError: If the request fails after all retries
         """
+        document = await self.get_document(url, params, **kwargs)
+        return document.text()
+
+    async def get_document(
+        self, 
+        url: str, 
+        params: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> FetchedDocument:
+        """
+        Perform an async GET request with automatic retries and throttling
+
+        Retries are governed by the client's RetryPolicy: transient failures
+        are retried with full-jitter backoff (or the server's Retry-After),
+        drawing on the shared retry budget and never past the deadline.
+
+        When a response cache is configured, the request is sent with
+        If-None-Match / If-Modified-Since and a 304 answer is served from
+        the cached body.
+        
+        The body is returned as raw bytes with its charset sniffed once
+        (BOM, Content-Type, <meta>, statistical detection), so callers can
+        decode and parse it in a single pass.
+        
+        Args:
+            url: The URL to request
+            params: Optional query parameters
+            **kwargs: Additional arguments to pass to aiohttp.ClientSession.get()
+            
+        Returns:
+            FetchedDocument: Raw body and sniffed charset
+            
+        Raises:
+            HTTPClientError: If the request fails after all retries
+        """
+        parsed_url = self._validate_url(url)
+
+        if self.fixture_mode == FixtureMode.REPLAY:
+            return self._replay(
+                str(parsed_url.update_query(params)) if params else url
+            )
+
         if not self._session or self._session.closed:
             await self.create_session()
 
-        # Validate URL
+        self.retry_policy.start()
+        attempt = 0
+        while True:
+            try:
+                return await self._get_once(url, parsed_url, params, **kwargs)
+            except HTTPClientError as e:
+                delay = self.retry_policy.next_delay(
+                    attempt, e.retryable, e.retry_after
+                )
+                if delay is None:
+                    raise
+                self._log_retry(url, attempt, delay, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _log_retry(
+        self,
+        url: str,
+        attempt: int,
+        delay: float,
+        error: Exception
+    ) -> None:
+        """Log a granted retry with the attempt and run budget it uses"""
+        logger.warning(
+            f"Retrying {url} in {delay:.2f}s "
+            f"(attempt {attempt + 2}/{self.retry_policy.max_attempts}, "
+            f"run retries used {self.retry_policy.retries_used}/"
+            f"{self.retry_policy.retry_budget}): {error}"
+        )
+
+    def stream_document(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        **kwargs
+    ) -> DocumentStream:
+        """
+        Perform a GET request whose body is consumed while it downloads
+
+        Retries, throttling, the response cache and fixtures behave as in
+        get_document(), except that bodies are never held in memory: a
+        304 streams the cached file and a 200 is written to the cache as
+        it arrives. Charset sniffing is left to the consumer.
+
+        Args:
+            url: The URL to request
+            params: Optional query parameters
+            chunk_size: Maximum size of each chunk in bytes
+            **kwargs: Additional arguments to pass to aiohttp.ClientSession.get()
+
+        Returns:
+            DocumentStream: Async iterator over the raw body chunks
+        """
+        return DocumentStream(self, url, params, chunk_size, **kwargs)
+
+    async def _iter_document(self, stream: DocumentStream) -> AsyncIterator[bytes]:
+        """
+        Retry loop behind DocumentStream
+
+        Raises:
+            HTTPClientError: If the request fails after all retries, or
+                after part of the body was delivered
+        """
+        url = stream.url
+        parsed_url = self._validate_url(url)
+
+        if self.fixture_mode == FixtureMode.REPLAY:
+            document = self._replay(
+                str(parsed_url.update_query(stream.params)) if stream.params else url
+            )
+            stream.charset = document.charset
+            stream.status = document.status
+            for offset in range(0, len(document.content), stream.chunk_size):
+                chunk = document.content[offset:offset + stream.chunk_size]
+                stream.size += len(chunk)
+                yield chunk
+            return
+
+        if not self._session or self._session.closed:
+            await self.create_session()
+
+        self.retry_policy.start()
+        attempt = 0
+        while True:
+            try:
+                async for chunk in self._stream_once(stream, parsed_url):
+                    yield chunk
+                return
+            except HTTPClientError as e:
+                if stream.size:
+                    raise
+                delay = self.retry_policy.next_delay(
+                    attempt, e.retryable, e.retry_after
+                )
+                if delay is None:
+                    raise
+                self._log_retry(url, attempt, delay, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _validate_url(self, url: str) -> URL:
+        """
+        Parse and validate a request URL
+
+        Raises:
+            HTTPClientError: If the URL has no scheme or host
+        """
         try:
             parsed_url = URL(url)
             if not parsed_url.scheme or not parsed_url.host:
                 raise ValueError("Invalid URL")
         except Exception as e:
             raise HTTPClientError(f"Invalid URL: {str(e)}", url)
+        return parsed_url
+
+    def _replay(self, request_url: str) -> FetchedDocument:
+        """
+        Serve a request from the fixture archive
+        
+        Raises:
+            HTTPClientError: If the URL was never recorded
+        """
+        entry = self.fixtures.lookup(request_url)
+        if entry is None:
+            raise HTTPClientError("No recorded fixture", request_url, 404)
+        try:
+            content = self.fixtures.load_body(entry)
+        except FixtureError as e:
+            raise HTTPClientError(str(e), request_url) from e
+        logger.debug(f"Replayed {request_url} ({entry.size} bytes)")
+        return FetchedDocument(
+            url=request_url,
+            content=content,
+            charset=entry.charset,
+            status=entry.status
+        )
+
+    def _attempt_timeout(self) -> ClientTimeout:
+        """Get the timeout for one attempt, clamped to the run deadline"""
+        total = self.retry_policy.request_timeout(self.request_timeout)
+        if total >= self.request_timeout:
+            return self.timeout
+        return ClientTimeout(total=total, connect=min(total, self.timeout.connect))
+
+    def _stream_timeout(self) -> ClientTimeout:
+        """
+        Get the timeout for one streamed attempt
+
+        There is no total limit, since the consumer's processing between
+        chunks counts towards it; stalls are bounded per socket read.
+        """
+        limit = self.retry_policy.request_timeout(self.request_timeout)
+        return ClientTimeout(
+            total=None,
+            connect=min(limit, self.timeout.connect),
+            sock_read=min(limit, self.timeout.sock_read)
+        )
 
-        async with self._semaphore:
-            await self._throttle_request()
+    async def _get_once(
+        self, 
+        url: str, 
+        parsed_url: URL,
+        params: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> FetchedDocument:
+        """
+        Perform a single GET attempt
+        
+        Args:
+            url: The URL to request
+            parsed_url: The validated URL
+            params: Optional query parameters
+            **kwargs: Additional arguments to pass to aiohttp.ClientSession.get()
+            
+        Returns:
+            FetchedDocument: Raw body and sniffed charset
             
+        Raises:
+            HTTPClientError: If the attempt fails, flagged as retryable when
+                the failure is transient
+        """
+        if self.retry_policy.expired():
+            raise HTTPClientError("Run deadline exceeded", url)
+
+        cache_key = str(parsed_url.update_query(params)) if params else url
+        headers = dict(kwargs.pop('headers', None) or {})
+        if self.cache:
+            headers.update(self.cache.conditional_headers(cache_key))
+
+        async with await self.rate_limiter.slot(parsed_url.host) as slot:
             try:
                 start_time = time.time()
                 async with self._session.get(
                     url, 
                     params=params,
+                    headers=headers,
                     allow_redirects=True,
                     max_redirects=5,
+                    timeout=self._attempt_timeout(),
                     **kwargs
                 ) as response:
-                    content = await response.read()
+                    slot.record(response.status)
+                    content = await self._read_content(response, cache_key)
                     
                     # Log request details
                     duration = time.time() - start_time
@@ -247,20 +591,191 @@ class AsyncHTTPClient:
                         f"Size: {len(content)} bytes"
                     )
 
-                    return await self._decode_response(response, content)
-
-            except TooManyRedirects as e:
-                logger.error(f"Too many redirects for {url}")
-                raise HTTPClientError("Too many redirects", url) from e
-                
-            except asyncio.TimeoutError as e:
-                logger.error(f"Timeout fetching {url}")
-                raise HTTPClientError("Request timeout", url) from e
-                
-            except ClientResponseError as e:
-                logger.error(f"HTTP {e.status} error for {url}: {str(e)}")
-                raise HTTPClientError(str(e), url, e.status) from e
-                
+                    document = FetchedDocument(
+                        url=url,
+                        content=content,
+                        charset=sniff_charset(
+                            content, 
+                            self._response_charset(response, cache_key)
+                        ),
+                        status=response.status,
+                        from_cache=response.status == 304
+                    )
+                    if self.fixture_mode == FixtureMode.RECORD:
+                        self.fixtures.record(
+                            cache_key,
+                            200 if document.from_cache else response.status,
+                            content,
+                            charset=document.charset,
+                            headers=dict(response.headers)
+                        )
+                    return document
+
+            except HTTPClientError:
+                raise
+
             except Exception as e:
-                logger.error(f"Error fetching {url}: {str(e)}")
-                raise HTTPClientError(str(e), url) from e
\ No newline at end of file
+                raise self._client_error(e, url, slot) from e
+
+    async def _stream_once(
+        self,
+        stream: DocumentStream,
+        parsed_url: URL
+    ) -> AsyncIterator[bytes]:
+        """
+        Perform a single streamed GET attempt
+
+        Args:
+            stream: The stream being served (receives response metadata)
+            parsed_url: The validated URL
+
+        Yields:
+            bytes: Raw body chunks
+
+        Raises:
+            HTTPClientError: If the attempt fails, flagged as retryable when
+                the failure is transient
+        """
+        url = stream.url
+        if self.retry_policy.expired():
+            raise HTTPClientError("Run deadline exceeded", url)
+
+        params = stream.params
+        kwargs = dict(stream.kwargs)
+        cache_key = str(parsed_url.update_query(params)) if params else url
+        headers = dict(kwargs.pop('headers', None) or {})
+        if self.cache:
+            headers.update(self.cache.conditional_headers(cache_key))
+
+        async with await self.rate_limiter.slot(parsed_url.host) as slot:
+            try:
+                async with self._session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    allow_redirects=True,
+                    max_redirects=5,
+                    timeout=self._stream_timeout(),
+                    **kwargs
+                ) as response:
+                    slot.record(response.status)
+                    stream.status = response.status
+                    stream.charset = self._response_charset(response, cache_key)
+                    stream.from_cache = response.status == 304
+
+                    recorded = [] if self.fixture_mode == FixtureMode.RECORD else None
+                    async for chunk in self._iter_content(
+                        response, cache_key, stream.chunk_size
+                    ):
+                        stream.size += len(chunk)
+                        if recorded is not None:
+                            recorded.append(chunk)
+                        yield chunk
+
+                    logger.debug(
+                        f"Streamed GET {url} - Status: {response.status} - "
+                        f"Size: {stream.size} bytes"
+                    )
+                    if recorded is not None:
+                        self.fixtures.record(
+                            cache_key,
+                            200 if stream.from_cache else response.status,
+                            b''.join(recorded),
+                            charset=stream.charset,
+                            headers=dict(response.headers)
+                        )
+
+            except HTTPClientError:
+                raise
+
+            except Exception as e:
+                raise self._client_error(e, url, slot) from e
+
+    async def _iter_content(
+        self,
+        response: ClientResponse,
+        cache_key: str,
+        chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Streaming counterpart of _read_content
+
+        Raises:
+            HTTPClientError: If a 304 is received without a cached body
+        """
+        if response.status == 304 and self.cache:
+            body = self.cache.open_body(cache_key)
+            if body is None:
+                raise HTTPClientError(
+                    "Not Modified received without cached body",
+                    cache_key,
+                    response.status
+                )
+            with body:
+                while chunk := body.read(chunk_size):
+                    yield chunk
+            return
+
+        writer = None
+        if self.cache and response.status == 200:
+            writer = self.cache.open_writer(
+                cache_key,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                charset=response.charset
+            )
+        try:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if writer:
+                    writer.write(chunk)
+                yield chunk
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+        if writer:
+            writer.commit()
+
+    def _client_error(self, error: Exception, url: str, slot) -> HTTPClientError:
+        """
+        Translate a failed attempt into an HTTPClientError
+
+        Args:
+            error: The exception raised by the attempt
+            url: The requested URL
+            slot: Rate limiter slot of the attempt (receives the status)
+
+        Returns:
+            HTTPClientError: Error flagged as retryable when transient
+        """
+        if isinstance(error, TooManyRedirects):
+            slot.record(error.status)
+            logger.error(f"Too many redirects for {url}")
+            return HTTPClientError("Too many redirects", url)
+
+        if isinstance(error, asyncio.TimeoutError):
+            logger.error(f"Timeout fetching {url}")
+            return HTTPClientError(
+                "Request timeout", url, retryable=self._should_retry(error)
+            )
+
+        if isinstance(error, ClientResponseError):
+            slot.record(error.status)
+            logger.error(f"HTTP {error.status} error for {url}: {str(error)}")
+            retry_after = None
+            if error.status in (429, 503) and error.headers:
+                retry_after = RetryPolicy.parse_retry_after(
+                    error.headers.get('Retry-After')
+                )
+            return HTTPClientError(
+                str(error),
+                url,
+                error.status,
+                retryable=self._should_retry(error),
+                retry_after=retry_after
+            )
+
+        logger.error(f"Error fetching {url}: {str(error)}")
+        return HTTPClientError(
+            str(error), url, retryable=self._should_retry(error)
+        )
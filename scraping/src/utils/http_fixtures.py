@@ -0,0 +1,213 @@
+"""
+Record/replay archive of HTTP responses for offline runs and benchmarks.
+Author: gabes-machado
+Created: 2026-10-16 21:36:27 UTC
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, asdict, field
+from enum import Enum
+from pathlib import Path
+from typing import Optional, Dict, Iterator, TextIO
+
+logger = logging.getLogger(__name__)
+
+class FixtureError(Exception):
+    """Custom exception for fixture archive errors"""
+    pass
+
+class FixtureMode(Enum):
+    """How the HTTP client uses a fixture archive"""
+    RECORD = "record"
+    REPLAY = "replay"
+
+@dataclass
+class RecordedResponse:
+    """A recorded response; the body lives in a separate content-addressed file"""
+    url: str
+    status: int
+    body_sha256: str
+    size: int
+    charset: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+class FixtureArchive:
+    """
+    Directory holding recorded responses.
+
+    Layout::
+
+        <root>/index.jsonl           one RecordedResponse per line
+        <root>/bodies/<sha256>.bin   raw response bodies (deduplicated)
+
+    Recording appends one line to the index, so a session costs O(1) per
+    response and a crash loses at most the line being written. The last
+    line for a URL wins; close() compacts the index to one line per URL
+    and renames it into place.
+    """
+
+    INDEX_FILE = "index.jsonl"
+    BODIES_DIR = "bodies"
+
+    # Response headers worth keeping for replay
+    KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+    def __init__(self, root: str):
+        """
+        Open (or create) a fixture archive
+
+        Args:
+            root: Archive directory
+        """
+        self.root = Path(root)
+        self._bodies = self.root / self.BODIES_DIR
+        self._index_path = self.root / self.INDEX_FILE
+        self._index: Dict[str, RecordedResponse] = {}
+        self._journal: Optional[TextIO] = None
+        self._index_lines = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not self._index_path.exists():
+            return
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            raise FixtureError(f"Cannot read fixture index {self._index_path}: {e}") from e
+
+        for number, line in enumerate(lines, 1):
+            try:
+                entry = RecordedResponse(**json.loads(line))
+            except (ValueError, TypeError) as e:
+                if number == len(lines):
+                    # Torn write of an interrupted recording session
+                    logger.warning(f"Ignoring truncated last line of {self._index_path}")
+                    self._index_lines += 1
+                    break
+                raise FixtureError(
+                    f"Invalid fixture index {self._index_path} line {number}: {e}"
+                ) from e
+            self._index[entry.url] = entry
+            self._index_lines += 1
+        logger.info(f"Loaded {len(self._index)} fixtures from {self.root}")
+
+    def _append_index(self, entry: RecordedResponse) -> None:
+        """Append one entry to the index, opening it on first use
+
+        A torn or superseded line left by an earlier session is compacted
+        away before the first append, so new lines never follow garbage.
+        """
+        if self._journal is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            if self._index_lines != len(self._index):
+                self._compact_index()
+            self._journal = open(self._index_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(asdict(entry), ensure_ascii=False, sort_keys=True) + "\n")
+        self._journal.flush()
+        self._index_lines += 1
+
+    def _compact_index(self) -> None:
+        """Rewrite the index with one line per URL and rename it into place"""
+        tmp_path = self._index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self._index.values():
+                f.write(json.dumps(asdict(entry), ensure_ascii=False, sort_keys=True) + "\n")
+        os.replace(tmp_path, self._index_path)
+        self._index_lines = len(self._index)
+
+    def close(self) -> None:
+        """
+        Close the index, compacting it if URLs were recorded more than once
+
+        Raises:
+            FixtureError: If the index cannot be rewritten
+        """
+        try:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self._index_lines != len(self._index):
+                self._compact_index()
+        except OSError as e:
+            raise FixtureError(f"Failed to write fixture index {self._index_path}: {e}") from e
+
+    def __enter__(self) -> 'FixtureArchive':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def record(
+        self,
+        url: str,
+        status: int,
+        content: bytes,
+        charset: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> RecordedResponse:
+        """
+        Record a response
+
+        Args:
+            url: Requested URL (including query string)
+            status: HTTP status code
+            content: Raw response body
+            charset: Charset of the body, if known
+            headers: Response headers (only KEPT_HEADERS are stored)
+
+        Returns:
+            RecordedResponse: The stored metadata
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        body_path = self._bodies / f"{digest}.bin"
+        try:
+            if not body_path.exists():
+                self._bodies.mkdir(parents=True, exist_ok=True)
+                body_path.write_bytes(content)
+
+            kept = {
+                name: value for name, value in (headers or {}).items()
+                if name in self.KEPT_HEADERS
+            }
+            entry = RecordedResponse(
+                url=url,
+                status=status,
+                body_sha256=digest,
+                size=len(content),
+                charset=charset,
+                headers=kept
+            )
+            self._append_index(entry)
+            self._index[url] = entry
+        except OSError as e:
+            raise FixtureError(f"Failed to record {url}: {e}") from e
+
+        logger.debug(f"Recorded {url} ({len(content)} bytes)")
+        return entry
+
+    def lookup(self, url: str) -> Optional[RecordedResponse]:
+        """Get the recorded response for a URL, if any"""
+        return self._index.get(url)
+
+    def load_body(self, entry: RecordedResponse) -> bytes:
+        """
+        Load the body of a recorded response
+
+        Raises:
+            FixtureError: If the body file is missing
+        """
+        body_path = self._bodies / f"{entry.body_sha256}.bin"
+        try:
+            return body_path.read_bytes()
+        except OSError as e:
+            raise FixtureError(f"Missing fixture body for {entry.url}: {e}") from e
+
+    def __iter__(self) -> Iterator[RecordedResponse]:
+        return iter(list(self._index.values()))
+
+    def __len__(self) -> int:
+        return len(self._index)
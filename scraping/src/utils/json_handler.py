@@ -2,10 +2,12 @@
 JSON handling utilities for constitution data.
 Author: gabes-machado
 Created: 2025-01-17 02:08:18 UTC
-Updated: 2025-01-19 20:23:29 UTC
+Updated: 2026-10-17 04:24:37 UTC
 """
 
+import hashlib
 import json
+import os
 import pandas as pd
 from json.decoder import JSONDecodeError
 import logging
@@ -13,6 +15,16 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional, TextIO
 from dataclasses import dataclass, field
 
+from .constitution_structure import ConstitutionProcessor
+from .json_writer import TreeJSONWriter
+from .manifest import TreeDigest, build_manifest, write_manifest
+from .output_formats import get_format, format_for_path
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 logger = logging.getLogger(__name__)
 
 class JSONHandlerError(Exception):
@@ -48,16 +60,25 @@ class HierarchyConfig:
         """Get the columns list"""
         return cls().COLUMNS
 
+def _is_polars(df: Any) -> bool:
+    """Whether df is a Polars DataFrame (from the transformer's polars engine)"""
+    return pl is not None and isinstance(df, pl.DataFrame)
+
 class JSONHandler:
     """Handler for JSON operations with validation and error handling"""
     
     @classmethod
-    def df_to_nested_dict(cls, df: pd.DataFrame) -> Dict[str, Any]:
+    def df_to_nested_dict(cls, df: Any) -> Dict[str, Any]:
         """
         Convert DataFrame to nested dictionary structure with validation
         
+        Each row is placed under the values of its non-null hierarchy
+        columns and becomes a content entry of the deepest one. Rows are
+        read from column lists rather than iterrows(), in one linear pass.
+        
         Args:
-            df: DataFrame containing constitutional text and structure
+            df: pandas or Polars DataFrame containing constitutional text
+                and structure
             
         Returns:
             Dict[str, Any]: Nested dictionary structure
@@ -77,53 +98,64 @@ class JSONHandler:
                 "structure_elements": {}
             }
 
-            for idx, row in df.iterrows():
+            # Work on plain column lists instead of one Series per row
+            columns = HierarchyConfig.get_columns()
+            plural_mapping = HierarchyConfig.get_plural_mapping()
+            levels = list(zip(columns, [plural_mapping[col] for col in columns]))
+            if _is_polars(df):
+                values = [df.get_column(col).to_list() for col in columns]
+                present = df.select(pl.col(columns).is_not_null()).rows()
+                texts = df.get_column("texto").to_list()
+                labels = range(df.height)
+            else:
+                values = [df[col].tolist() for col in columns]
+                present = df[columns].notna().to_numpy().tolist()
+                texts = df["texto"].tolist()
+                labels = df.index
+            element_counts = stats["structure_elements"]
+
+            for position, row_present in enumerate(present):
                 try:
                     current_level = root
-                    row_dict = row.to_dict()
+                    numero_col = numero_str = None
 
-                    # Determine last hierarchical level
-                    used_cols = [
-                        c for c in HierarchyConfig.get_columns() 
-                        if pd.notna(row_dict.get(c))
-                    ]
-                    
-                    if not used_cols:
+                    # Walk the non-null levels, creating missing nodes
+                    for level, is_present in enumerate(row_present):
+                        if not is_present:
+                            continue
+                        numero_col, plural_key = levels[level]
+                        numero_str = values[level][position]
+                        children = current_level.get(plural_key)
+                        if children is None:
+                            children = current_level[plural_key] = {}
+                        key = str(numero_str)
+                        node = children.get(key)
+                        if node is None:
+                            node = children[key] = {}
+                        current_level = node
+
+                    if numero_col is None:
                         stats["empty_rows"] += 1
                         continue
 
-                    numero_col = used_cols[-1]
-                    numero_str = row_dict.get(numero_col)
-
-                    # Create entry
+                    # Add content
                     entry = {
                         "classe": numero_col,
                         "numero": numero_str,
-                        "texto": row_dict["texto"]
+                        "texto": texts[position]
                     }
-
-                    # Build nested structure
-                    for col in used_cols:
-                        val = row_dict.get(col)
-                        if pd.isna(val):
-                            break
-                            
-                        plural_key = HierarchyConfig.get_plural_mapping()[col]
-                        current_level.setdefault(plural_key, {})
-                        current_level[plural_key].setdefault(str(val), {})
-                        current_level = current_level[plural_key][str(val)]
-
-                    # Add content
-                    current_level.setdefault("conteudo", []).append(entry)
+                    conteudo = current_level.get("conteudo")
+                    if conteudo is None:
+                        current_level["conteudo"] = [entry]
+                    else:
+                        conteudo.append(entry)
                     
                     # Update statistics
                     stats["processed_rows"] += 1
-                    stats["structure_elements"][numero_col] = (
-                        stats["structure_elements"].get(numero_col, 0) + 1
-                    )
+                    element_counts[numero_col] = element_counts.get(numero_col, 0) + 1
 
                 except Exception as e:
-                    logger.warning(f"Error processing row {idx}: {e}")
+                    logger.warning(f"Error processing row {labels[position]}: {e}")
                     continue
 
             cls._log_processing_stats(stats)
@@ -134,12 +166,12 @@ class JSONHandler:
             raise JSONHandlerError(f"Conversion failed: {str(e)}") from e
 
     @staticmethod
-    def _validate_dataframe(df: pd.DataFrame) -> None:
+    def _validate_dataframe(df: Any) -> None:
         """
         Validate DataFrame structure and content
         
         Args:
-            df: DataFrame to validate
+            df: pandas or Polars DataFrame to validate
             
         Raises:
             JSONHandlerError: If validation fails
@@ -152,10 +184,17 @@ class JSONHandler:
                 f"Missing required columns: {', '.join(missing_columns)}"
             )
         
-        if df.empty:
+        if _is_polars(df):
+            empty = df.is_empty()
+            missing_text = df.get_column("texto").is_null().any()
+        else:
+            empty = df.empty
+            missing_text = df["texto"].isna().any()
+        
+        if empty:
             raise JSONHandlerError("DataFrame is empty")
         
-        if df["texto"].isna().any():
+        if missing_text:
             logger.warning("Found rows with missing text")
 
     @staticmethod
@@ -209,6 +248,116 @@ class JSONHandler:
             logger.error(f"Error saving JSON: {e}")
             raise JSONHandlerError(f"Failed to save JSON: {str(e)}") from e
 
+    @classmethod
+    def save_tree(
+        cls,
+        processor: ConstitutionProcessor,
+        output_file: str,
+        compact: bool = False
+    ) -> None:
+        """
+        Stream a processed tree to a JSON file without building its dict
+        
+        The default output is identical to save_json(processor.get_result()).
+        A sidecar manifest (see manifest.py) is written next to it.
+        
+        Args:
+            processor: Processor holding the parsed constitution
+            output_file: Output file path
+            compact: Write without indentation (production mode)
+            
+        Raises:
+            JSONHandlerError: If saving fails
+        """
+        try:
+            writer = TreeJSONWriter(compact=compact)
+            writer.write(processor, output_file)
+            write_manifest(output_file, build_manifest(
+                output_file, "json", writer.bytes_written, writer.sha256, writer.digest
+            ))
+
+            logger.info(
+                f"Successfully saved JSON to {output_file} "
+                f"(size: {writer.bytes_written/1024:.2f} KB)"
+            )
+
+        except Exception as e:
+            logger.error(f"Error saving JSON: {e}")
+            raise JSONHandlerError(f"Failed to save JSON: {str(e)}") from e
+
+    @classmethod
+    def save_data(
+        cls,
+        data: Dict[str, Any],
+        output_file: str,
+        output_format: str = "json"
+    ) -> None:
+        """
+        Save data in one of the registered output formats, with a sidecar
+        manifest (see manifest.py)
+        
+        Args:
+            data: Data to save
+            output_file: Output file path
+            output_format: Name of the format (see output_formats.FORMATS)
+            
+        Raises:
+            JSONHandlerError: If the format is unavailable or saving fails
+        """
+        try:
+            if not isinstance(data, dict):
+                raise ValueError("Data must be a dictionary")
+
+            content = get_format(output_format).dumps(data)
+
+            output_path = Path(output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = output_path.with_name(output_path.name + ".tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, output_path)
+
+            digest = TreeDigest()
+            digest.digest(data)
+            write_manifest(output_file, build_manifest(
+                output_file, output_format, len(content),
+                hashlib.sha256(content).hexdigest(), digest
+            ))
+
+            logger.info(
+                f"Successfully saved {output_format} to {output_file} "
+                f"(size: {len(content)/1024:.2f} KB)"
+            )
+
+        except Exception as e:
+            logger.error(f"Error saving {output_format}: {e}")
+            raise JSONHandlerError(f"Failed to save {output_format}: {str(e)}") from e
+
+    @classmethod
+    def load_data(
+        cls,
+        file_path: str,
+        output_format: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Load a file written by save_data or save_tree
+        
+        Args:
+            file_path: Path to the file
+            output_format: Name of its format (guessed from the suffix if None)
+            
+        Returns:
+            Dict[str, Any]: The decoded data
+            
+        Raises:
+            JSONHandlerError: If loading or decoding fails
+        """
+        try:
+            decoder = get_format(output_format) if output_format else format_for_path(file_path)
+            return decoder.loads(Path(file_path).read_bytes())
+        except Exception as e:
+            logger.error(f"Error loading {file_path}: {e}")
+            raise JSONHandlerError(f"Failed to load {file_path}: {e}") from e
+
     @classmethod
     def load_json(cls, file_obj: TextIO) -> Dict[str, Any]:
         """
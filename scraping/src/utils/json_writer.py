@@ -0,0 +1,243 @@
+"""
+Streaming JSON serialization of the processed constitution tree.
+Author: gabes-machado
+Created: 2026-10-17 01:44:05 UTC
+Updated: 2026-10-17 03:34:18 UTC
+"""
+
+import hashlib
+import logging
+import os
+from json.encoder import encode_basestring
+from pathlib import Path
+from typing import BinaryIO, Dict, Any, List, Optional, Tuple
+
+from .constitution_structure import (
+    ConstitutionalElement,
+    ConstitutionProcessor,
+    StructureType
+)
+from .manifest import KeyPath, TreeDigest, encode_scalar, hash_array, hash_object
+
+logger = logging.getLogger(__name__)
+
+# Characters collected before they are handed to the file
+FLUSH_CHARS = 256 * 1024
+
+# Buffer of the output file itself
+FILE_BUFFER_BYTES = 1024 * 1024
+
+class JSONWriterError(Exception):
+    """Custom exception for JSON writer errors"""
+    pass
+
+class TreeJSONWriter:
+    """
+    Writes ConstitutionProcessor output without building get_result().
+
+    The tree is walked depth-first and emitted in chunks, so memory use
+    does not grow with the size of the law. The default pretty mode is
+    byte-identical to json.dump(get_result(), indent=2, sort_keys=True,
+    ensure_ascii=False); compact mode drops indentation and whitespace
+    like separators=(',', ':'). The file is written next to its
+    destination and renamed over it only once complete.
+
+    The bytes written are hashed as they are flushed, and the Merkle
+    hash and dispositivo counts of the document are built during the
+    same walk, so a manifest costs no second pass (see manifest.py).
+    """
+
+    def __init__(self, compact: bool = False):
+        """
+        Initialize the writer
+
+        Args:
+            compact: Write without indentation or spaces
+        """
+        self.compact = compact
+        self._key_separator = ':' if compact else ': '
+        self._indents: List[str] = []
+        self._parts: List[str] = []
+        self._pending = 0
+        self._size = 0
+        self._file: Optional[BinaryIO] = None
+        self._hash = hashlib.sha256()
+        self.bytes_written = 0
+        self.sha256 = ""
+        self.digest = TreeDigest()
+
+    def write(self, processor: ConstitutionProcessor, output_file: str) -> int:
+        """
+        Serialize a processed tree to a file atomically
+
+        Args:
+            processor: Processor holding the parsed constitution
+            output_file: Destination path
+
+        Returns:
+            int: Characters written
+
+        Raises:
+            JSONWriterError: If the file cannot be written
+        """
+        output_path = Path(output_file)
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        self._parts = []
+        self._pending = 0
+        self._size = 0
+        self._hash = hashlib.sha256()
+        self.bytes_written = 0
+        self.digest = TreeDigest()
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb", buffering=FILE_BUFFER_BYTES) as f:
+                self._file = f
+                self._write_result(processor)
+                self._flush()
+            os.replace(tmp_path, output_path)
+            self.sha256 = self._hash.hexdigest()
+        except OSError as e:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise JSONWriterError(f"Failed to write {output_file}: {e}") from e
+        finally:
+            self._file = None
+            self._parts = []
+
+        logger.debug(f"Streamed {self._size} characters to {output_file}")
+        return self._size
+
+    # Output plumbing
+
+    def _emit(self, text: str) -> None:
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= FLUSH_CHARS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._parts:
+            data = ''.join(self._parts).encode("utf-8")
+            self._hash.update(data)
+            self._file.write(data)
+            self.bytes_written += len(data)
+            self._size += self._pending
+            self._parts = []
+            self._pending = 0
+
+    def _newline(self, depth: int) -> str:
+        """Separator placed before a member at this depth"""
+        if self.compact:
+            return ''
+        while len(self._indents) <= depth:
+            self._indents.append('\n' + '  ' * len(self._indents))
+        return self._indents[depth]
+
+    # Tree traversal
+
+    def _write_result(self, processor: ConstitutionProcessor) -> None:
+        """Top-level object: preâmbulo, root children and ADCT"""
+        members = self._members(processor.root)
+        if not self._is_empty(processor.adct):
+            members["adct"] = processor.adct
+        self._write_members(members, 0, ())
+
+    def _members(self, element: ConstitutionalElement) -> Dict[str, Any]:
+        """
+        Non-empty members of an element, as ConstitutionalElement.to_dict()
+        would produce them (values are left unconverted)
+        """
+        members: Dict[str, Any] = {}
+        if element.content:
+            key = "preambulo" if element.type == StructureType.PREAMBULO else "conteudo"
+            members[key] = element.content
+
+        for key, value in element.children.items():
+            if isinstance(value, dict):
+                group = {
+                    number: child for number, child in value.items()
+                    if isinstance(child, ConstitutionalElement)
+                    and not self._is_empty(child)
+                }
+                if group:
+                    members[key] = group
+            elif isinstance(value, ConstitutionalElement) and not self._is_empty(value):
+                members[key] = value
+        return members
+
+    def _is_empty(self, element: ConstitutionalElement) -> bool:
+        """Whether element.to_dict() would be empty"""
+        if element.content:
+            return False
+        for value in element.children.values():
+            if isinstance(value, dict):
+                if any(
+                    isinstance(child, ConstitutionalElement) and not self._is_empty(child)
+                    for child in value.values()
+                ):
+                    return False
+            elif isinstance(value, ConstitutionalElement) and not self._is_empty(value):
+                return False
+        return True
+
+    def _write_members(self, members: Dict[str, Any], depth: int, path: KeyPath) -> bytes:
+        if not members:
+            self._emit('{}')
+            return self.digest.node(hash_object(()), path)
+        return self._write_object(sorted(members.items()), depth, path)
+
+    def _write_object(self, items: List[Tuple[str, Any]], depth: int, path: KeyPath) -> bytes:
+        inner = self._newline(depth + 1)
+        hashed = []
+        self._emit('{')
+        for position, (key, value) in enumerate(items):
+            self._emit((',' if position else '') + inner)
+            self._emit(encode_basestring(key) + self._key_separator)
+            hashed.append(
+                (key, self._write_value(value, depth + 1, self.digest.child_path(path, key)))
+            )
+        self._emit(self._newline(depth) + '}')
+        return self.digest.node(hash_object(hashed), path)
+
+    def _write_value(self, value: Any, depth: int, path: KeyPath) -> bytes:
+        """Write a value and return its encoding for the Merkle hash"""
+        if isinstance(value, ConstitutionalElement):
+            return self._write_members(self._members(value), depth, path)
+        if isinstance(value, dict):
+            classe = value.get("classe")
+            if isinstance(classe, str):
+                self.digest.count(classe)
+            if value:
+                return self._write_object(sorted(value.items()), depth, path)
+            self._emit('{}')
+            return self.digest.node(hash_object(()), path)
+        if isinstance(value, list):
+            return self._write_array(value, depth, path)
+        if isinstance(value, str):
+            self._emit(encode_basestring(value))
+        elif value is None:
+            self._emit('null')
+        elif value is True or value is False:
+            self._emit('true' if value else 'false')
+        elif isinstance(value, (int, float)):
+            self._emit(repr(value))
+        else:
+            raise JSONWriterError(
+                f"Object of type {type(value).__name__} is not JSON serializable"
+            )
+        return encode_scalar(value)
+
+    def _write_array(self, values: List[Any], depth: int, path: KeyPath) -> bytes:
+        if not values:
+            self._emit('[]')
+            return self.digest.node(hash_array(()), path)
+        inner = self._newline(depth + 1)
+        hashed = []
+        self._emit('[')
+        for position, value in enumerate(values):
+            self._emit((',' if position else '') + inner)
+            hashed.append(self._write_value(value, depth + 1, None))
+        self._emit(self._newline(depth) + ']')
+        return self.digest.node(hash_array(hashed), path)
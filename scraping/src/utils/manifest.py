@@ -0,0 +1,266 @@
+"""
+Sidecar manifests for verifying saved outputs without decoding them.
+Author: gabes-machado
+Created: 2026-10-17 03:34:18 UTC
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Appended to the output file name: constitution.json.manifest.json
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Bytes read per chunk while hashing a file
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Deepest key path whose subtree hash is listed (e.g. "titulos/II")
+SUBTREE_DEPTH = 2
+
+# Key path of a recorded subtree; None below SUBTREE_DEPTH
+KeyPath = Optional[Tuple[str, ...]]
+
+class ManifestError(Exception):
+    """Custom exception for manifest errors"""
+    pass
+
+def encode_scalar(value: Any) -> bytes:
+    """
+    Self-delimiting encoding of a JSON scalar, hashed inline by its parent
+
+    Raises:
+        ManifestError: If the value is not a JSON scalar
+    """
+    if value is None:
+        return b"n"
+    if value is True:
+        return b"t"
+    if value is False:
+        return b"f"
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return b"s" + len(data).to_bytes(8, "big") + data
+    if isinstance(value, (int, float)):
+        data = repr(value).encode("ascii")
+        return b"d" + len(data).to_bytes(8, "big") + data
+    raise ManifestError(f"Cannot hash value of type {type(value).__name__}")
+
+def encode_child(digest: bytes) -> bytes:
+    """Encoding of an object or array, by its Merkle hash"""
+    return b"h" + digest
+
+def hash_array(encoded: Iterable[bytes]) -> bytes:
+    """Merkle hash of an array from the encodings of its items"""
+    return hashlib.sha256(b"a" + b"".join(encoded)).digest()
+
+def hash_object(members: Iterable[Tuple[str, bytes]]) -> bytes:
+    """Merkle hash of an object from its (key, encoding) pairs sorted by key"""
+    digest = hashlib.sha256(b"o")
+    for key, encoded in members:
+        data = key.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+        digest.update(encoded)
+    return digest.digest()
+
+class TreeDigest:
+    """
+    Merkle hash of a JSON document and counts of its dispositivos.
+
+    Objects and arrays are hashed from the hashes of their members, so
+    the root hash does not depend on the format the document was saved
+    in, and the subtree hashes of two runs show which títulos changed.
+    Every object with a string "classe" is counted as one dispositivo.
+    """
+
+    def __init__(self):
+        self.root: Optional[bytes] = None
+        self.counts: Dict[str, int] = {}
+        self.subtrees: Dict[str, str] = {}
+
+    @staticmethod
+    def child_path(path: KeyPath, key: str) -> KeyPath:
+        """Path of a member, or None below the depth that is recorded"""
+        if path is None or len(path) >= SUBTREE_DEPTH:
+            return None
+        return path + (key,)
+
+    def count(self, classe: str) -> None:
+        self.counts[classe] = self.counts.get(classe, 0) + 1
+
+    def node(self, digest: bytes, path: KeyPath) -> bytes:
+        """Record the hash of the object or array at path and encode it"""
+        if path is not None:
+            if path:
+                self.subtrees["/".join(path)] = digest.hex()
+            else:
+                self.root = digest
+        return encode_child(digest)
+
+    def digest(self, value: Any, path: KeyPath = ()) -> bytes:
+        """
+        Hash a decoded document (or part of it)
+
+        Args:
+            value: JSON value
+            path: Key path of the value, () for the document itself
+
+        Returns:
+            bytes: Encoding of the value within its parent
+        """
+        if isinstance(value, dict):
+            classe = value.get("classe")
+            if isinstance(classe, str):
+                self.count(classe)
+            members = [
+                (key, self.digest(value[key], self.child_path(path, key)))
+                for key in sorted(value)
+            ]
+            return self.node(hash_object(members), path)
+        if isinstance(value, list):
+            return self.node(hash_array([self.digest(item, None) for item in value]), path)
+        return encode_scalar(value)
+
+    @property
+    def root_hex(self) -> str:
+        if self.root is None:
+            raise ManifestError("The document has not been hashed")
+        return self.root.hex()
+
+def manifest_path(output_file: str) -> Path:
+    """Sidecar manifest of an output file"""
+    output_path = Path(output_file)
+    return output_path.with_name(output_path.name + MANIFEST_SUFFIX)
+
+def build_manifest(
+    output_file: str,
+    output_format: str,
+    size: int,
+    sha256: str,
+    digest: TreeDigest
+) -> Dict[str, Any]:
+    """
+    Describe a written output
+
+    Args:
+        output_file: Path of the output
+        output_format: Format it was written in
+        size: Bytes written
+        sha256: Hex SHA-256 of those bytes
+        digest: Merkle hash and counts of the document
+
+    Returns:
+        Dict[str, Any]: The manifest
+    """
+    return {
+        "version": MANIFEST_VERSION,
+        "file": Path(output_file).name,
+        "format": output_format,
+        "bytes": size,
+        "sha256": sha256,
+        "merkle_root": digest.root_hex,
+        "counts": dict(sorted(digest.counts.items())),
+        "subtrees": dict(sorted(digest.subtrees.items()))
+    }
+
+def write_manifest(output_file: str, manifest: Dict[str, Any]) -> Path:
+    """
+    Save the manifest next to its output, atomically
+
+    Raises:
+        ManifestError: If the manifest cannot be written
+    """
+    path = manifest_path(output_file)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise ManifestError(f"Failed to write {path}: {e}") from e
+    logger.debug(f"Wrote manifest {path}")
+    return path
+
+def read_manifest(output_file: str) -> Dict[str, Any]:
+    """
+    Load the manifest of an output
+
+    Raises:
+        ManifestError: If it is missing, unreadable or of another version
+    """
+    path = manifest_path(output_file)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ManifestError(f"Cannot read {path}: {e}") from e
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        raise ManifestError(f"Unsupported manifest {path}")
+    return manifest
+
+def hash_file(file_path: str) -> Tuple[int, str]:
+    """
+    Size and hex SHA-256 of a file, read sequentially in chunks
+
+    Raises:
+        ManifestError: If the file cannot be read
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = f.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+    except OSError as e:
+        raise ManifestError(f"Cannot read {file_path}: {e}") from e
+    return size, digest.hexdigest()
+
+def verify_file(output_file: str, output_format: Optional[str] = None) -> bool:
+    """
+    Check an output against its manifest without decoding it
+
+    Args:
+        output_file: Path of the output
+        output_format: Expected format (not checked if None)
+
+    Returns:
+        bool: True if the bytes are those the manifest describes
+
+    Raises:
+        ManifestError: If the manifest or the file cannot be read
+    """
+    manifest = read_manifest(output_file)
+    if output_format is not None and manifest.get("format") != output_format:
+        logger.error(
+            f"{output_file} was written as {manifest.get('format')}, not {output_format}"
+        )
+        return False
+
+    # A size mismatch is caught without reading the file
+    try:
+        size = Path(output_file).stat().st_size
+    except OSError as e:
+        raise ManifestError(f"Cannot read {output_file}: {e}") from e
+    if size != manifest.get("bytes"):
+        logger.error(f"{output_file} has {size} bytes, manifest says {manifest.get('bytes')}")
+        return False
+    size, sha256 = hash_file(output_file)
+    if sha256 != manifest.get("sha256"):
+        logger.error(f"SHA-256 of {output_file} does not match its manifest")
+        return False
+    return True
@@ -0,0 +1,172 @@
+"""
+Local stand-in for the Planalto website serving a fixture archive.
+Author: gabes-machado
+Created: 2026-10-16 21:52:40 UTC
+"""
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+
+from aiohttp import web
+from yarl import URL
+
+from .http_fixtures import FixtureArchive, RecordedResponse
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class MockServerConfig:
+    """Fault injection settings for the mock server"""
+    latency: Tuple[float, float] = (0.0, 0.0)  # Uniform delay range in seconds
+    error_rate: float = 0.0  # Probability of answering 503
+    burst_every: int = 0  # Start a 429 burst every N requests (0 disables)
+    burst_length: int = 0  # Number of consecutive 429 answers per burst
+    retry_after: Optional[int] = 1  # Retry-After sent with 429/503
+    seed: Optional[int] = None  # Seed making faults reproducible
+    compress: bool = True  # Honour Accept-Encoding like the real site
+
+class MockPlanaltoServer:
+    """
+    aiohttp server replaying a fixture archive with configurable faults.
+
+    Recorded URLs are matched by path and query string, so an archive
+    recorded against planalto.gov.br can be served from localhost. Bodies
+    are served with an ETag (their SHA-256) and honour If-None-Match, so
+    the response cache can be exercised as well.
+    """
+
+    def __init__(
+        self,
+        archive: FixtureArchive,
+        config: Optional[MockServerConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Initialize the mock server
+
+        Args:
+            archive: Fixture archive to serve
+            config: Fault injection settings
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.archive = archive
+        self.config = config or MockServerConfig()
+        self.host = host
+        self.port = port
+        self._routes: Dict[str, RecordedResponse] = {
+            self._route_key(URL(entry.url)): entry for entry in archive
+        }
+        self._random = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._burst_remaining = 0
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "served": 0,
+            "not_modified": 0,
+            "errors": 0,
+            "throttled": 0,
+            "not_found": 0
+        }
+
+    @staticmethod
+    def _route_key(url: URL) -> str:
+        return url.path_qs
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to hand to the scraper"""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start serving"""
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the actual port when 0 was requested
+        self.port = self._runner.addresses[0][1]
+        logger.info(
+            f"Mock Planalto server listening on {self.base_url} "
+            f"({len(self._routes)} documents)"
+        )
+
+    async def stop(self) -> None:
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockPlanaltoServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    def _throttled(self) -> bool:
+        """Advance the 429 burst schedule for one request"""
+        if self._burst_remaining > 0:
+            self._burst_remaining -= 1
+            return True
+        if (self.config.burst_every and self.config.burst_length
+                and self.stats["requests"] % self.config.burst_every == 0):
+            self._burst_remaining = self.config.burst_length - 1
+            return True
+        return False
+
+    def _retry_headers(self) -> Dict[str, str]:
+        if self.config.retry_after is None:
+            return {}
+        return {"Retry-After": str(self.config.retry_after)}
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+
+        low, high = self.config.latency
+        if high > 0:
+            await asyncio.sleep(self._random.uniform(low, high))
+
+        if self._throttled():
+            self.stats["throttled"] += 1
+            return web.Response(status=429, headers=self._retry_headers())
+
+        if self._random.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return web.Response(status=503, headers=self._retry_headers())
+
+        entry = self._routes.get(self._route_key(request.rel_url))
+        if entry is None:
+            self.stats["not_found"] += 1
+            return web.Response(status=404)
+
+        etag = f'"{entry.body_sha256}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        headers = dict(entry.headers)
+        headers["ETag"] = etag
+        if "Content-Type" not in headers:
+            charset = f"; charset={entry.charset}" if entry.charset else ""
+            headers["Content-Type"] = f"text/html{charset}"
+
+        self.stats["served"] += 1
+        response = web.Response(
+            status=entry.status,
+            body=self.archive.load_body(entry),
+            headers=headers
+        )
+        if self.config.compress:
+            response.enable_compression()
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get a copy of the request statistics"""
+        return dict(self.stats)
@@ -0,0 +1,154 @@
+"""
+JSON Lines export of every dispositivo with its hierarchical path.
+Author: gabes-machado
+Created: 2026-10-17 02:21:50 UTC
+Updated: 2026-10-17 02:38:27 UTC
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, TextIO
+
+from .constitution_structure import ElementSink, PlacedElement
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is always available
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Buffer of the output file
+FILE_BUFFER_BYTES = 1024 * 1024
+
+class NDJSONExportError(Exception):
+    """Custom exception for NDJSON export errors"""
+    pass
+
+def element_record(element: PlacedElement) -> Dict[str, Any]:
+    """
+    Flat record of one dispositivo
+
+    ``caminho`` maps each level from the título down to the element to its
+    number, and ``chave`` is the element's key path in constitution.json
+    (e.g. "titulos/II/capitulos/I/artigos/5").
+
+    Args:
+        element: Element handed to the sink
+
+    Returns:
+        Dict[str, Any]: JSON-serializable record
+    """
+    return {
+        "ordinal": element.ordinal,
+        "classe": element.type.value.lower(),
+        "numero": element.number,
+        "titulo": element.title,
+        "texto": element.text,
+        "pai": element.parent,
+        "caminho": {
+            element_type.value.lower(): number for element_type, number in element.path
+        },
+        "chave": element.key
+    }
+
+class NDJSONExporter(ElementSink):
+    """
+    Writes one JSON object per line as ConstitutionProcessor places
+    elements, so memory use is independent of the law's size. The file
+    is written next to its destination and renamed over it on close().
+    """
+
+    def __init__(self, output_file: str):
+        """
+        Initialize the exporter
+
+        Args:
+            output_file: Destination .jsonl/.ndjson path
+
+        Raises:
+            NDJSONExportError: If the file cannot be created
+        """
+        self.output_path = Path(output_file)
+        self.tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self.records = 0
+        try:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file: Optional[TextIO] = open(
+                self.tmp_path, "w", encoding="utf-8", buffering=FILE_BUFFER_BYTES
+            )
+        except OSError as e:
+            raise NDJSONExportError(f"Cannot create {output_file}: {e}") from e
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        if orjson is not None:
+            return orjson.dumps(record).decode("utf-8")
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+    def write(self, element: PlacedElement) -> None:
+        """
+        Append the element's record
+
+        Raises:
+            NDJSONExportError: If writing fails
+        """
+        try:
+            self._file.write(self._encode(element_record(element)) + "\n")
+        except (OSError, ValueError) as e:
+            raise NDJSONExportError(f"Failed to write {self.output_path}: {e}") from e
+        self.records += 1
+
+    def close(self) -> None:
+        """
+        Publish the file
+
+        Raises:
+            NDJSONExportError: If the file cannot be completed
+        """
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            self._file = None
+            os.replace(self.tmp_path, self.output_path)
+        except OSError as e:
+            self.abort()
+            raise NDJSONExportError(f"Failed to complete {self.output_path}: {e}") from e
+        logger.info(f"Exported {self.records} records to {self.output_path}")
+
+    def abort(self) -> None:
+        """Discard the partial file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+def read_records(input_file: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate the records of an NDJSON export one line at a time
+
+    Args:
+        input_file: File written by NDJSONExporter
+
+    Yields:
+        Dict[str, Any]: One record per dispositivo
+
+    Raises:
+        NDJSONExportError: If a line is not valid JSON
+    """
+    with open(input_file, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise NDJSONExportError(
+                    f"Invalid record at {input_file}:{line_number}: {e}"
+                ) from e
@@ -0,0 +1,153 @@
+"""
+Registry of serialization formats for the scraped constitution.
+Author: gabes-machado
+Created: 2026-10-17 02:03:38 UTC
+"""
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Type
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is always available
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack output is optional
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # CBOR output is optional
+    cbor2 = None
+
+logger = logging.getLogger(__name__)
+
+class OutputFormatError(Exception):
+    """Custom exception for output format errors"""
+    pass
+
+class OutputFormat(ABC):
+    """Encoder/decoder pair for one file format"""
+
+    name: str = ""
+    suffix: str = ""
+    # Name of the module-level import backing the format
+    library: str = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the library behind the format is installed"""
+        return globals().get(cls.library) is not None
+
+    @abstractmethod
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        """Encode the constitution dictionary"""
+
+    @abstractmethod
+    def loads(self, content: bytes) -> Dict[str, Any]:
+        """Decode a file written by dumps()"""
+
+class StdlibJSONFormat(OutputFormat):
+    """Indented, key-sorted JSON from the standard library (the default)"""
+
+    name = "json"
+    suffix = ".json"
+    library = "json"
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8")
+
+    def loads(self, content: bytes) -> Dict[str, Any]:
+        return json.loads(content)
+
+class ORJSONFormat(OutputFormat):
+    """Compact, key-sorted JSON encoded by orjson"""
+
+    name = "orjson"
+    suffix = ".json"
+    library = "orjson"
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+    def loads(self, content: bytes) -> Dict[str, Any]:
+        return orjson.loads(content)
+
+class MessagePackFormat(OutputFormat):
+    """MessagePack binary encoding"""
+
+    name = "msgpack"
+    suffix = ".msgpack"
+    library = "msgpack"
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, content: bytes) -> Dict[str, Any]:
+        return msgpack.unpackb(content, raw=False)
+
+class CBORFormat(OutputFormat):
+    """CBOR (RFC 8949) binary encoding"""
+
+    name = "cbor"
+    suffix = ".cbor"
+    library = "cbor2"
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return cbor2.dumps(data)
+
+    def loads(self, content: bytes) -> Dict[str, Any]:
+        return cbor2.loads(content)
+
+FORMATS: Dict[str, Type[OutputFormat]] = {
+    StdlibJSONFormat.name: StdlibJSONFormat,
+    ORJSONFormat.name: ORJSONFormat,
+    MessagePackFormat.name: MessagePackFormat,
+    CBORFormat.name: CBORFormat,
+}
+
+def available_formats() -> List[str]:
+    """Names of the formats usable in this environment"""
+    return [name for name, output_format in FORMATS.items() if output_format.available()]
+
+def get_format(name: str = "json") -> OutputFormat:
+    """
+    Resolve an output format by name
+
+    Args:
+        name: "json", "orjson", "msgpack" or "cbor"
+
+    Returns:
+        OutputFormat: An instance of the format
+
+    Raises:
+        OutputFormatError: If the format is unknown or its library is missing
+    """
+    if name not in FORMATS:
+        raise OutputFormatError(
+            f"Unknown output format '{name}' (available: {', '.join(FORMATS)})"
+        )
+    if not FORMATS[name].available():
+        raise OutputFormatError(f"Output format '{name}' is not installed")
+    return FORMATS[name]()
+
+def format_for_path(path: str) -> OutputFormat:
+    """
+    Guess the format of a file from its suffix (JSON for unknown suffixes)
+
+    Args:
+        path: File written by one of the formats
+
+    Returns:
+        OutputFormat: Format able to decode the file
+    """
+    suffix = Path(path).suffix.lower()
+    for name in (MessagePackFormat.name, CBORFormat.name):
+        if FORMATS[name].suffix == suffix:
+            return get_format(name)
+    return get_format(ORJSONFormat.name if orjson is not None else StdlibJSONFormat.name)
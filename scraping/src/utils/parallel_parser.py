@@ -0,0 +1,230 @@
+"""
+Multi-process parsing of large law documents split at structural boundaries.
+Author: gabes-machado
+Created: 2026-10-17 00:12:38 UTC
+"""
+
+import asyncio
+import html
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from .encoding import decode_html, sniff_charset
+from .html_parser import HTMLParser, ElementType
+
+logger = logging.getLogger(__name__)
+
+Element = Tuple[str, Optional[str], Optional[str], str]
+
+# Headings starting an independent part of a law: títulos and, in codes
+# such as the Código Civil, livros
+BOUNDARY = re.compile(r'\s*(?:TÍTULO|LIVRO)\b', re.IGNORECASE)
+
+# Segments smaller than this are not worth a process round trip
+MIN_SEGMENT_CHARS = 64 * 1024
+
+# Start/end tags and comments, enough to track which elements are open
+_TOKEN = re.compile(r'<!--.*?-->|<(/?)([a-zA-Z][^\s/>]*)[^>]*>', re.DOTALL)
+_TAG = re.compile(r'<[^>]*>')
+
+# Elements that never hold content and so are never left open
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+})
+
+# Elements that may be open at a cut; anything else (an unclosed <p>, a
+# <strike> or <font> around several paragraphs, a <div>) would be split
+# between two segments and parse differently from the whole document
+_TOP_LEVEL_TAGS = frozenset({'html', 'body'})
+
+# Characters of a paragraph inspected to recognise a boundary heading
+_PREFIX_CHARS = 512
+
+class ParallelParserError(Exception):
+    """Custom exception for parallel parsing errors"""
+    pass
+
+def _is_boundary_heading(text: str, p_end: int) -> bool:
+    """Whether the paragraph whose start tag ends at p_end is a título/livro"""
+    prefix = text[p_end:p_end + _PREFIX_CHARS]
+    end = prefix.lower().find('</p')
+    if end != -1:
+        prefix = prefix[:end]
+    return BOUNDARY.match(html.unescape(_TAG.sub('', prefix))) is not None
+
+def split_segments(
+    text: str,
+    min_segment_chars: int = MIN_SEGMENT_CHARS
+) -> List[str]:
+    """
+    Split a decoded document before the <p> of each top-level título/livro
+    heading
+
+    A heading is only a boundary when nothing but <html> and <body> is
+    open before it, which a single scan of the tags tracks the way
+    html.parser nests them. A document with no such heading (for example
+    one whose paragraphs are never closed) stays in one segment and is
+    parsed serially.
+
+    Args:
+        text: Decoded HTML document
+        min_segment_chars: Boundaries closer than this to the previous one
+            are skipped, so segments stay large enough to pay off
+
+    Returns:
+        List[str]: Consecutive segments covering the whole document
+    """
+    boundaries = [0]
+    open_tags: List[str] = []
+    for match in _TOKEN.finditer(text):
+        closing, name = match.group(1), match.group(2)
+        if name is None:
+            continue
+        name = name.lower()
+        if closing:
+            # Like html.parser, an end tag closes its innermost open
+            # element and everything opened inside it; stray ones are ignored
+            if name in open_tags:
+                del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name):]
+            continue
+
+        if (
+            name == 'p'
+            and match.start() - boundaries[-1] >= min_segment_chars
+            and _TOP_LEVEL_TAGS.issuperset(open_tags)
+            and _is_boundary_heading(text, match.end())
+        ):
+            boundaries.append(match.start())
+        if name not in VOID_TAGS and not match.group(0).endswith('/>'):
+            open_tags.append(name)
+
+    boundaries.append(len(text))
+    return [text[start:end] for start, end in zip(boundaries, boundaries[1:])]
+
+def parse_segment(segment: str, engine: str = "bs4") -> List[Element]:
+    """
+    Parse one segment in a worker process
+
+    Args:
+        segment: Part of the decoded document
+        engine: Tree backend used by HTMLParser
+
+    Returns:
+        List[Element]: The segment's (element_type, number, title, text)
+    """
+    parser = HTMLParser(segment, engine=engine, fragment=True)
+    parser.remove_strike_tags()
+    return list(parser.iter_constitutional_elements())
+
+def merge_segments(results: List[List[Element]]) -> List[Element]:
+    """
+    Concatenate per-segment elements in document order
+
+    Every segment looks for a preâmbulo of its own; only the first one
+    found is kept, as the single-document parse would yield.
+
+    Args:
+        results: Elements of each segment, in segment order
+
+    Returns:
+        List[Element]: Elements of the whole document
+    """
+    preambulo: Optional[Element] = None
+    merged: List[Element] = []
+    for elements in results:
+        for element in elements:
+            if element[0] == ElementType.PREAMBULO.value:
+                if preambulo is None:
+                    preambulo = element
+                continue
+            merged.append(element)
+    return ([preambulo] if preambulo else []) + merged
+
+def _prepare(
+    content: bytes,
+    charset: Optional[str],
+    min_segment_chars: int
+) -> List[str]:
+    text, charset = decode_html(content, charset or sniff_charset(content))
+    segments = split_segments(text, min_segment_chars)
+    logger.info(
+        f"Split {len(text)} characters into {len(segments)} segments "
+        f"(charset={charset})"
+    )
+    return segments
+
+def parse_parallel(
+    content: bytes,
+    charset: Optional[str] = None,
+    engine: str = "bs4",
+    workers: Optional[int] = None,
+    min_segment_chars: int = MIN_SEGMENT_CHARS
+) -> List[Element]:
+    """
+    Parse a document across processes, one segment per título/livro
+
+    Args:
+        content: Raw document bytes
+        charset: Charset sniffed for the bytes
+        engine: Tree backend used in the workers
+        workers: Number of processes (defaults to the CPU count)
+        min_segment_chars: Minimum segment size in characters
+
+    Returns:
+        List[Element]: Elements of the whole document, in document order
+
+    Raises:
+        ParallelParserError: If a worker fails
+    """
+    segments = _prepare(content, charset, min_segment_chars)
+    if len(segments) == 1 or workers == 1:
+        return merge_segments([parse_segment(segment, engine) for segment in segments])
+
+    try:
+        with ProcessPoolExecutor(max_workers=_pool_size(workers, segments)) as pool:
+            results = list(pool.map(parse_segment, segments, [engine] * len(segments)))
+    except Exception as e:
+        raise ParallelParserError(f"Parallel parsing failed: {e}") from e
+    return merge_segments(results)
+
+async def parse_parallel_async(
+    content: bytes,
+    charset: Optional[str] = None,
+    engine: str = "bs4",
+    workers: Optional[int] = None,
+    min_segment_chars: int = MIN_SEGMENT_CHARS
+) -> List[Element]:
+    """
+    Same as parse_parallel, without blocking the event loop
+
+    Raises:
+        ParallelParserError: If a worker fails
+    """
+    loop = asyncio.get_running_loop()
+    segments = await loop.run_in_executor(
+        None, _prepare, content, charset, min_segment_chars
+    )
+    if len(segments) == 1 or workers == 1:
+        results = await loop.run_in_executor(
+            None, lambda: [parse_segment(segment, engine) for segment in segments]
+        )
+        return merge_segments(results)
+
+    pool = ProcessPoolExecutor(max_workers=_pool_size(workers, segments))
+    try:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, parse_segment, segment, engine)
+            for segment in segments
+        ))
+    except Exception as e:
+        raise ParallelParserError(f"Parallel parsing failed: {e}") from e
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return merge_segments(results)
+
+def _pool_size(workers: Optional[int], segments: List[str]) -> int:
+    return max(1, min(workers or os.cpu_count() or 1, len(segments)))
@@ -0,0 +1,269 @@
+"""
+Columnar Parquet export of the flattened dispositivo table.
+Author: gabes-machado
+Created: 2026-10-17 02:57:09 UTC
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from .constitution_structure import ElementSink, PlacedElement
+from .json_handler import HierarchyConfig
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar export is optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+HIERARCHY_COLUMNS = HierarchyConfig.get_columns()
+
+# Parquet codec; zstd gives near-gzip ratios at snappy-like speed
+COMPRESSION = "zstd"
+
+# Rows per row group written by ParquetExporter
+ROW_GROUP_ROWS = 64 * 1024
+
+# PyArrow filter expression in disjunctive normal form, e.g.
+# [("titulo", "==", "II"), ("classe", "==", "inciso")]
+Filters = List[Union[Tuple[str, str, Any], List[Tuple[str, str, Any]]]]
+
+class ParquetExportError(Exception):
+    """Custom exception for Parquet export errors"""
+    pass
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ParquetExportError("pyarrow is not installed")
+
+def _dictionary(values: Sequence[Optional[str]]) -> 'pa.DictionaryArray':
+    return pa.array(values, type=pa.string()).dictionary_encode()
+
+def dataframe_to_table(df: pd.DataFrame) -> 'pa.Table':
+    """
+    Convert a ConstitutionTransformer DataFrame to an Arrow table
+
+    The titulo…alinea columns repeat a handful of values over many rows,
+    so they are dictionary-encoded.
+
+    Args:
+        df: DataFrame with texto and the hierarchy columns
+
+    Returns:
+        pa.Table: Arrow table with dictionary-encoded hierarchy columns
+
+    Raises:
+        ParquetExportError: If pyarrow is missing or columns are absent
+    """
+    _require_pyarrow()
+    missing = set(HIERARCHY_COLUMNS + ["texto"]) - set(df.columns)
+    if missing:
+        raise ParquetExportError(f"Missing required columns: {', '.join(sorted(missing))}")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for column in HIERARCHY_COLUMNS:
+        index = table.schema.get_field_index(column)
+        values = table.column(column)
+        if not pa.types.is_string(values.type) and not pa.types.is_large_string(values.type):
+            values = values.cast(pa.string())
+        table = table.set_column(index, column, values.dictionary_encode())
+    return table
+
+def write_table(table: 'pa.Table', output_file: str) -> None:
+    """
+    Write an Arrow table as zstd-compressed Parquet, atomically
+
+    Args:
+        table: Table to write
+        output_file: Destination .parquet path
+
+    Raises:
+        ParquetExportError: If pyarrow is missing or writing fails
+    """
+    _require_pyarrow()
+    output_path = Path(output_file)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, output_path)
+    except (OSError, pa.ArrowException) as e:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise ParquetExportError(f"Failed to write {output_file}: {e}") from e
+    logger.info(f"Exported {table.num_rows} rows to {output_file}")
+
+def write_dataframe(df: pd.DataFrame, output_file: str) -> None:
+    """
+    Persist a ConstitutionTransformer DataFrame as Parquet
+
+    Args:
+        df: DataFrame with texto and the hierarchy columns
+        output_file: Destination .parquet path
+
+    Raises:
+        ParquetExportError: If the conversion or writing fails
+    """
+    write_table(dataframe_to_table(df), output_file)
+
+def read_dispositivos(
+    source: str,
+    filters: Optional[Filters] = None,
+    columns: Optional[List[str]] = None
+) -> 'pa.Table':
+    """
+    Read one export, or a directory of exports of many laws
+
+    Filters are pushed down to the Parquet reader, so row groups whose
+    statistics exclude them are skipped, e.g.
+    ``read_dispositivos("laws/", [("titulo", "==", "II"), ("classe", "==", "inciso")])``.
+
+    Args:
+        source: .parquet file or directory of them
+        filters: Row predicates in PyArrow's filter format
+        columns: Columns to load (all when None)
+
+    Returns:
+        pa.Table: Matching rows
+
+    Raises:
+        ParquetExportError: If pyarrow is missing or reading fails
+    """
+    _require_pyarrow()
+    try:
+        return pq.read_table(source, filters=filters, columns=columns)
+    except (OSError, pa.ArrowException) as e:
+        raise ParquetExportError(f"Failed to read {source}: {e}") from e
+
+class ParquetExporter(ElementSink):
+    """
+    Writes one row per dispositivo, in row groups, as ConstitutionProcessor
+    places elements.
+
+    Besides the titulo…alinea hierarchy (the number of each enclosing
+    level, all dictionary-encoded) each row has the document it came
+    from, its position, classe, numero, rubrica (title) and texto.
+    """
+
+    def __init__(
+        self,
+        output_file: str,
+        document: Optional[str] = None,
+        row_group_rows: int = ROW_GROUP_ROWS
+    ):
+        """
+        Initialize the exporter
+
+        Args:
+            output_file: Destination .parquet path
+            document: Identifier of the law (e.g. its URL), stored per row
+                so exports of many laws can be scanned together
+            row_group_rows: Rows buffered before each row group is written
+
+        Raises:
+            ParquetExportError: If pyarrow is missing or the file cannot
+                be created
+        """
+        _require_pyarrow()
+        self.output_path = Path(output_file)
+        self.tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self.document = document
+        self.row_group_rows = row_group_rows
+        self.rows = 0
+        self.schema = pa.schema(
+            [
+                ("documento", pa.dictionary(pa.int32(), pa.string())),
+                ("ordinal", pa.int32()),
+                ("classe", pa.dictionary(pa.int32(), pa.string())),
+                ("numero", pa.string()),
+            ]
+            + [(column, pa.dictionary(pa.int32(), pa.string())) for column in HIERARCHY_COLUMNS]
+            + [
+                ("rubrica", pa.string()),
+                ("texto", pa.string()),
+            ]
+        )
+        self._columns: Dict[str, List[Any]] = {name: [] for name in self.schema.names}
+        try:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer: Optional['pq.ParquetWriter'] = pq.ParquetWriter(
+                self.tmp_path, self.schema, compression=COMPRESSION
+            )
+        except (OSError, pa.ArrowException) as e:
+            raise ParquetExportError(f"Cannot create {output_file}: {e}") from e
+
+    def write(self, element: PlacedElement) -> None:
+        """
+        Buffer the element's row
+
+        Raises:
+            ParquetExportError: If a row group cannot be written
+        """
+        levels = {element_type.value.lower(): number for element_type, number in element.path}
+        columns = self._columns
+        columns["documento"].append(self.document)
+        columns["ordinal"].append(element.ordinal)
+        columns["classe"].append(element.type.value.lower())
+        columns["numero"].append(element.number)
+        for column in HIERARCHY_COLUMNS:
+            columns[column].append(levels.get(column))
+        columns["rubrica"].append(element.title)
+        columns["texto"].append(element.text)
+        if len(columns["ordinal"]) >= self.row_group_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._columns["ordinal"]:
+            return
+        arrays = [
+            _dictionary(values) if pa.types.is_dictionary(field.type)
+            else pa.array(values, type=field.type)
+            for field, values in zip(self.schema, self._columns.values())
+        ]
+        try:
+            self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        except (OSError, pa.ArrowException) as e:
+            raise ParquetExportError(f"Failed to write {self.output_path}: {e}") from e
+        self.rows += len(self._columns["ordinal"])
+        self._columns = {name: [] for name in self.schema.names}
+
+    def close(self) -> None:
+        """
+        Write the last row group and publish the file
+
+        Raises:
+            ParquetExportError: If the file cannot be completed
+        """
+        if self._writer is None:
+            return
+        try:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+            os.replace(self.tmp_path, self.output_path)
+        except (OSError, pa.ArrowException, ParquetExportError) as e:
+            self.abort()
+            raise ParquetExportError(f"Failed to complete {self.output_path}: {e}") from e
+        logger.info(f"Exported {self.rows} rows to {self.output_path}")
+
+    def abort(self) -> None:
+        """Discard the partial file"""
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except (OSError, pa.ArrowException):
+                pass
+            self._writer = None
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,181 @@
+"""
+Interchangeable HTML tree backends used by HTMLParser.
+Author: gabes-machado
+Created: 2026-10-16 23:02:14 UTC
+Updated: 2026-10-17 00:52:16 UTC
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Type
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional, BeautifulSoup is always available
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+class ParserBackendError(Exception):
+    """Custom exception for parser backend errors"""
+    pass
+
+class ParserBackend(ABC):
+    """
+    Minimal tree API HTMLParser needs from an HTML engine.
+
+    Nodes are opaque to HTMLParser; it only passes them back to the
+    backend, so each engine can use its native element type.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def __init__(self, html_content: str):
+        """Parse the decoded document"""
+
+    @abstractmethod
+    def has_elements(self) -> bool:
+        """Whether the document contains at least one element"""
+
+    @abstractmethod
+    def has_tag(self, tag: str) -> bool:
+        """Whether the document contains a given tag"""
+
+    @abstractmethod
+    def remove_tags(self, tag: str) -> int:
+        """Remove all elements of a tag (keeping the text that follows them)"""
+
+    @abstractmethod
+    def find_font(self, face: str) -> Optional[Any]:
+        """First <font> element with the given face attribute"""
+
+    @abstractmethod
+    def paragraphs(self) -> List[Any]:
+        """All <p> elements in document order"""
+
+    @abstractmethod
+    def text(self, node: Any) -> str:
+        """Concatenated text of a node and its descendants"""
+
+    @abstractmethod
+    def parent(self, node: Any) -> Any:
+        """Parent element of a node"""
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with the pure-Python html.parser tree builder"""
+
+    name = "bs4"
+
+    def __init__(self, html_content: str):
+        self.soup = BeautifulSoup(html_content, 'html.parser')
+
+    def has_elements(self) -> bool:
+        return self.soup.find() is not None
+
+    def has_tag(self, tag: str) -> bool:
+        return self.soup.find(tag) is not None
+
+    def remove_tags(self, tag: str) -> int:
+        elements = self.soup.find_all(tag)
+        for element in elements:
+            element.decompose()
+        return len(elements)
+
+    def find_font(self, face: str) -> Optional[Any]:
+        return self.soup.find('font', face=face)
+
+    def paragraphs(self) -> List[Any]:
+        return self.soup.find_all('p')
+
+    def text(self, node: Any) -> str:
+        return node.get_text()
+
+    def parent(self, node: Any) -> Any:
+        return node.parent
+
+class LxmlBackend(ParserBackend):
+    """
+    libxml2 HTML parser through lxml.html
+
+    libxml2 closes an open <p> when the next one starts, while html.parser
+    nests unclosed paragraphs. On such malformed markup this backend yields
+    one element per paragraph where bs4 yields the concatenated texts, so it
+    is opt-in rather than the default.
+    """
+
+    name = "lxml"
+
+    def __init__(self, html_content: str):
+        if lxml is None:
+            raise ParserBackendError("lxml is not installed")
+        try:
+            self.root = lxml.html.document_fromstring(html_content)
+        except ValueError:
+            # lxml refuses str input carrying an XML encoding declaration
+            self.root = lxml.html.document_fromstring(
+                html_content.encode('utf-8'),
+                parser=lxml.html.HTMLParser(encoding='utf-8')
+            )
+
+    def has_elements(self) -> bool:
+        return len(self.root) > 0
+
+    def has_tag(self, tag: str) -> bool:
+        return next(self.root.iter(tag), None) is not None
+
+    def remove_tags(self, tag: str) -> int:
+        elements = list(self.root.iter(tag))
+        for element in elements:
+            element.drop_tree()
+        return len(elements)
+
+    def find_font(self, face: str) -> Optional[Any]:
+        for element in self.root.iter('font'):
+            if element.get('face') == face:
+                return element
+        return None
+
+    def paragraphs(self) -> List[Any]:
+        return list(self.root.iter('p'))
+
+    def text(self, node: Any) -> str:
+        return node.text_content()
+
+    def parent(self, node: Any) -> Any:
+        return node.getparent()
+
+BACKENDS: Dict[str, Type[ParserBackend]] = {
+    SoupBackend.name: SoupBackend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+def available_backends() -> List[str]:
+    """Names of the backends usable in this environment"""
+    return [name for name in BACKENDS if name != LxmlBackend.name or lxml is not None]
+
+def get_backend(name: str = "auto") -> Type[ParserBackend]:
+    """
+    Resolve a backend class by name
+
+    Args:
+        name: "bs4", "lxml" or "auto" (lxml when installed, else bs4;
+            see LxmlBackend for where the two differ)
+
+    Returns:
+        Type[ParserBackend]: The backend class
+
+    Raises:
+        ParserBackendError: If the backend is unknown or unavailable
+    """
+    if name == "auto":
+        name = LxmlBackend.name if lxml is not None else SoupBackend.name
+    if name not in BACKENDS:
+        raise ParserBackendError(
+            f"Unknown parser backend '{name}' (available: {', '.join(BACKENDS)})"
+        )
+    if name not in available_backends():
+        raise ParserBackendError(f"Parser backend '{name}' is not installed")
+    return BACKENDS[name]
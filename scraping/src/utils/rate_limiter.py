@@ -0,0 +1,279 @@
+"""
+Per-host rate limiting with a token bucket and AIMD adaptive concurrency.
+Author: gabes-machado
+Created: 2026-10-16 20:40:05 UTC
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token bucket shared by all coroutines talking to one host.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``.
+    Each caller reserves its token under a lock, letting the balance go
+    negative, and then sleeps off its share of the debt outside the lock.
+    Waiters are therefore served in FIFO order and can never exceed the
+    rate, but they wait concurrently instead of one after another.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the token bucket
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens that can accumulate
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Take a token, waiting until the reserved one has refilled"""
+        async with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the reserved token back to the waiters behind us
+                async with self._lock:
+                    self._tokens += 1
+                raise
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limit.
+
+    The limit grows by roughly one slot per window of healthy responses and
+    is cut by ``decrease_factor`` when the host signals overload (429, 5xx,
+    timeouts) or when latency rises above ``latency_tolerance`` times the
+    baseline. The baseline is the mean of the first ``warmup`` latencies and
+    then an exponentially weighted moving average, so one unusually fast
+    response cannot pin it. Responses answered from the cache (304) carry no
+    latency, as they say nothing about how loaded the host is. Decreases are
+    spaced by ``cooldown`` seconds so a single burst of errors only halves
+    the limit once.
+    """
+
+    OVERLOAD_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        initial_limit: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 10,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        cooldown: float = 1.0,
+        latency_smoothing: float = 0.2,
+        warmup: int = 5
+    ):
+        """
+        Initialize the adaptive limiter
+
+        Args:
+            initial_limit: Concurrency allowed before any feedback
+            min_limit: Lowest concurrency the limiter may fall to
+            max_limit: Highest concurrency the limiter may grow to
+            decrease_factor: Multiplier applied on overload
+            latency_tolerance: Latency ratio over baseline treated as overload
+            cooldown: Minimum seconds between two decreases
+            latency_smoothing: Weight of each new latency in the baseline
+            warmup: Latencies averaged before any is judged against the baseline
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.latency_smoothing = latency_smoothing
+        self.warmup = warmup
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self._latency_samples = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free concurrency slot"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, status: Optional[int], latency: Optional[float]) -> None:
+        """
+        Release a slot and adapt the limit from the response outcome
+
+        Args:
+            status: HTTP status received, or None for transport failures
+            latency: Request duration in seconds, or None if unknown or
+                not representative (cache-served responses)
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if status is None or status in self.OVERLOAD_STATUSES:
+                self._decrease(f"status {status}")
+            elif latency is not None and self._latency_degraded(latency):
+                self._decrease(f"latency {latency:.2f}s")
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    async def cancel(self) -> None:
+        """Release a slot that was never used, without adapting the limit"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _latency_degraded(self, latency: float) -> bool:
+        """Compare a latency to the baseline, then fold it into the baseline"""
+        self._latency_samples += 1
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+            return False
+        if self._latency_samples <= self.warmup:
+            self.baseline_latency += (latency - self.baseline_latency) / self._latency_samples
+            return False
+
+        degraded = latency > self.baseline_latency * self.latency_tolerance
+        self.baseline_latency += self.latency_smoothing * (latency - self.baseline_latency)
+        return degraded
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        logger.info(
+            f"Reducing concurrency limit {previous:.1f} -> {self.limit:.1f} ({reason})"
+        )
+
+class RequestSlot:
+    """Permission to send one request, reporting its outcome on exit"""
+
+    # Answered from the response cache, so its latency is not the host's
+    NOT_MODIFIED = 304
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter):
+        self._limiter = limiter
+        self._start = time.monotonic()
+        self._recorded = False
+        self.status: Optional[int] = None
+        self.latency: Optional[float] = None
+
+    def record(self, status: int) -> None:
+        """
+        Record the HTTP status as soon as the response headers arrive
+
+        Latency is measured up to this point so that large bodies do not
+        look like a slow host.
+        """
+        self._recorded = True
+        self.status = status
+        if status != self.NOT_MODIFIED:
+            self.latency = time.monotonic() - self._start
+
+    async def __aenter__(self) -> 'RequestSlot':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if not self._recorded:
+            self.latency = time.monotonic() - self._start
+            # Failures without a response (timeouts, resets) count as overload
+            self.status = 200 if exc_type is None else None
+        await self._limiter.release(self.status, self.latency)
+
+class HostRateLimiter:
+    """Registry of token buckets and adaptive limiters keyed by host"""
+
+    def __init__(
+        self,
+        requests_per_second: float = 10.0,
+        burst: int = 5,
+        max_concurrency: int = 10,
+        initial_concurrency: int = 2
+    ):
+        """
+        Initialize the host rate limiter
+
+        Args:
+            requests_per_second: Sustained request rate allowed per host
+            burst: Requests that may be sent back to back per host
+            max_concurrency: Upper bound of the adaptive concurrency per host
+            initial_concurrency: Starting concurrency per host
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.initial_concurrency = initial_concurrency
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+        logger.info(
+            f"Initialized HostRateLimiter (rate={requests_per_second}/s, "
+            f"burst={burst}, max_concurrency={max_concurrency})"
+        )
+
+    def _get(self, host: str):
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+            self._limiters[host] = AdaptiveConcurrencyLimiter(
+                initial_limit=self.initial_concurrency,
+                max_limit=self.max_concurrency
+            )
+        return self._buckets[host], self._limiters[host]
+
+    async def slot(self, host: str) -> RequestSlot:
+        """
+        Wait for both a concurrency slot and a rate token for a host
+
+        Args:
+            host: Target host name
+
+        Returns:
+            RequestSlot: Async context manager wrapping the request
+        """
+        bucket, limiter = self._get(host)
+        await limiter.acquire()
+        try:
+            await bucket.acquire()
+        except BaseException:
+            await limiter.cancel()
+            raise
+        return RequestSlot(limiter)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the current concurrency limit per host"""
+        return {
+            host: {
+                "limit": round(limiter.limit, 2),
+                "in_flight": limiter.in_flight,
+                "baseline_latency": limiter.baseline_latency
+            }
+            for host, limiter in self._limiters.items()
+        }
@@ -0,0 +1,155 @@
+"""
+Retry policy with a shared retry budget and an overall deadline.
+Author: gabes-machado
+Created: 2026-10-16 20:12:31 UTC
+"""
+
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RetryPolicy:
+    """
+    Single source of truth for retrying HTTP requests.
+
+    One policy instance is shared by every request of a run. Each request
+    may be attempted up to ``max_attempts`` times, but all requests draw
+    their retries from the same ``retry_budget``, and no attempt or backoff
+    sleep is allowed to run past the run ``deadline``. Backoff uses full
+    jitter; a Retry-After header sent with 429/503 answers takes precedence
+    over the computed delay. The owner of the policy calls reset() at the
+    start of each run, so runs never inherit a spent budget or deadline.
+    """
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    retry_budget: int = 10
+    deadline: Optional[float] = None  # Seconds for the whole run
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    retries_used: int = field(default=0, init=False)
+    _deadline_at: Optional[float] = field(default=None, init=False, repr=False)
+
+    def start(self) -> None:
+        """Start the deadline clock (no-op if already started)"""
+        if self.deadline is not None and self._deadline_at is None:
+            self._deadline_at = time.monotonic() + self.deadline
+            logger.debug(f"Retry deadline set to {self.deadline:.1f}s from now")
+
+    def reset(self) -> None:
+        """Begin a new run: restore the retry budget and restart the deadline"""
+        self.retries_used = 0
+        self._deadline_at = None
+        self.start()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without a deadline"""
+        if self._deadline_at is None:
+            return None
+        return max(0.0, self._deadline_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the run deadline has passed"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def request_timeout(self, timeout: float) -> float:
+        """
+        Clamp a per-request timeout to the time left before the deadline
+
+        Args:
+            timeout: Configured request timeout in seconds
+
+        Returns:
+            float: Timeout to use for the next attempt
+        """
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff delay
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+
+        Returns:
+            float: Delay in seconds, uniform in [0, min(max, base * 2^attempt)]
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def next_delay(
+        self,
+        attempt: int,
+        retryable: bool,
+        retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Decide whether a failed attempt is retried and how long to wait
+
+        Consumes one unit of the retry budget when a retry is granted.
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            retryable: Whether the failure is transient
+            retry_after: Delay requested by the server, if any
+
+        Returns:
+            Optional[float]: Seconds to sleep before retrying, or None to give up
+        """
+        if not retryable:
+            return None
+        if attempt + 1 >= self.max_attempts:
+            logger.debug("Retry denied: per-request attempts exhausted")
+            return None
+        if self.retries_used >= self.retry_budget:
+            logger.warning(
+                f"Retry denied: run retry budget of {self.retry_budget} exhausted"
+            )
+            return None
+
+        delay = self.backoff_delay(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            logger.warning(
+                f"Retry denied: waiting {delay:.1f}s would pass the deadline"
+            )
+            return None
+
+        self.retries_used += 1
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        Parse a Retry-After header value
+
+        Args:
+            value: Either delta-seconds or an HTTP-date
+
+        Returns:
+            Optional[float]: Delay in seconds, or None if absent or invalid
+        """
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            logger.debug(f"Ignoring invalid Retry-After value: {value}")
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
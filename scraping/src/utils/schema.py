@@ -2,16 +2,33 @@
 JSON Schema definition and validation for the Brazilian Constitution.
 Author: gabes-machado
 Created: 2025-01-19 19:52:06 UTC
+Updated: 2026-10-17 03:15:42 UTC
 """
 
 import json
 import logging
-from typing import Dict, Any
+from dataclasses import replace
+from functools import lru_cache
+from typing import Dict, Any, Optional
 from pathlib import Path
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+
+from .constitution_structure import (
+    ConstitutionalElement,
+    ConstitutionProcessor,
+    ElementSink,
+    PlacedElement,
+    StructureType
+)
 
 logger = logging.getLogger(__name__)
 
+# Schema errors logged by NodeValidator; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
 # Schema definition for the Brazilian Constitution
 CONSTITUTION_SCHEMA = {
     "type": "object",
@@ -87,7 +104,7 @@ CONSTITUTION_SCHEMA = {
                                                             "type": "object",
                                                             "patternProperties": {
                                                                 "^[IVXLCDM]+$": {
-                                                                    "$ref": "#/definitions/dispositivos"
+                                                                    "$ref": "#/definitions/subsecao"
                                                                 }
                                                             }
                                                         },
@@ -125,6 +142,24 @@ CONSTITUTION_SCHEMA = {
         }
     },
     "definitions": {
+        "subsecao": {
+            "type": "object",
+            "properties": {
+                "conteudo": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["classe", "numero", "texto"],
+                        "properties": {
+                            "classe": {"type": "string", "enum": ["subsecao"]},
+                            "numero": {"type": "string"},
+                            "texto": {"type": "string"}
+                        }
+                    }
+                },
+                "artigos": {"$ref": "#/definitions/artigos"}
+            }
+        },
         "artigos": {
             "type": "object",
             "patternProperties": {
@@ -218,11 +253,138 @@ CONSTITUTION_SCHEMA = {
     }
 }
 
+@lru_cache(maxsize=None)
+def compiled_validator() -> Validator:
+    """
+    Validator for CONSTITUTION_SCHEMA, checked and built once per process
+
+    Returns:
+        Validator: Draft validator bound to the schema
+    """
+    validator_class = validator_for(CONSTITUTION_SCHEMA)
+    validator_class.check_schema(CONSTITUTION_SCHEMA)
+    return validator_class(CONSTITUTION_SCHEMA)
+
+def _describe(error: Optional[ValidationError], *prefix: str) -> Optional[str]:
+    """Path and message of an error, for the log"""
+    if error is None:
+        return None
+    path = "/".join(prefix + tuple(str(part) for part in error.absolute_path))
+    return f"{path or '/'}: {error.message}"
+
+class NodeValidator(ElementSink):
+    """
+    Validates a ConstitutionProcessor's tree one título at a time while
+    the document is processed, instead of the finished tree at once.
+
+    Elements are only placed under open nodes, so a título is complete
+    once the next one starts; it is then checked by a validator of the
+    titulos subschema, derived from the compiled validator so $refs keep
+    resolving against the whole schema. is_valid() checks the open
+    título and everything outside titulos. A repeated number replaces
+    the earlier título in the result and its verdict replaces the
+    earlier verdict, so the outcome is that of validating get_result().
+    """
+
+    def __init__(self, processor: ConstitutionProcessor, validator: Optional[Validator] = None):
+        """
+        Initialize the node validator and register it as a sink
+
+        Args:
+            processor: Processor whose tree is validated
+            validator: Compiled validator of the whole schema
+        """
+        self.processor = processor
+        self.validator = validator or compiled_validator()
+        self.titulos_validator = self.validator.evolve(
+            schema=self.validator.schema["properties"]["titulos"]
+        )
+        # First error of each validated título, None when it is valid
+        self.verdicts: Dict[str, Optional[str]] = {}
+        self._open_titulo: Optional[str] = None
+        processor.sinks.append(self)
+
+    def _titulos(self) -> Dict[str, ConstitutionalElement]:
+        titulos = self.processor.root.children.get("titulos")
+        return titulos if isinstance(titulos, dict) else {}
+
+    def _check_titulo(self, number: str) -> None:
+        titulo = self._titulos().get(number)
+        node = titulo.to_dict() if titulo is not None else None
+        if node:
+            self.verdicts[number] = _describe(
+                best_match(self.titulos_validator.iter_errors({number: node})), "titulos"
+            )
+
+    def write(self, element: PlacedElement) -> None:
+        """Validate the título the element closes, if any"""
+        if element.type != StructureType.TITULO:
+            return
+        if self._open_titulo is not None and self._open_titulo != element.number:
+            self._check_titulo(self._open_titulo)
+        self._open_titulo = element.number
+
+    def close(self) -> None:
+        """Nothing to publish"""
+
+    def _remaining(self) -> Dict[str, Any]:
+        """get_result() without the títulos validated so far"""
+        root = self.processor.root
+        titulos = self._titulos()
+        if titulos:
+            root = replace(root, children={
+                **root.children,
+                "titulos": {n: t for n, t in titulos.items() if n not in self.verdicts}
+            })
+        result = root.to_dict()
+        if self.verdicts:
+            result.setdefault("titulos", {})
+        adct = self.processor.adct.to_dict()
+        if adct:
+            result["adct"] = adct
+        return result
+
+    def is_valid(self) -> bool:
+        """
+        Whether the processed document is valid, logging the errors found
+
+        Returns:
+            bool: True if valid, False otherwise
+        """
+        if self._open_titulo is not None:
+            self._check_titulo(self._open_titulo)
+            self._open_titulo = None
+        errors = [error for error in self.verdicts.values() if error is not None]
+        remaining = _describe(best_match(self.validator.iter_errors(self._remaining())))
+        if remaining is not None:
+            errors.insert(0, remaining)
+        for error in errors[:MAX_REPORTED_ERRORS]:
+            logger.error(f"Schema validation error at {error}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            logger.error(f"... and {len(errors) - MAX_REPORTED_ERRORS} more schema errors")
+        if errors:
+            return False
+        logger.info(f"Data validation successful ({self.processor.ordinal} elements)")
+        return True
+
 class ConstitutionSchema:
     """Manager for the Brazilian Constitution JSON Schema"""
     
     def __init__(self):
         self.schema = CONSTITUTION_SCHEMA
+        self.validator = compiled_validator()
+
+    def node_validator(self, processor: ConstitutionProcessor) -> NodeValidator:
+        """
+        Sink validating the processor's tree while it is built
+
+        Args:
+            processor: Processor to validate, before it processes elements
+
+        Returns:
+            NodeValidator: A fresh validator sharing the compiled schema
+        """
+        return NodeValidator(processor, self.validator)
     
     def validate_data(self, data: Dict[str, Any]) -> bool:
         """
@@ -235,7 +397,9 @@ class ConstitutionSchema:
             bool: True if valid, False otherwise
         """
         try:
-            validate(instance=data, schema=self.schema)
+            error = best_match(self.validator.iter_errors(data))
+            if error is not None:
+                raise error
             logger.info("Data validation successful")
             return True
             
@@ -246,4 +410,4 @@ class ConstitutionSchema:
             
         except Exception as e:
             logger.error(f"Unexpected error during schema validation: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,192 @@
+"""
+SQLite export of dispositivos with an FTS5 full-text index.
+Author: gabes-machado
+Created: 2026-10-17 02:38:27 UTC
+"""
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .constitution_structure import ElementSink, PlacedElement
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered before each executemany()
+BATCH_SIZE = 1000
+
+# Accent-insensitive tokenizer: "constituicao" matches "Constituição"
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+SCHEMA = f"""
+CREATE TABLE nodes (
+    id INTEGER PRIMARY KEY,          -- Position in the document
+    parent_id INTEGER REFERENCES nodes(id),
+    type TEXT NOT NULL,
+    number TEXT,
+    ordinal INTEGER NOT NULL,        -- Position among the parent's children
+    title TEXT,
+    text TEXT NOT NULL,
+    path TEXT NOT NULL               -- Key path in constitution.json
+);
+CREATE INDEX nodes_parent ON nodes (parent_id, ordinal);
+CREATE INDEX nodes_type ON nodes (type, number);
+CREATE VIRTUAL TABLE nodes_fts USING fts5 (
+    text, title,
+    content = 'nodes', content_rowid = 'id',
+    tokenize = '{FTS_TOKENIZER}'
+);
+"""
+
+class SQLiteExportError(Exception):
+    """Custom exception for SQLite export errors"""
+    pass
+
+class SQLiteExporter(ElementSink):
+    """
+    Writes every element into a ``nodes`` table as ConstitutionProcessor
+    places it.
+
+    All rows are inserted in batches inside one transaction on a
+    temporary database; on close() the FTS5 index is built in a single
+    pass and the file is renamed over its destination.
+    """
+
+    def __init__(self, db_file: str, batch_size: int = BATCH_SIZE):
+        """
+        Initialize the exporter
+
+        Args:
+            db_file: Destination database path
+            batch_size: Rows per bulk insert
+
+        Raises:
+            SQLiteExportError: If the database cannot be created
+        """
+        self.db_path = Path(db_file)
+        self.tmp_path = self.db_path.with_name(self.db_path.name + ".tmp")
+        self.batch_size = batch_size
+        self.rows = 0
+        self._batch: List[Tuple] = []
+        self._child_counts: Dict[int, int] = {}
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.tmp_path.exists():
+                self.tmp_path.unlink()
+            self._connection: Optional[sqlite3.Connection] = sqlite3.connect(
+                self.tmp_path, isolation_level=None
+            )
+            # The temporary file is discarded on failure, so durability
+            # is only needed once it is renamed into place
+            self._connection.execute("PRAGMA journal_mode = OFF")
+            self._connection.execute("PRAGMA synchronous = OFF")
+            self._connection.executescript(SCHEMA)
+            self._connection.execute("BEGIN")
+        except (OSError, sqlite3.Error) as e:
+            raise SQLiteExportError(f"Cannot create {db_file}: {e}") from e
+
+    def write(self, element: PlacedElement) -> None:
+        """
+        Queue the element's row
+
+        Raises:
+            SQLiteExportError: If a batch cannot be inserted
+        """
+        ordinal = self._child_counts.get(element.parent, 0) + 1
+        self._child_counts[element.parent] = ordinal
+        self._batch.append((
+            element.ordinal,
+            element.parent or None,
+            element.type.value.lower(),
+            element.number,
+            ordinal,
+            element.title,
+            element.text,
+            element.key
+        ))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        try:
+            self._connection.executemany(
+                "INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._batch
+            )
+        except sqlite3.Error as e:
+            raise SQLiteExportError(f"Failed to insert into {self.db_path}: {e}") from e
+        self.rows += len(self._batch)
+        self._batch = []
+
+    def close(self) -> None:
+        """
+        Build the full-text index, commit and publish the database
+
+        Raises:
+            SQLiteExportError: If the database cannot be completed
+        """
+        if self._connection is None:
+            return
+        try:
+            self._flush()
+            self._connection.execute("INSERT INTO nodes_fts (nodes_fts) VALUES ('rebuild')")
+            self._connection.execute("COMMIT")
+            self._connection.execute("PRAGMA optimize")
+            self._connection.close()
+            self._connection = None
+            os.replace(self.tmp_path, self.db_path)
+        except (OSError, sqlite3.Error, SQLiteExportError) as e:
+            self.abort()
+            raise SQLiteExportError(f"Failed to complete {self.db_path}: {e}") from e
+        logger.info(f"Exported {self.rows} nodes to {self.db_path}")
+
+    def abort(self) -> None:
+        """Discard the partial database"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+def search(db_file: str, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Full-text search over an exported database, best matches first
+
+    Args:
+        db_file: Database written by SQLiteExporter
+        query: FTS5 query (accents and case are ignored)
+        limit: Maximum number of results
+
+    Returns:
+        List[Dict[str, Any]]: Matching nodes with a highlighted snippet
+
+    Raises:
+        SQLiteExportError: If the database or the query is invalid
+    """
+    try:
+        connection = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        raise SQLiteExportError(f"Cannot open {db_file}: {e}") from e
+    try:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute(
+            """
+            SELECT nodes.id, nodes.type, nodes.number, nodes.path, nodes.text,
+                   snippet(nodes_fts, -1, '[', ']', '…', 12) AS snippet
+            FROM nodes_fts JOIN nodes ON nodes.id = nodes_fts.rowid
+            WHERE nodes_fts MATCH ?
+            ORDER BY bm25(nodes_fts)
+            LIMIT ?
+            """,
+            (query, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    except sqlite3.Error as e:
+        raise SQLiteExportError(f"Search failed for {query!r}: {e}") from e
+    finally:
+        connection.close()
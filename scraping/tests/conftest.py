@@ -0,0 +1,111 @@
+"""
+Shared pytest setup for the scraping tests.
+Author: gabes-machado
+Created: 2026-10-16 19:36:05 UTC
+
+The scraper modules are imported as top-level packages from src
+(``from utils.http_cache import ...``), as main.py does.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from scraper.constitution import ConstitutionScraper  # noqa: E402
+from utils.constitution_structure import ConstitutionProcessor  # noqa: E402
+from utils.http_fixtures import FixtureArchive  # noqa: E402
+from utils.mock_server import MockPlanaltoServer  # noqa: E402
+
+from pages import elements, synthetic_elements, with_subsecoes  # noqa: E402
+
+CONSTITUTION_URL = "https://www.planalto.gov.br/ccivil_03/constituicao/constituicao.htm"
+
+# scrape_page options passed to the ConstitutionScraper constructor
+SCRAPER_OPTIONS = frozenset({"archive_dir", "element_cache_dir", "parser_engine"})
+
+class FakeClock:
+    """Stand-in for the time module whose clock only moves when told to"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Replace the time module of the given modules by one FakeClock"""
+    clock = FakeClock()
+
+    def install(*modules) -> FakeClock:
+        for module in modules:
+            monkeypatch.setattr(module, "time", clock)
+        return clock
+
+    return install
+
+@pytest.fixture(params=["page", "subsecoes", "synthetic"], scope="session")
+def law(request) -> List[Tuple]:
+    """Element streams of a small page, one with subseções and a large law"""
+    if request.param == "page":
+        return elements()
+    if request.param == "subsecoes":
+        return elements(with_subsecoes())
+    return synthetic_elements(5000)
+
+@pytest.fixture
+def process():
+    """Build a ConstitutionProcessor from an element stream"""
+    def build(elements: List[Tuple], **options) -> ConstitutionProcessor:
+        processor = ConstitutionProcessor(**options)
+        for element in elements:
+            processor.process_element(*element)
+        return processor
+
+    return build
+
+@pytest.fixture
+def scrape_page(tmp_path):
+    """
+    Serve a page as the constitution from the mock Planalto server and
+    scrape it once per (output_file, options) run
+
+    Options naming a ConstitutionScraper argument (SCRAPER_OPTIONS) go to
+    a fresh scraper, the others to scrape(). Returns scrape()'s results.
+    """
+    def scrape(content: bytes, *runs: Tuple[Path, Dict[str, Any]]) -> List[bool]:
+        fixtures = FixtureArchive(str(tmp_path / "fixtures"))
+        fixtures.record(CONSTITUTION_URL, 200, content, charset="cp1252")
+
+        async def run() -> List[bool]:
+            results = []
+            async with MockPlanaltoServer(fixtures) as server:
+                for output_file, options in runs:
+                    scraper = ConstitutionScraper(
+                        base_url=server.base_url,
+                        max_retries=1,
+                        **{k: v for k, v in options.items() if k in SCRAPER_OPTIONS}
+                    )
+                    async with scraper:
+                        results.append(await scraper.scrape(
+                            str(output_file),
+                            **{k: v for k, v in options.items() if k not in SCRAPER_OPTIONS}
+                        ))
+            return results
+
+        return asyncio.run(run())
+
+    return scrape
@@ -0,0 +1,84 @@
+"""
+Constitution pages and element streams shared by the tests.
+Author: gabes-machado
+Created: 2026-10-16 23:02:14 UTC
+"""
+
+from typing import List, Tuple
+
+from utils.html_parser import HTMLParser
+
+PREAMBULO = "Nós, representantes do povo brasileiro, reunidos em Assembléia Nacional Constituinte"
+
+# A small but complete constitution: títulos, capítulos, artigos,
+# parágrafos, incisos, alíneas and the ADCT
+PARAGRAPHS = [
+    "TÍTULO I", "Dos Princípios Fundamentais",
+    "Art. 1º A República Federativa do Brasil:",
+    "I - a soberania;", "II - a cidadania;",
+    "Parágrafo único. Todo o poder emana do povo.",
+    "TÍTULO II", "Dos Direitos e Garantias Fundamentais",
+    "CAPÍTULO I", "Dos Direitos Individuais",
+    "Art. 5º Todos são iguais perante a lei:",
+    "I - homens e mulheres são iguais;",
+    "a) nos termos da lei;",
+    "§ 1º As normas têm aplicação imediata.",
+    "ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS",
+    "Art. 1º O Presidente da República prestará compromisso.",
+]
+
+# Título IV, Capítulo I, Seção VIII of the CF/88 has subseções
+SUBSECOES = [
+    "TÍTULO IV", "Da Organização dos Poderes",
+    "CAPÍTULO I", "Do Poder Legislativo",
+    "SEÇÃO VIII", "Do Processo Legislativo",
+    "SUBSEÇÃO I", "Disposição Geral",
+    "Art. 59. O processo legislativo compreende:",
+    "I - emendas à Constituição;",
+    "SUBSEÇÃO II", "Da Emenda à Constituição",
+    "Art. 60. A Constituição poderá ser emendada mediante proposta:",
+    "§ 1º A Constituição não poderá ser emendada na vigência de intervenção federal.",
+]
+
+def page(paragraphs: List[str] = PARAGRAPHS, charset: str = "cp1252") -> bytes:
+    """Raw bytes of a Planalto-like page holding the paragraphs"""
+    body = "".join(f"<p>{text}</p>" for text in paragraphs)
+    html = (
+        f'<html><head><meta charset="{charset}"></head><body>'
+        f'<font face="Arial">{PREAMBULO}</font>'
+        f"{body}</body></html>"
+    )
+    return html.encode(charset)
+
+def with_subsecoes() -> List[str]:
+    """PARAGRAPHS with a título holding subseções before the ADCT"""
+    adct = PARAGRAPHS.index("ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS")
+    return PARAGRAPHS[:adct] + SUBSECOES + PARAGRAPHS[adct:]
+
+def elements(paragraphs: List[str] = PARAGRAPHS) -> List[Tuple]:
+    """Elements the default parser yields for page(paragraphs)"""
+    parser = HTMLParser(page(paragraphs))
+    parser.remove_strike_tags()
+    return list(parser.iter_constitutional_elements())
+
+def synthetic_elements(count: int) -> List[Tuple]:
+    """
+    Elements of a regular law with about `count` dispositivos: títulos
+    of capítulos of artigos with parágrafos, incisos and alíneas
+    """
+    parsed = [("PREAMBULO", None, None, PREAMBULO)]
+    titulo = capitulo = artigo = 0
+    while len(parsed) < count:
+        titulo += 1
+        parsed.append(("TITULO", str(titulo), "Dos Princípios", f"TÍTULO {titulo}"))
+        for _ in range(3):
+            capitulo += 1
+            parsed.append(("CAPITULO", str(capitulo), "Disposições Gerais", f"CAPÍTULO {capitulo}"))
+            for _ in range(5):
+                artigo += 1
+                parsed.append(("ARTIGO", f"{artigo}º", None, f"Art. {artigo}º Todos são iguais."))
+                parsed.append(("PARAGRAFO", "único", None, "Parágrafo único. Aplica-se o caput."))
+                for inciso in ("I", "II"):
+                    parsed.append(("INCISO", inciso, None, f"{inciso} - nos termos da lei;"))
+                    parsed.append(("ALINEA", "a", None, "a) como dispuser a lei;"))
+    return parsed[:count]
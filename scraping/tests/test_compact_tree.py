@@ -0,0 +1,49 @@
+"""
+Tests that the compact tree and ConstitutionProcessor build the same law.
+Author: gabes-machado
+Created: 2026-10-17 01:08:44 UTC
+"""
+
+import random
+from typing import List, Tuple
+
+import pytest
+
+from utils.compact_tree import CompactTree
+from utils.constitution_structure import StructureType
+
+def random_elements(seed: int, count: int = 200) -> List[Tuple]:
+    """Element streams in any order, with repeated and missing numbers"""
+    rng = random.Random(seed)
+    types = [structure_type.value for structure_type in StructureType]
+    parsed = []
+    for position in range(count):
+        element_type = rng.choice(types)
+        number = rng.choice([None, "I", "II", "1", "2", "único", "a"])
+        title = rng.choice([None, "Disposições Gerais"])
+        parsed.append((element_type, number, title, f"{element_type} {position}"))
+    return parsed
+
+def test_same_law_as_processor(law, process):
+    assert CompactTree.from_elements(law).to_dict() == process(law).get_result()
+
+@pytest.mark.parametrize("seed", range(50))
+def test_same_law_for_any_element_order(seed, process):
+    parsed = random_elements(seed)
+    assert CompactTree.from_elements(parsed).to_dict() == process(parsed).get_result()
+
+def test_nodes_are_navigable(process):
+    tree = CompactTree.from_elements([
+        ("PREAMBULO", None, None, "Nós"),
+        ("TITULO", "I", "Dos Princípios", "TÍTULO I"),
+        ("ARTIGO", "1", None, "Art. 1º A República"),
+        ("INCISO", "I", None, "I - a soberania;"),
+        ("INCISO", "II", None, "II - a cidadania;"),
+    ])
+    artigo = next(node for node in range(len(tree)) if tree.node_type(node) is StructureType.ARTIGO)
+    incisos = list(tree.children(artigo))
+
+    assert [tree.number(node) for node in incisos] == ["I", "II"]
+    assert tree.text(incisos[1]) == "II - a cidadania;"
+    assert tree.node_type(tree.parent(artigo)) is StructureType.TITULO
+    assert tree.title(tree.parent(artigo)) == "Dos Princípios"
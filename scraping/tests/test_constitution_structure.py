@@ -0,0 +1,44 @@
+"""
+Tests for the constitution structure built by ConstitutionProcessor.
+Author: gabes-machado
+Created: 2026-10-17 01:02:10 UTC
+"""
+
+import json
+
+from utils.schema import ConstitutionSchema
+
+from pages import PREAMBULO, elements, with_subsecoes
+
+def test_result_is_plain_json_valid_against_the_schema(process):
+    result = process(elements()).get_result()
+
+    assert json.loads(json.dumps(result)) == result
+    assert result["preambulo"] == [{"classe": "preambulo", "numero": None, "texto": PREAMBULO}]
+    assert set(result["titulos"]) == {"I", "II"}
+    artigo = result["titulos"]["I"]["artigos"]["1"]
+    assert artigo["incisos"]["II"]["conteudo"][0]["texto"] == "II - a cidadania;"
+    assert ConstitutionSchema().validate_data(result)
+
+def test_artigos_go_under_the_open_subsecao(process):
+    result = process(elements(with_subsecoes())).get_result()
+    secao = result["titulos"]["IV"]["capitulos"]["I"]["secoes"]["VIII"]
+    assert set(secao["subsecoes"]["I"]["artigos"]) == {"59"}
+    assert "60" in secao["subsecoes"]["II"]["artigos"]
+    assert "artigos" not in secao
+
+def test_a_new_heading_closes_deeper_levels(process):
+    result = process([
+        ("TITULO", "I", None, "TÍTULO I"),
+        ("CAPITULO", "I", None, "CAPÍTULO I"),
+        ("SECAO", "I", None, "SEÇÃO I"),
+        ("ARTIGO", "1", None, "Art. 1º"),
+        ("CAPITULO", "II", None, "CAPÍTULO II"),
+        ("ARTIGO", "2", None, "Art. 2º"),
+        ("TITULO", "II", None, "TÍTULO II"),
+        ("ARTIGO", "3", None, "Art. 3º"),
+    ]).get_result()
+    titulo = result["titulos"]["I"]
+    assert set(titulo["capitulos"]["I"]["secoes"]["I"]["artigos"]) == {"1"}
+    assert set(titulo["capitulos"]["II"]["artigos"]) == {"2"}
+    assert set(result["titulos"]["II"]["artigos"]) == {"3"}
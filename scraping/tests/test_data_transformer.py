@@ -0,0 +1,85 @@
+"""
+Tests for the ConstitutionTransformer and its engines.
+Author: gabes-machado
+Created: 2026-10-17 02:57:09 UTC
+"""
+
+from typing import List
+
+import pandas as pd
+import pytest
+
+from utils import data_transformer
+from utils.data_transformer import ConstitutionTransformer
+
+from pages import PARAGRAPHS, with_subsecoes
+
+# Paragraphs on the edges of the patterns
+TRICKY = [
+    "", "   ", " TÍTULO III ", "Dos Direitos Políticos",
+    "CAPÍTULO IV - Das Funções Essenciais", "SEÇÃO II–", "SUBSEÇÃO III",
+    "Art. 5º-A Acrescentado pela emenda.", "Art.12 Sem espaço.", "Art. 103-B. O Conselho",
+    "§ 2º- Os direitos.", "§10 Sem espaço.", "Parágrafo Unico. Maiúsculo.",
+    "parágrafo único. Minúsculo.", "título i", "IV– travessão", "XII -", "x) y",
+    "a)sem espaço", "A) maiúscula", "PREÂMBULO", "Art.", "§", "ARTIGO 1",
+]
+
+DOCUMENTS = {
+    "plain": PARAGRAPHS,
+    "subsecoes": with_subsecoes(),
+    "tricky": with_subsecoes() + TRICKY,
+    "many laws": (with_subsecoes() + TRICKY) * 50,
+}
+
+def transform(engine: str, paragraphs: List[str]) -> pd.DataFrame:
+    transformer = ConstitutionTransformer(engine=engine)
+    df = transformer.extract_hierarchical_structure(transformer.create_dataframe(paragraphs))
+    return df if isinstance(df, pd.DataFrame) else df.to_pandas()
+
+@pytest.mark.parametrize("column, text, expected", [
+    ("titulo", "TÍTULO II", "II"),
+    ("titulo", "título i", "I"),
+    ("capitulo", "CAPÍTULO IV - Das Funções Essenciais", "IV"),
+    ("secao", "SEÇÃO VIII", "VIII"),
+    ("subsecao", "SUBSEÇÃO III", "III"),
+    ("titulo", "Dos Princípios Fundamentais", None),
+    ("titulo", None, None),
+])
+def test_roman_numerals_are_read_from_headings(column, text, expected):
+    transformer = ConstitutionTransformer()
+    assert transformer._safe_extract_roman(transformer.regex_map_roman[column], text) == expected
+
+@pytest.mark.parametrize("engine", ["rowwise", "vectorized"])
+def test_headings_number_the_following_rows(engine):
+    df = transform(engine, with_subsecoes())
+    assert list(df["titulo"].unique()) == ["I", "II", "IV"]
+    assert list(df["subsecao"].dropna().unique()) == ["I", "II"]
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_vectorized_matches_rowwise(document):
+    pd.testing.assert_frame_equal(
+        transform("vectorized", DOCUMENTS[document]),
+        transform("rowwise", DOCUMENTS[document]),
+        check_exact=True
+    )
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_polars_matches_vectorized(document):
+    pytest.importorskip("polars")
+    # A column with no match is object (all None) in pandas but still a
+    # string column in Polars, so only the values are compared
+    pd.testing.assert_frame_equal(
+        transform("polars", DOCUMENTS[document]),
+        transform("vectorized", DOCUMENTS[document]),
+        check_exact=True,
+        check_dtype=False
+    )
+
+def test_polars_engine_requires_polars(monkeypatch):
+    monkeypatch.setattr(data_transformer, "pl", None)
+    with pytest.raises(ValueError):
+        ConstitutionTransformer(engine="polars")
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        ConstitutionTransformer(engine="numba")
@@ -0,0 +1,89 @@
+"""
+Tests for the parsed element cache.
+Author: gabes-machado
+Created: 2026-10-17 00:31:52 UTC
+"""
+
+import asyncio
+
+import pytest
+
+from scraper.constitution import ConstitutionScraper
+from utils.element_cache import ElementCache
+from utils.html_parser import PARSER_VERSION
+from utils.http_client import FetchedDocument
+from utils.parser_backends import available_backends
+
+from pages import PREAMBULO, elements, page, with_subsecoes
+
+needs_lxml = pytest.mark.skipif(
+    "lxml" not in available_backends(), reason="lxml is not installed"
+)
+
+def test_elements_round_trip(tmp_path):
+    cache = ElementCache(str(tmp_path))
+    parsed = elements(with_subsecoes())
+    key = ElementCache.content_key(page(with_subsecoes()))
+    cache.store(key, parsed)
+    assert cache.load(key) == parsed
+    assert cache.get_stats() == {"hits": 1, "misses": 0, "stores": 1}
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ElementCache(str(tmp_path))
+    key = ElementCache.content_key(page())
+    cache.store(key, elements())
+    cache._path(key).write_bytes(b"corrupt")
+    assert cache.load(key) is None
+    assert not cache._path(key).exists()
+
+def test_parser_version_bump_misses(tmp_path):
+    key = ElementCache.content_key(page())
+    ElementCache(str(tmp_path)).store(key, elements())
+
+    bumped = ElementCache(str(tmp_path), parser_version=PARSER_VERSION + 1)
+    assert bumped.load(key) is None
+    assert not (tmp_path / f"v{PARSER_VERSION}").exists()
+
+def test_key_depends_on_charset():
+    content = page()
+    assert ElementCache.content_key(content, charset="cp1252") != ElementCache.content_key(
+        content, charset="latin-1"
+    )
+    assert ElementCache.content_key(content, charset="cp1252") == ElementCache.content_key(
+        content, charset="windows-1252"
+    )
+    assert ElementCache.content_key(content) != ElementCache.content_key(
+        content, charset="utf-8"
+    )
+
+@needs_lxml
+def test_key_depends_on_engine():
+    content = page()
+    assert ElementCache.content_key(content, "bs4") != ElementCache.content_key(content, "lxml")
+    assert ElementCache.content_key(content, "auto") == ElementCache.content_key(content, "lxml")
+
+@needs_lxml
+def test_engine_swap_misses(tmp_path):
+    # Unclosed paragraphs are read differently by bs4 and lxml
+    content = (
+        f'<html><body><font face="Arial">{PREAMBULO}</font>'
+        "<p>TÍTULO I<p>Dos Princípios<p>Art. 1º A República</body></html>"
+    ).encode("cp1252")
+    document = FetchedDocument(url="https://example.org/", content=content, charset="cp1252")
+
+    def parse(engine: str):
+        async def run():
+            scraper = ConstitutionScraper(
+                parser_engine=engine, element_cache_dir=str(tmp_path)
+            )
+            async with scraper:
+                return await scraper._parse_document(document), scraper.element_cache.get_stats()
+
+        return asyncio.run(run())
+
+    soup, soup_stats = parse("bs4")
+    tree, tree_stats = parse("lxml")
+    assert (soup_stats["misses"], tree_stats["misses"]) == (1, 1)
+    assert ("TITULO", "I", "Dos Princípios", "TÍTULO I") in tree
+    assert tree != soup
+    assert parse("bs4") == (soup, {"hits": 1, "misses": 0, "stores": 0})
@@ -0,0 +1,79 @@
+"""
+Tests for the raw HTML archive.
+Author: gabes-machado
+Created: 2026-10-16 22:31:09 UTC
+"""
+
+import pytest
+
+from utils.html_archive import HTMLArchiveError, RawHTMLArchive
+
+URL = "https://www.planalto.gov.br/ccivil_03/constituicao/constituicao.htm"
+PAGE = "<html><body>" + "<p>Art. 1º A República Federativa do Brasil</p>" * 2000 + "</body></html>"
+
+@pytest.fixture(params=["zstd", "gzip"])
+def archive(request, tmp_path):
+    archive = RawHTMLArchive(str(tmp_path))
+    if request.param == "zstd" and archive.codec != "zstd":
+        pytest.skip("zstandard is not installed")
+    archive.codec = request.param
+    return archive
+
+def test_stored_page_round_trip(archive):
+    content = PAGE.encode("cp1252")
+    page = archive.store(URL, content, charset="cp1252")
+
+    assert (page.size, page.codec, page.charset) == (len(content), archive.codec, "cp1252")
+    assert archive.latest(URL) == page
+    assert archive.load(URL) == content
+    assert archive.load(URL, page.content_sha256) == content
+
+def test_every_version_is_kept(archive):
+    first = archive.store(URL, PAGE.encode("utf-8"))
+    second = archive.store(URL, (PAGE + "<!-- emenda -->").encode("utf-8"))
+    archive.store(URL, (PAGE + "<!-- emenda -->").encode("utf-8"))
+
+    assert archive.versions(URL) == sorted([first.content_sha256, second.content_sha256])
+    assert archive.latest(URL).content_sha256 == second.content_sha256
+    assert archive.load(URL, first.content_sha256) == PAGE.encode("utf-8")
+
+def test_corrupt_page_raises_archive_error(archive):
+    page = archive.store(URL, PAGE.encode("utf-8"))
+    extension = archive.EXTENSIONS[archive.codec]
+    page_path = archive._url_dir(URL) / f"{page.content_sha256}{extension}"
+    page_path.write_bytes(b"not compressed")
+    with pytest.raises(HTMLArchiveError):
+        archive.load(URL)
+
+def test_missing_url_raises_archive_error(archive):
+    assert archive.latest(URL) is None
+    with pytest.raises(HTMLArchiveError):
+        archive.load(URL)
+
+def test_streamed_page_round_trip(archive):
+    content = PAGE.encode("cp1252")
+    writer = archive.open_writer(URL)
+    for start in range(0, len(content), 4096):
+        writer.write(content[start:start + 4096])
+    page = writer.commit(charset="cp1252")
+
+    assert page.size == len(content)
+    assert archive.latest(URL) == page
+    assert archive.load(URL) == content
+    assert archive.versions(URL) == [page.content_sha256]
+
+def test_same_content_is_stored_once(archive):
+    content = PAGE.encode("utf-8")
+    archive.store(URL, content)
+    writer = archive.open_writer(URL)
+    writer.write(content)
+    writer.commit()
+    assert len(archive.versions(URL)) == 1
+    assert archive.load(URL) == content
+
+def test_aborted_writer_leaves_nothing(archive):
+    writer = archive.open_writer(URL)
+    writer.write(b"<html>")
+    writer.abort()
+    assert archive.latest(URL) is None
+    assert archive.versions(URL) == []
@@ -0,0 +1,80 @@
+"""
+Tests for paragraph classification in HTMLParser.
+Author: gabes-machado
+Created: 2026-10-16 23:24:51 UTC
+"""
+
+import pytest
+
+from utils.html_parser import ElementType, HTMLParser
+
+from pages import page
+
+@pytest.fixture(scope="module")
+def classify():
+    return HTMLParser(page()).classify
+
+CLASSIFIED = [
+    # One case per alternative of RegexPatterns.ELEMENT
+    ("ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS", ElementType.ADCT, None),
+    ("TÍTULO II", ElementType.TITULO, "II"),
+    ("CAPÍTULO IV", ElementType.CAPITULO, "IV"),
+    ("SEÇÃO VIII", ElementType.SECAO, "VIII"),
+    ("SUBSEÇÃO III", ElementType.SUBSECAO, "III"),
+    ("Art. 5º Todos são iguais perante a lei", ElementType.ARTIGO, "5"),
+    ("Art.60. A Constituição poderá ser emendada", ElementType.ARTIGO, "60"),
+    ("§ 1º As normas têm aplicação imediata.", ElementType.PARAGRAFO, "1"),
+    ("Parágrafo único. Todo o poder emana do povo.", ElementType.PARAGRAFO, "único"),
+    ("XXXIV - são a todos assegurados", ElementType.INCISO, "XXXIV"),
+    ("I – a soberania;", ElementType.INCISO, "I"),
+    ("a) nos termos da lei;", ElementType.ALINEA, "a"),
+    # Numerals made of L and C are read after the keyword, not from it
+    ("TÍTULO L", ElementType.TITULO, "L"),
+    ("CAPÍTULO XC", ElementType.CAPITULO, "XC"),
+    ("TÍTULO I", ElementType.TITULO, "I"),
+    ("CAPÍTULO", ElementType.CAPITULO, None),
+    # SUBSEÇÃO is not typed SEÇÃO
+    ("Subseção I", ElementType.SUBSECAO, "I"),
+    # 'único' comes from the prefix only
+    ("§ 2º O disposto no parágrafo único aplica-se", ElementType.PARAGRAFO, "2"),
+    ("Parágrafo. Sem número", ElementType.PARAGRAFO, None),
+]
+
+@pytest.mark.parametrize("text, element_type, number", CLASSIFIED)
+def test_classify(classify, text, element_type, number):
+    assert classify(text) == (element_type, number)
+
+NOT_ELEMENTS = [
+    # Keywords count only at the start of the paragraph
+    "Compete ao Congresso, nos termos deste Capítulo, dispor",
+    "Ressalvado o disposto na Seção II",
+    "conforme o Art. 5º desta Constituição",
+    # The ADCT heading only at the start
+    "Nos termos do Ato das Disposições Constitucionais Transitórias",
+    "Dos Princípios Fundamentais",
+    "TÍTULOS e valores mobiliários",
+    "Ivo - não é inciso",
+    "",
+]
+
+@pytest.mark.parametrize("text", NOT_ELEMENTS)
+def test_unclassified(classify, text):
+    assert classify(text) is None
+
+def titles(body: str) -> dict:
+    html = f'<html><body><font face="Arial">Preâmbulo</font>{body}</body></html>'
+    return {
+        text: title
+        for _, _, title, text in HTMLParser(html).iter_constitutional_elements()
+    }
+
+def test_title_is_the_next_sibling_paragraph():
+    assert titles(
+        "<p>TÍTULO I</p><div><p>Nota</p></div><p>Dos Princípios</p>"
+        "<div><p>CAPÍTULO I</p></div><p>Dos Direitos</p>"
+    ) == {"Preâmbulo": None, "TÍTULO I": "Dos Princípios", "CAPÍTULO I": None}
+
+def test_heading_is_not_the_title_of_a_heading():
+    assert titles("<p>TÍTULO I</p><p>CAPÍTULO I</p><p>Dos Direitos</p>") == {
+        "Preâmbulo": None, "TÍTULO I": None, "CAPÍTULO I": "Dos Direitos"
+    }
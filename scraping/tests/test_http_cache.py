@@ -0,0 +1,122 @@
+"""
+Tests for the conditional-GET response cache.
+Author: gabes-machado
+Created: 2026-10-16 19:36:05 UTC
+"""
+
+import asyncio
+import os
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.http_cache import ResponseCache
+from utils.http_client import AsyncHTTPClient, HTTPClientError
+
+BODY = "<html><body><p>Art. 1º A República Federativa do Brasil</p></body></html>".encode("cp1252")
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 05 Oct 1988 12:00:00 GMT"
+
+def origin(validators: dict, requests: list, before_304=None) -> web.Application:
+    """Page answering 304 when the request carries matching validators"""
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(dict(request.headers))
+        if any(request.headers.get(header) == value for header, value in validators.items()):
+            if before_304:
+                before_304()
+            return web.Response(status=304)
+        headers = {
+            "ETag" if header == "If-None-Match" else "Last-Modified": value
+            for header, value in validators.items()
+        }
+        return web.Response(body=BODY, headers=headers, content_type="text/html", charset="cp1252")
+
+    app = web.Application()
+    app.router.add_get("/constituicao.htm", handler)
+    return app
+
+def fetch_twice(cache: ResponseCache, app: web.Application) -> list:
+    """Texts of two sequential GETs of the page through the cache"""
+    async def run() -> list:
+        async with TestServer(app) as server:
+            url = str(server.make_url("/constituicao.htm"))
+            async with AsyncHTTPClient(cache=cache) as client:
+                return [await client.get(url), await client.get(url)]
+
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("validators", [
+    {"If-None-Match": ETAG},
+    {"If-Modified-Since": LAST_MODIFIED},
+], ids=["etag", "last-modified"])
+def test_not_modified_is_served_from_cache(tmp_path, validators):
+    cache = ResponseCache(str(tmp_path))
+    requests = []
+    first, second = fetch_twice(cache, origin(validators, requests))
+
+    assert first == second == BODY.decode("cp1252")
+    header, value = next(iter(validators.items()))
+    assert header not in requests[0]
+    assert requests[1][header] == value
+    assert cache.get_stats() == {
+        "hits": 1, "misses": 1, "load_errors": 0, "stores": 1,
+        "evictions": 0, "bytes_saved": len(BODY)
+    }
+
+def test_response_without_validators_is_not_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    requests = []
+    fetch_twice(cache, origin({}, requests))
+    assert "If-None-Match" not in requests[1]
+    assert cache.get_stats()["misses"] == 2
+    assert cache.get_stats()["stores"] == 0
+
+def test_unreadable_body_is_a_load_error(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    def drop_bodies():
+        for body_path in tmp_path.glob(f"*{ResponseCache.BODY_SUFFIX}"):
+            body_path.unlink()
+
+    with pytest.raises(HTTPClientError):
+        fetch_twice(cache, origin({"If-None-Match": ETAG}, [], before_304=drop_bodies))
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["load_errors"]) == (0, 1, 1)
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    for url, age in (("https://a/", 2000), ("https://b/", 1000)):
+        cache.store(url, b"x" * 100, etag='"1"')
+        os.utime(cache._body_path(ResponseCache._key(url)), (age, age))
+
+    assert cache.load_body("https://b/") == b"x" * 100
+    cache.store("https://c/", b"x" * 100, etag='"1"')
+
+    assert cache.get_entry("https://a/") is None
+    assert cache.get_entry("https://b/") is not None
+    assert cache.get_entry("https://c/") is not None
+    assert cache.get_stats()["evictions"] == 1
+
+def test_response_larger_than_cache_is_not_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    cache.store("https://a/", b"x" * 11, etag='"1"')
+    assert cache.get_entry("https://a/") is None
+    assert cache.get_stats()["stores"] == 0
+
+def test_streamed_fetches_use_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    requests = []
+
+    async def run() -> list:
+        async with TestServer(origin({"If-None-Match": ETAG}, requests)) as server:
+            url = str(server.make_url("/constituicao.htm"))
+            async with AsyncHTTPClient(cache=cache) as client:
+                streams = [client.stream_document(url, chunk_size=16) for _ in range(2)]
+                bodies = [b"".join([chunk async for chunk in stream]) for stream in streams]
+        return bodies, [stream.from_cache for stream in streams]
+
+    bodies, from_cache = asyncio.run(run())
+    assert bodies == [BODY, BODY]
+    assert from_cache == [False, True]
+    assert requests[1]["If-None-Match"] == ETAG
@@ -0,0 +1,105 @@
+"""
+Tests for HTTP record/replay fixtures and the mock Planalto server.
+Author: gabes-machado
+Created: 2026-10-16 21:58:12 UTC
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.http_client import AsyncHTTPClient, HTTPClientError
+from utils.http_fixtures import FixtureArchive, FixtureError, FixtureMode
+from utils.mock_server import MockPlanaltoServer
+
+PATH = "/ccivil_03/constituicao/constituicao.htm"
+BODY = "<html><body><p>Art. 1º A República Federativa do Brasil</p></body></html>".encode("cp1252")
+
+def origin() -> web.Application:
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(body=BODY, content_type="text/html", charset="windows-1252")
+
+    app = web.Application()
+    app.router.add_get(PATH, handler)
+    return app
+
+def fetch(archive: FixtureArchive, mode: FixtureMode, url: str):
+    async def run():
+        async with AsyncHTTPClient(fixtures=archive, fixture_mode=mode) as client:
+            return await client.get_document(url)
+
+    return asyncio.run(run())
+
+def test_recorded_response_is_replayed_offline(tmp_path):
+    async def record() -> str:
+        async with TestServer(origin()) as server:
+            url = str(server.make_url(PATH))
+            with FixtureArchive(str(tmp_path)) as archive:
+                async with AsyncHTTPClient(fixtures=archive, fixture_mode=FixtureMode.RECORD) as client:
+                    recorded = await client.get_document(url)
+            return url, recorded
+
+    url, recorded = asyncio.run(record())
+    replayed = fetch(FixtureArchive(str(tmp_path)), FixtureMode.REPLAY, url)
+
+    assert (replayed.content, replayed.charset, replayed.status) == (
+        recorded.content, recorded.charset, recorded.status
+    )
+    assert replayed.content == BODY
+    with pytest.raises(HTTPClientError):
+        fetch(FixtureArchive(str(tmp_path)), FixtureMode.REPLAY, url + "?outra=1")
+
+def test_mock_server_serves_the_archive(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    archive.record(f"https://www.planalto.gov.br{PATH}", 200, BODY, charset="cp1252")
+
+    async def run():
+        async with MockPlanaltoServer(archive) as server:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(server.base_url + PATH) as response:
+                    body, etag = await response.read(), response.headers["ETag"]
+                async with session.get(server.base_url + PATH, headers={"If-None-Match": etag}) as response:
+                    revalidated = response.status
+                async with session.get(server.base_url + "/outra.htm") as response:
+                    missing = response.status
+            return body, revalidated, missing, server.get_stats()
+
+    body, revalidated, missing, stats = asyncio.run(run())
+    assert (body, revalidated, missing) == (BODY, 304, 404)
+    assert (stats["served"], stats["not_modified"], stats["not_found"]) == (1, 1, 1)
+
+def index_lines(root) -> list:
+    return (root / FixtureArchive.INDEX_FILE).read_text(encoding="utf-8").splitlines()
+
+def test_recording_appends_and_close_compacts(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    for number in range(3):
+        archive.record(f"https://example.org/{number}", 200, b"v1")
+    archive.record("https://example.org/0", 200, b"v2")
+    assert len(index_lines(tmp_path)) == 4
+
+    archive.close()
+    assert len(index_lines(tmp_path)) == 3
+    reopened = FixtureArchive(str(tmp_path))
+    assert len(reopened) == 3
+    assert reopened.load_body(reopened.lookup("https://example.org/0")) == b"v2"
+
+def test_interrupted_session_keeps_complete_records(tmp_path):
+    archive = FixtureArchive(str(tmp_path))
+    archive.record("https://example.org/0", 200, b"v1")
+    archive.close()
+    with open(tmp_path / FixtureArchive.INDEX_FILE, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://example.org/1", "sta')
+
+    archive = FixtureArchive(str(tmp_path))
+    assert len(archive) == 1
+    archive.record("https://example.org/1", 200, b"v1")
+    assert len(FixtureArchive(str(tmp_path))) == 2
+
+def test_corrupt_index_line_raises(tmp_path):
+    (tmp_path / FixtureArchive.INDEX_FILE).write_text("not json\n{}\n", encoding="utf-8")
+    with pytest.raises(FixtureError):
+        FixtureArchive(str(tmp_path))
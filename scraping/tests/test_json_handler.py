@@ -0,0 +1,81 @@
+"""
+Tests for the DataFrame to nested dictionary conversion.
+Author: gabes-machado
+Created: 2026-10-17 04:08:51 UTC
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_transformer import ConstitutionTransformer
+from utils.json_handler import HierarchyConfig, JSONHandler, JSONHandlerError
+
+from pages import PARAGRAPHS, with_subsecoes
+
+def nested_dict_iterrows(df: pd.DataFrame) -> Dict[str, Any]:
+    """What JSONHandler.df_to_nested_dict did with iterrows()"""
+    root = {}
+    for _, row in df.iterrows():
+        current_level = root
+        row_dict = row.to_dict()
+        used_cols = [c for c in HierarchyConfig.get_columns() if pd.notna(row_dict.get(c))]
+        if not used_cols:
+            continue
+        entry = {
+            "classe": used_cols[-1],
+            "numero": row_dict.get(used_cols[-1]),
+            "texto": row_dict["texto"]
+        }
+        for col in used_cols:
+            plural_key = HierarchyConfig.get_plural_mapping()[col]
+            current_level.setdefault(plural_key, {})
+            current_level[plural_key].setdefault(str(row_dict.get(col)), {})
+            current_level = current_level[plural_key][str(row_dict.get(col))]
+        current_level.setdefault("conteudo", []).append(entry)
+    return root
+
+def transformed(paragraphs, engine: str = "vectorized") -> Any:
+    transformer = ConstitutionTransformer(engine=engine)
+    return transformer.extract_hierarchical_structure(transformer.create_dataframe(paragraphs))
+
+def handmade() -> pd.DataFrame:
+    """Rows skipping levels, rows with no level and a non-default index"""
+    df = pd.DataFrame({"texto": ["sem nível", "Art. 1º", "§ 1º", "I -", "a)", None, "Art. 2º"]},
+                      index=[10, 3, 7, 1, 0, 5, 2])
+    for column in HierarchyConfig.get_columns():
+        df[column] = None
+    df["titulo"] = [None, "I", "I", "I", np.nan, "II", "II"]
+    df["artigo"] = [None, "1", "1", "1", "1", None, "2"]
+    df["paragrafo"] = [None, None, "1", None, None, None, None]
+    df["inciso"] = [None, None, None, "I", None, None, None]
+    df["alinea"] = [None, None, None, None, "a", None, None]
+    return df
+
+FRAMES = {
+    "plain": lambda: transformed(PARAGRAPHS),
+    "subsecoes": lambda: transformed(with_subsecoes()),
+    "many laws": lambda: pd.concat([transformed(with_subsecoes())] * 20, ignore_index=True),
+    "handmade": handmade,
+}
+
+@pytest.mark.parametrize("frame", FRAMES)
+def test_nested_dict_matches_iterrows(frame):
+    df = FRAMES[frame]()
+    assert JSONHandler.df_to_nested_dict(df) == nested_dict_iterrows(df)
+
+@pytest.mark.parametrize("paragraphs", [PARAGRAPHS, with_subsecoes()], ids=["plain", "subsecoes"])
+def test_polars_frame_converts_like_pandas(paragraphs):
+    pytest.importorskip("polars")
+    assert JSONHandler.df_to_nested_dict(transformed(paragraphs, "polars")) \
+        == JSONHandler.df_to_nested_dict(transformed(paragraphs))
+
+def test_missing_column_is_rejected():
+    with pytest.raises(JSONHandlerError):
+        JSONHandler.df_to_nested_dict(handmade().drop(columns=["secao"]))
+
+def test_empty_frame_is_rejected():
+    with pytest.raises(JSONHandlerError):
+        JSONHandler.df_to_nested_dict(handmade().iloc[0:0])
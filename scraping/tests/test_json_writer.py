@@ -0,0 +1,36 @@
+"""
+Tests that the streaming JSON writer matches json.dump of the result.
+Author: gabes-machado
+Created: 2026-10-17 01:44:05 UTC
+"""
+
+import json
+
+from utils.constitution_structure import ConstitutionProcessor
+from utils.json_writer import TreeJSONWriter
+
+ESCAPES = [("TITULO", "I", 'Dos "Princípios"', 'TÍTULO I \\   \t\x01 😀')]
+
+def written(processor: ConstitutionProcessor, tmp_path, compact: bool = False) -> bytes:
+    output_file = tmp_path / "constitution.json"
+    TreeJSONWriter(compact=compact).write(processor, output_file)
+    return output_file.read_bytes()
+
+def dumped(processor: ConstitutionProcessor) -> bytes:
+    return json.dumps(
+        processor.get_result(), ensure_ascii=False, indent=2, sort_keys=True
+    ).encode("utf-8")
+
+def test_stream_matches_json_dump(law, process, tmp_path):
+    processor = process(law)
+    assert written(processor, tmp_path) == dumped(processor)
+
+def test_escaped_text_matches_json_dump(process, tmp_path):
+    processor = process(ESCAPES)
+    assert written(processor, tmp_path) == dumped(processor)
+
+def test_compact_stream_has_the_same_content(law, process, tmp_path):
+    processor = process(law)
+    output = written(processor, tmp_path, compact=True)
+    assert b"\n" not in output
+    assert json.loads(output) == processor.get_result()
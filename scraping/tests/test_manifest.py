@@ -0,0 +1,83 @@
+"""
+Tests for the sidecar manifests of saved outputs.
+Author: gabes-machado
+Created: 2026-10-17 03:34:18 UTC
+"""
+
+import json
+from collections import Counter
+
+import pytest
+
+from utils.json_handler import JSONHandler
+from utils.manifest import (
+    ManifestError,
+    TreeDigest,
+    hash_file,
+    manifest_path,
+    read_manifest,
+    verify_file
+)
+from utils.output_formats import available_formats, get_format
+
+from pages import elements, with_subsecoes
+
+def merkle_root(document) -> str:
+    digest = TreeDigest()
+    digest.digest(document)
+    return digest.root_hex
+
+def test_streamed_output_matches_its_manifest(process, law, tmp_path):
+    processor = process(law)
+    output_file = tmp_path / "constitution.json"
+    JSONHandler.save_tree(processor, str(output_file))
+
+    manifest = read_manifest(str(output_file))
+    assert (manifest["bytes"], manifest["sha256"]) == hash_file(str(output_file))
+    assert manifest["merkle_root"] == merkle_root(processor.get_result())
+    assert manifest["merkle_root"] == merkle_root(json.loads(output_file.read_text()))
+    assert verify_file(str(output_file), "json")
+
+@pytest.mark.parametrize("name", available_formats())
+def test_merkle_root_does_not_depend_on_the_format(process, tmp_path, name):
+    processor = process(elements(with_subsecoes()))
+    streamed = tmp_path / "streamed.json"
+    JSONHandler.save_tree(processor, str(streamed), compact=True)
+    output_file = tmp_path / f"constitution{get_format(name).suffix}"
+    JSONHandler.save_data(processor.get_result(), str(output_file), name)
+
+    manifest = read_manifest(str(output_file))
+    assert manifest["format"] == name
+    assert manifest["merkle_root"] == read_manifest(str(streamed))["merkle_root"]
+    assert verify_file(str(output_file), name)
+    assert not verify_file(str(output_file), "cbor" if name != "cbor" else "json")
+
+def test_counts_and_subtrees(process, tmp_path):
+    parsed = elements(with_subsecoes())
+    output_file = tmp_path / "constitution.json"
+    JSONHandler.save_tree(process(parsed), str(output_file))
+
+    manifest = read_manifest(str(output_file))
+    assert manifest["counts"] == dict(Counter(element[0].lower() for element in parsed))
+    assert {"titulos/I", "titulos/II", "titulos/IV", "preambulo", "adct"} <= set(
+        manifest["subtrees"]
+    )
+
+@pytest.mark.parametrize("change", ["flip", "truncate"])
+def test_changed_bytes_are_caught(process, tmp_path, change):
+    output_file = tmp_path / "constitution.json"
+    JSONHandler.save_tree(process(elements()), str(output_file))
+    content = bytearray(output_file.read_bytes())
+    if change == "flip":
+        content[len(content) // 2] ^= 0x01
+    else:
+        del content[-1]
+    output_file.write_bytes(bytes(content))
+    assert not verify_file(str(output_file))
+
+def test_missing_manifest_is_reported(process, tmp_path):
+    output_file = tmp_path / "constitution.json"
+    JSONHandler.save_tree(process(elements()), str(output_file))
+    manifest_path(str(output_file)).unlink()
+    with pytest.raises(ManifestError):
+        verify_file(str(output_file))
@@ -0,0 +1,70 @@
+"""
+Tests for the NDJSON export fed by ConstitutionProcessor.
+Author: gabes-machado
+Created: 2026-10-17 02:21:50 UTC
+"""
+
+from typing import Any, Dict
+
+from utils.ndjson_export import NDJSONExporter, read_records
+
+from pages import elements, with_subsecoes
+
+def node_at(result: Dict[str, Any], key: str) -> Any:
+    """Node of the result a record's chave leads to"""
+    node = result
+    for part in key.split("/"):
+        node = node[part]
+    return node
+
+def test_one_record_per_element(process, law, tmp_path):
+    output_file = tmp_path / "dispositivos.jsonl"
+    exporter = NDJSONExporter(str(output_file))
+    result = process(law, sinks=[exporter]).get_result()
+    assert not output_file.exists()
+    exporter.close()
+
+    records = list(read_records(str(output_file)))
+    assert len(output_file.read_text(encoding="utf-8").splitlines()) == len(law)
+    assert [record["ordinal"] for record in records] == list(range(1, len(law) + 1))
+    for record, (element_type, number, title, text) in zip(records, law):
+        assert (record["classe"], record["numero"], record["titulo"], record["texto"]) == (
+            element_type.lower(), number, title, text
+        )
+        node = node_at(result, record["chave"])
+        entries = node if isinstance(node, list) else node["conteudo"]
+        assert record["texto"] in [entry["texto"] for entry in entries]
+
+def test_parents_are_earlier_records_on_the_path(process, law, tmp_path):
+    output_file = tmp_path / "dispositivos.jsonl"
+    exporter = NDJSONExporter(str(output_file))
+    process(law, sinks=[exporter])
+    exporter.close()
+
+    records = {record["ordinal"]: record for record in read_records(str(output_file))}
+    for record in records.values():
+        if record["pai"]:
+            parent = records[record["pai"]]
+            assert parent["ordinal"] < record["ordinal"]
+            assert record["chave"].startswith(parent["chave"] + "/")
+            assert parent["caminho"].items() <= record["caminho"].items()
+        assert record["caminho"][record["classe"]] == record["numero"]
+
+def test_artigos_go_under_the_open_subsecao(process, tmp_path):
+    output_file = tmp_path / "dispositivos.jsonl"
+    exporter = NDJSONExporter(str(output_file))
+    process(elements(with_subsecoes()), sinks=[exporter])
+    exporter.close()
+
+    keys = {record["numero"]: record["chave"]
+            for record in read_records(str(output_file)) if record["classe"] == "artigo"}
+    assert keys["59"] == "titulos/IV/capitulos/I/secoes/VIII/subsecoes/I/artigos/59"
+    assert keys["60"] == "titulos/IV/capitulos/I/secoes/VIII/subsecoes/II/artigos/60"
+
+def test_abort_removes_the_partial_file(process, tmp_path):
+    output_file = tmp_path / "dispositivos.jsonl"
+    exporter = NDJSONExporter(str(output_file))
+    process(elements(), sinks=[exporter])
+    assert exporter.tmp_path.exists()
+    exporter.abort()
+    assert list(tmp_path.iterdir()) == []
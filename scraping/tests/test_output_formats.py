@@ -0,0 +1,41 @@
+"""
+Round-trip tests of the output formats.
+Author: gabes-machado
+Created: 2026-10-17 02:03:38 UTC
+"""
+
+import pytest
+
+from utils import output_formats
+from utils.json_handler import JSONHandler
+from utils.output_formats import (
+    OutputFormatError,
+    available_formats,
+    format_for_path,
+    get_format
+)
+
+@pytest.mark.parametrize("name", available_formats())
+def test_format_round_trips(process, law, name):
+    document = process(law).get_result()
+    output_format = get_format(name)
+    assert output_format.loads(output_format.dumps(document)) == document
+
+@pytest.mark.parametrize("name", available_formats())
+def test_saved_data_loads_back(process, law, tmp_path, name):
+    document = process(law).get_result()
+    output_file = tmp_path / f"constitution{get_format(name).suffix}"
+    JSONHandler.save_data(document, str(output_file), name)
+    assert JSONHandler.load_data(str(output_file)) == document
+    assert JSONHandler.load_data(str(output_file), name) == document
+    assert format_for_path(str(output_file)).loads(output_file.read_bytes()) == document
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(OutputFormatError):
+        get_format("yaml")
+
+def test_missing_library_is_reported(monkeypatch):
+    monkeypatch.setattr(output_formats, "msgpack", None)
+    assert "msgpack" not in available_formats()
+    with pytest.raises(OutputFormatError):
+        get_format("msgpack")
@@ -0,0 +1,87 @@
+"""
+Tests for the Parquet export of the flattened dispositivo table.
+Author: gabes-machado
+Created: 2026-10-17 02:57:09 UTC
+"""
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from utils.data_transformer import ConstitutionTransformer
+from utils.parquet_export import (
+    HIERARCHY_COLUMNS,
+    ParquetExporter,
+    read_dispositivos,
+    write_dataframe
+)
+
+from pages import elements, with_subsecoes
+
+@pytest.fixture
+def export(process, tmp_path):
+    """Export an element stream to a Parquet file and return its path"""
+    def build(parsed, name="constitution.parquet", **options) -> str:
+        output_file = tmp_path / name
+        exporter = ParquetExporter(str(output_file), **options)
+        process(parsed, sinks=[exporter])
+        assert not output_file.exists()
+        exporter.close()
+        return str(output_file)
+
+    return build
+
+def test_one_row_per_element(export, law):
+    table = read_dispositivos(export(law, row_group_rows=512))
+    assert table.column("ordinal").to_pylist() == list(range(1, len(law) + 1))
+    assert list(zip(*(table.column(name).to_pylist()
+                      for name in ("classe", "numero", "rubrica", "texto")))) == [
+        (element_type.lower(), number, title, text) for element_type, number, title, text in law
+    ]
+    for column in ["documento", "classe"] + HIERARCHY_COLUMNS:
+        assert pa.types.is_dictionary(table.schema.field(column).type)
+
+def test_rows_carry_their_hierarchy(export):
+    table = read_dispositivos(export(elements(with_subsecoes())))
+    rows = {row["texto"]: row for row in table.to_pylist()}
+    row = rows["Art. 60. A Constituição poderá ser emendada mediante proposta:"]
+    assert (row["titulo"], row["capitulo"], row["secao"], row["subsecao"], row["artigo"]) == (
+        "IV", "I", "VIII", "II", "60"
+    )
+    assert row["inciso"] is None
+
+def test_filters_select_rows(export):
+    table = read_dispositivos(
+        export(elements()),
+        filters=[("titulo", "==", "II"), ("classe", "==", "inciso")],
+        columns=["texto"]
+    )
+    assert table.column_names == ["texto"]
+    assert table.column("texto").to_pylist() == ["I - homens e mulheres são iguais;"]
+
+def test_directory_of_laws_is_read_together(export, tmp_path):
+    export(elements(), "cf.parquet", document="cf")
+    export(elements(with_subsecoes()), "cf-subsecoes.parquet", document="cf-subsecoes")
+    table = read_dispositivos(str(tmp_path), filters=[("classe", "==", "subsecao")])
+    assert set(table.column("documento").to_pylist()) == {"cf-subsecoes"}
+    assert table.num_rows == 2
+
+def test_dataframe_is_written_with_dictionary_columns(tmp_path):
+    transformer = ConstitutionTransformer()
+    df = transformer.extract_hierarchical_structure(
+        transformer.create_dataframe(with_subsecoes())
+    )
+    output_file = tmp_path / "constitution.parquet"
+    write_dataframe(df, str(output_file))
+
+    table = read_dispositivos(str(output_file), filters=[("subsecao", "==", "II")])
+    assert table.num_rows == len(df[df["subsecao"] == "II"])
+    for column in HIERARCHY_COLUMNS:
+        assert pa.types.is_dictionary(table.schema.field(column).type)
+
+def test_abort_removes_the_partial_file(process, tmp_path):
+    exporter = ParquetExporter(str(tmp_path / "constitution.parquet"))
+    process(elements(), sinks=[exporter])
+    assert exporter.tmp_path.exists()
+    exporter.abort()
+    assert list(tmp_path.iterdir()) == []
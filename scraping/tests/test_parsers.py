@@ -0,0 +1,137 @@
+"""
+Conformance tests of the HTML parsing engines.
+Author: gabes-machado
+Created: 2026-10-16 23:02:14 UTC
+"""
+
+import re
+from typing import List, Tuple
+
+import pytest
+
+from utils.html_parser import HTMLParser
+from utils.html_stream import StreamingHTMLParser
+from utils.parallel_parser import parse_parallel, split_segments
+from utils.parser_backends import available_backends
+
+from pages import PREAMBULO, page, with_subsecoes
+
+def parse(content: bytes, engine: str, chunk_size: int = 7) -> List[Tuple]:
+    """
+    Elements of a page parsed with a tree backend, the streaming parser
+    fed in chunks ("stream"), or a backend split at títulos across
+    processes ("parallel:<backend>")
+    """
+    if engine == "stream":
+        parser = StreamingHTMLParser()
+        elements = []
+        for offset in range(0, len(content), chunk_size):
+            elements.extend(parser.feed(content[offset:offset + chunk_size]))
+        elements.extend(parser.close())
+        return elements
+    if engine.startswith("parallel:"):
+        return parse_parallel(
+            content, engine=engine.split(":", 1)[1], workers=2, min_segment_chars=1
+        )
+    parser = HTMLParser(content, engine=engine)
+    parser.remove_strike_tags()
+    return list(parser.iter_constitutional_elements())
+
+# Engines with html.parser's tree shape, which must agree on any input
+BS4_ENGINES = ["bs4", "stream", "parallel:bs4"]
+
+TREE_ENGINES = BS4_ENGINES + [
+    engine for backend in available_backends() if backend != "bs4"
+    for engine in (backend, f"parallel:{backend}")
+]
+
+def markup(body: str) -> bytes:
+    return (
+        '<html><head><meta charset="windows-1252"></head><body>'
+        f'<font face="Arial">{PREAMBULO}</font>{body}</body></html>'
+    ).encode("cp1252")
+
+# Markup seen on Planalto pages that the engines must read alike
+MALFORMED = {
+    "unclosed paragraphs": markup(
+        "<p>TÍTULO I<p>Dos Princípios<p>Art. 1º A República<p>I - a soberania;"
+    ),
+    "nested paragraphs": markup(
+        "<p>TÍTULO I<p>Dos Princípios</p></p><p>Art. 1º A República</p>"
+    ),
+    "stray end tags": markup(
+        "</b><p>TÍTULO I</p></font><p>Dos Princípios</p></div><p>Art. 1º Texto</p>"
+    ),
+    "struck and inline text": markup(
+        "<p>TÍTULO I</p><p><b>Dos Princípios</b> <!-- c --> Fundamentais</p>"
+        "<p>Art. 1º A República <strike>velho texto</strike> novo texto:</p>"
+        "<p>I - a soberania;<br>continua</p><p>a) alínea <font size=2>x</font></p>"
+    ),
+    "headings in divs": markup(
+        "<div><p>CAPÍTULO II</p></div><p>DOS DIREITOS</p>"
+        "<p>SEÇÃO I</p><div><p>Da Ordem</p></div>"
+    ),
+    "struck título": markup(
+        "<p>TÍTULO I</p><p>Dos Princípios</p><p>Art. 1º Texto</p>"
+        "<strike><p>Art. 2º Revogado</p><p>TÍTULO II</p><p>Do Antigo</p></strike>"
+        "<p>TÍTULO II</p><p>Dos Direitos</p><p>Art. 3º Texto</p>"
+    ),
+    "título inside font": markup(
+        "<p>TÍTULO I</p><p>Dos Princípios</p><font size=2><p>Art. 1º Texto</p>"
+        "<p>TÍTULO II</p><p>Dos Direitos</p></font><p>Art. 2º Texto</p>"
+    ),
+    "unterminated document": markup("<p>TÍTULO I</p><p>Dos Princípios").replace(
+        b"</body></html>", b""
+    ),
+}
+
+@pytest.mark.parametrize("engine", TREE_ENGINES)
+def test_engines_agree_on_well_formed_page(engine):
+    content = page(with_subsecoes())
+    assert parse(content, engine) == parse(content, "bs4")
+
+@pytest.mark.parametrize("engine", TREE_ENGINES)
+def test_engines_agree_on_struck_and_inline_text(engine):
+    content = MALFORMED["struck and inline text"]
+    assert parse(content, engine) == parse(content, "bs4")
+
+@pytest.mark.parametrize("engine", BS4_ENGINES[1:])
+@pytest.mark.parametrize("name", MALFORMED)
+def test_bs4_engines_agree_on_malformed_markup(name, engine):
+    content = MALFORMED[name]
+    assert parse(content, engine) == parse(content, "bs4")
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("name", ["struck título", "título inside font"])
+def test_parallel_matches_backend_on_spans_across_titulos(name, backend):
+    content = MALFORMED[name]
+    assert parse(content, f"parallel:{backend}") == parse(content, backend)
+
+def segment_headings(content: bytes) -> list:
+    """Text of the <p> starting each segment after the first"""
+    segments = split_segments(content.decode("cp1252"), min_segment_chars=1)
+    return [re.match(r"<p>([^<]*)", segment).group(1) for segment in segments[1:]]
+
+def test_split_only_at_top_level_titulos():
+    # The struck TÍTULO II and the one inside <font> are not cut points
+    assert segment_headings(MALFORMED["struck título"]) == ["TÍTULO I", "TÍTULO II"]
+    assert segment_headings(MALFORMED["título inside font"]) == ["TÍTULO I"]
+    assert segment_headings(MALFORMED["unclosed paragraphs"]) == ["TÍTULO I"]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 64, 1 << 20])
+def test_stream_does_not_depend_on_chunking(chunk_size):
+    content = page(with_subsecoes(), charset="utf-8")
+    assert parse(content, "stream", chunk_size) == parse(content, "bs4")
+
+@pytest.mark.skipif("lxml" not in available_backends(), reason="lxml is not installed")
+def test_lxml_closes_unclosed_paragraphs():
+    # The documented difference keeping bs4 the default engine
+    content = MALFORMED["unclosed paragraphs"]
+    assert ("TITULO", "I", "Dos Princípios", "TÍTULO I") in parse(content, "lxml")
+    assert parse(content, "bs4")[1] == (
+        "TITULO", None, None, "TÍTULO IDos PrincípiosArt. 1º A RepúblicaI - a soberania;"
+    )
+
+def test_default_engine_matches_streaming():
+    from main import DEFAULT_CONFIG
+    assert DEFAULT_CONFIG["parser_engine"] in BS4_ENGINES
@@ -0,0 +1,152 @@
+"""
+Tests for the per-host token bucket and adaptive concurrency limiter.
+Author: gabes-machado
+Created: 2026-10-16 20:52:37 UTC
+"""
+
+import asyncio
+
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import AdaptiveConcurrencyLimiter, HostRateLimiter, TokenBucket
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(rate_limiter)
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep calls of the limiter and how many overlap"""
+    real_sleep = asyncio.sleep
+    record = {"delays": [], "active": 0, "overlap": 0}
+
+    async def sleep(delay):
+        record["delays"].append(round(delay, 6))
+        record["active"] += 1
+        record["overlap"] = max(record["overlap"], record["active"])
+        await real_sleep(0)
+        await real_sleep(0)
+        record["active"] -= 1
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    return record
+
+def test_burst_is_free_then_rate_applies(clock, sleeps):
+    bucket = TokenBucket(rate=10, burst=2)
+
+    async def take(count):
+        await asyncio.gather(*(bucket.acquire() for _ in range(count)))
+
+    asyncio.run(take(5))
+    assert sleeps["delays"] == [0.1, 0.2, 0.3]
+
+def test_waiters_sleep_outside_the_lock(clock, sleeps):
+    bucket = TokenBucket(rate=10, burst=1)
+
+    async def take():
+        await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+
+    asyncio.run(take())
+    assert sleeps["delays"] == [0.1, 0.2, 0.3, 0.4]
+    assert sleeps["overlap"] == 4
+
+def test_tokens_refill_up_to_burst(clock, sleeps):
+    bucket = TokenBucket(rate=1, burst=3)
+
+    async def take(count):
+        for _ in range(count):
+            await bucket.acquire()
+
+    asyncio.run(take(3))
+    clock.advance(60)
+    asyncio.run(take(3))
+    assert sleeps["delays"] == []
+    asyncio.run(take(1))
+    assert sleeps["delays"] == [1.0]
+
+def test_cancelled_waiter_returns_its_token(clock, monkeypatch):
+    bucket = TokenBucket(rate=1, burst=1)
+
+    async def never(delay):
+        raise asyncio.CancelledError
+
+    async def take():
+        await bucket.acquire()
+        monkeypatch.setattr(rate_limiter.asyncio, "sleep", never)
+        with pytest.raises(asyncio.CancelledError):
+            await bucket.acquire()
+
+    asyncio.run(take())
+    assert bucket._tokens == 0
+
+def release_all(limiter, outcomes):
+    async def run():
+        for status, latency in outcomes:
+            await limiter.acquire()
+            await limiter.release(status, latency)
+    asyncio.run(run())
+
+def warmed_up(clock, latency=0.5, **options) -> AdaptiveConcurrencyLimiter:
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, **options)
+    release_all(limiter, [(200, latency)] * limiter.warmup)
+    clock.advance(limiter.cooldown)
+    return limiter
+
+def test_healthy_responses_increase_additively(clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+    release_all(limiter, [(200, 0.5)] * 2)
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    release_all(limiter, [(200, 0.5)] * 10)
+    assert limiter.limit == 3
+
+def test_overload_halves_once_per_cooldown(clock):
+    limiter = warmed_up(clock)
+    limit = limiter.limit
+    release_all(limiter, [(503, 0.5), (429, 0.5), (None, None)])
+    assert limiter.limit == limit / 2
+    clock.advance(limiter.cooldown)
+    release_all(limiter, [(503, 0.5)])
+    assert limiter.limit == limit / 4
+
+def test_limit_never_falls_below_minimum(clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1)
+    for _ in range(5):
+        release_all(limiter, [(500, 0.5)])
+        clock.advance(limiter.cooldown)
+    assert limiter.limit == 1
+
+def test_rising_latency_decreases(clock):
+    limiter = warmed_up(clock)
+    limit = limiter.limit
+    release_all(limiter, [(200, 1.5)])
+    assert limiter.limit == limit / 2
+
+def test_one_fast_response_does_not_pin_the_baseline(clock):
+    limiter = warmed_up(clock)
+    release_all(limiter, [(200, 0.001)])
+    limit = limiter.limit
+    release_all(limiter, [(200, 0.5)] * 3)
+    assert limiter.limit > limit
+    assert limiter.baseline_latency > 0.25
+
+def test_warmup_is_not_judged(clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    release_all(limiter, [(200, 0.001), (200, 0.5), (200, 0.6)])
+    assert limiter.limit > 4
+
+def test_cache_served_responses_carry_no_latency(clock):
+    limiter = HostRateLimiter(requests_per_second=100, burst=10)
+
+    async def request(status, seconds):
+        async with await limiter.slot("www.planalto.gov.br") as slot:
+            clock.advance(seconds)
+            slot.record(status)
+
+    async def run():
+        for _ in range(5):
+            await request(200, 0.5)
+        await request(304, 0.001)
+
+    asyncio.run(run())
+    assert limiter.get_stats()["www.planalto.gov.br"]["baseline_latency"] == pytest.approx(0.5)
@@ -0,0 +1,120 @@
+"""
+Tests for the shared retry policy.
+Author: gabes-machado
+Created: 2026-10-16 20:31:40 UTC
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from scraper.constitution import ConstitutionScraper
+from utils import retry_policy
+from utils.retry_policy import RetryPolicy
+
+@pytest.fixture
+def upper_jitter(monkeypatch):
+    """Make full jitter always pick the top of its range"""
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: high)
+
+def test_backoff_doubles_up_to_max_delay(upper_jitter):
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+    assert [policy.backoff_delay(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+def test_jitter_stays_within_bounds():
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+    for attempt in range(6):
+        ceiling = min(3.0, 0.5 * 2 ** attempt)
+        delays = [policy.backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2
+
+def test_retry_after_overrides_shorter_backoff(upper_jitter):
+    policy = RetryPolicy(base_delay=0.5)
+    assert policy.next_delay(0, True, retry_after=7.0) == 7.0
+    assert policy.next_delay(1, True, retry_after=0.1) == 1.0
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    (" 3 ", 3.0),
+    ("soon", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert RetryPolicy.parse_retry_after(value) == expected
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < RetryPolicy.parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert RetryPolicy.parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+def test_non_retryable_and_last_attempt_are_not_retried():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.next_delay(0, False) is None
+    assert policy.next_delay(2, True) is None
+    assert policy.retries_used == 0
+
+def test_budget_is_shared_by_every_request():
+    policy = RetryPolicy(max_attempts=5, base_delay=0, retry_budget=2)
+    assert policy.next_delay(0, True) is not None
+    assert policy.next_delay(0, True) is not None
+    assert policy.next_delay(0, True) is None
+    assert policy.retries_used == 2
+
+def test_deadline_denies_late_retries(fake_clock, upper_jitter):
+    clock = fake_clock(retry_policy)
+    policy = RetryPolicy(base_delay=2.0, deadline=10.0)
+    policy.start()
+    assert policy.request_timeout(30.0) == 10.0
+
+    clock.advance(9.0)
+    assert policy.request_timeout(30.0) == 1.0
+    assert policy.next_delay(0, True) is None
+
+    clock.advance(1.0)
+    assert policy.expired()
+
+def test_reset_starts_a_new_run(fake_clock):
+    clock = fake_clock(retry_policy)
+    policy = RetryPolicy(base_delay=0, retry_budget=1, deadline=5.0)
+    policy.start()
+    policy.next_delay(0, True)
+    clock.advance(6.0)
+    assert policy.expired() and policy.next_delay(0, True) is None
+
+    policy.reset()
+    assert not policy.expired()
+    assert policy.remaining() == 5.0
+    assert policy.next_delay(0, True) == 0
+
+def test_each_scrape_gets_a_fresh_budget(tmp_path):
+    requests = []
+
+    async def unavailable(request: web.Request) -> web.Response:
+        requests.append(request.path)
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get("/lei.htm", unavailable)
+
+    async def run() -> list:
+        async with TestServer(app) as server:
+            scraper = ConstitutionScraper(
+                base_url=str(server.make_url("")), max_retries=5, retry_budget=1
+            )
+            scraper.retry_policy.base_delay = 0
+            async with scraper:
+                return [
+                    await scraper.scrape(str(tmp_path / "lei.json"), path="/lei.htm")
+                    for _ in range(2)
+                ]
+
+    assert asyncio.run(run()) == [False, False]
+    # One attempt and the single budgeted retry, in each run
+    assert len(requests) == 4
@@ -0,0 +1,71 @@
+"""
+Tests for the constitution schema and its per-título validator.
+Author: gabes-machado
+Created: 2026-10-17 03:15:42 UTC
+"""
+
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+
+from utils.constitution_structure import ConstitutionProcessor
+from utils.schema import CONSTITUTION_SCHEMA, ConstitutionSchema, compiled_validator
+
+from pages import PREAMBULO, elements, with_subsecoes
+
+def validate(parsed: List[Tuple]) -> Tuple[bool, bool]:
+    """Verdicts of whole-tree and per-título validation of an element stream"""
+    schema = ConstitutionSchema()
+    processor = ConstitutionProcessor()
+    node_validator = schema.node_validator(processor)
+    for element in parsed:
+        processor.process_element(*element)
+    return schema.validate_data(processor.get_result()), node_validator.is_valid()
+
+def references(schema: Any) -> Iterator[str]:
+    """Every $ref in a schema"""
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            yield schema["$ref"]
+        for value in schema.values():
+            yield from references(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from references(value)
+
+def test_every_reference_resolves():
+    found = set(references(CONSTITUTION_SCHEMA))
+    assert "#/definitions/subsecao" in found
+    for reference in found:
+        compiled_validator().evolve(schema={"$ref": reference}).is_valid({})
+
+def test_document_with_subsecoes_is_valid():
+    parsed = elements(with_subsecoes())
+    assert "SUBSECAO" in [element[0] for element in parsed]
+    assert validate(parsed) == (True, True)
+
+def test_validators_agree_on_the_law(law):
+    whole_tree, per_titulo = validate(law)
+    assert whole_tree == per_titulo
+
+HEAD = [("PREAMBULO", None, None, PREAMBULO)]
+ADCT = [("ADCT", None, None, "ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS")]
+
+def titulo(number: str, texto="Art. 1º") -> List[Tuple]:
+    return [("TITULO", number, None, f"TÍTULO {number}"), ("ARTIGO", "1", None, texto)]
+
+@pytest.mark.parametrize("parsed, expected", [
+    (HEAD + titulo("I") + titulo("II") + ADCT, True),
+    (HEAD + titulo("I") + titulo("II"), False),
+    (HEAD + titulo("I", texto=None) + titulo("II") + ADCT, False),
+    (HEAD + titulo("I") + titulo("II", texto=None) + ADCT, False),
+    # The result keeps only the last título of a repeated number
+    (HEAD + titulo("I", texto=None) + titulo("II") + titulo("I") + ADCT, True),
+    (HEAD + titulo("I") + titulo("II") + titulo("I", texto=None) + ADCT, False),
+    (HEAD + titulo("I", texto=None) + titulo("I") + ADCT, True),
+], ids=[
+    "valid", "without adct", "first título", "open título",
+    "replaced invalid título", "invalid replacement", "adjacent repeat",
+])
+def test_validators_agree(parsed, expected):
+    assert validate(parsed) == (expected, expected)
@@ -0,0 +1,137 @@
+"""
+End-to-end tests of ConstitutionScraper against the mock Planalto server.
+Author: gabes-machado
+Created: 2026-10-17 01:02:10 UTC
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from scraper.constitution import ConstitutionScraper
+from utils.constitution_structure import ElementSink, PlacedElement
+from utils.json_handler import JSONHandler
+from utils.manifest import manifest_path
+from utils.ndjson_export import NDJSONExporter, read_records
+from utils.output_formats import available_formats, get_format
+
+from pages import PARAGRAPHS, elements, page, with_subsecoes
+
+def verify(output_file, deep: bool = False) -> bool:
+    async def run() -> bool:
+        async with ConstitutionScraper() as scraper:
+            return await scraper.verify_structure(str(output_file), deep=deep)
+
+    return asyncio.run(run())
+
+def test_scraped_page_is_saved_and_verified(scrape_page, tmp_path):
+    output_file = tmp_path / "constitution.json"
+    assert scrape_page(page(), (output_file, {})) == [True]
+    assert verify(output_file)
+    assert set(json.loads(output_file.read_text(encoding="utf-8"))["titulos"]) == {"I", "II"}
+
+def test_elements_are_counted_by_type():
+    scraper = ConstitutionScraper()
+    for element_type, _, _, _ in elements(with_subsecoes()):
+        scraper._update_element_count(element_type)
+    assert scraper.stats["element_counts"] == {
+        "preambulo": 1, "titulos": 3, "capitulos": 2, "secoes": 1, "subsecoes": 2,
+        "artigos": 5, "paragrafos": 3, "incisos": 4, "alineas": 1, "adct": 1,
+    }
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_archived_page_is_reparsed(scrape_page, tmp_path, streaming):
+    archive_dir = str(tmp_path / "archive")
+    fetched = tmp_path / "fetched.json"
+    reparsed = tmp_path / "reparsed.json"
+    assert scrape_page(
+        page(),
+        (fetched, {"archive_dir": archive_dir, "streaming": streaming}),
+        (reparsed, {"archive_dir": archive_dir, "streaming": streaming, "from_archive": True})
+    ) == [True, True]
+    assert json.loads(reparsed.read_text()) == json.loads(fetched.read_text())
+
+MODES = [
+    {},
+    {"streaming": True},
+    {"parse_workers": 2},
+    {"compact": True},
+] + [{"output_format": name} for name in available_formats() if name != "json"]
+
+def mode_id(options) -> str:
+    return ",".join(f"{key}={value}" for key, value in options.items()) or "default"
+
+@pytest.mark.parametrize("options", MODES, ids=mode_id)
+def test_every_mode_writes_the_same_law(scrape_page, tmp_path, options):
+    reference = tmp_path / "reference.json"
+    suffix = get_format(options.get("output_format", "json")).suffix
+    output_file = tmp_path / f"constitution{suffix}"
+    assert scrape_page(
+        page(with_subsecoes()), (reference, {}), (output_file, options)
+    ) == [True, True]
+    assert verify(output_file)
+    assert verify(output_file, deep=True)
+    assert JSONHandler.load_data(str(output_file)) == json.loads(reference.read_text())
+
+def test_outputs_without_manifest_are_validated(scrape_page, tmp_path):
+    output_file = tmp_path / "constitution.json"
+    assert scrape_page(page(), (output_file, {})) == [True]
+    manifest_path(str(output_file)).unlink()
+    assert verify(output_file)
+    output_file.write_text(json.dumps({"titulos": {}}), encoding="utf-8")
+    assert not verify(output_file)
+
+def test_deep_verification_compares_the_merkle_root(scrape_page, tmp_path):
+    output_file = tmp_path / "constitution.json"
+    assert scrape_page(page(), (output_file, {})) == [True]
+    manifest_file = manifest_path(str(output_file))
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    manifest["merkle_root"] = "0" * 64
+    manifest_file.write_text(json.dumps(manifest), encoding="utf-8")
+    assert verify(output_file)
+    assert not verify(output_file, deep=True)
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_invalid_law_is_not_saved(scrape_page, tmp_path, streaming):
+    output_file = tmp_path / "constitution.json"
+    adct = PARAGRAPHS.index("ATO DAS DISPOSIÇÕES CONSTITUCIONAIS TRANSITÓRIAS")
+    assert scrape_page(
+        page(PARAGRAPHS[:adct]), (output_file, {"streaming": streaming})
+    ) == [False]
+    assert not output_file.exists()
+
+class BrokenSink(ElementSink):
+    """Sink whose disk fills up after a few elements"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+
+    def write(self, element: PlacedElement) -> None:
+        if element.ordinal > self.capacity:
+            raise OSError("No space left on device")
+
+    def close(self) -> None:
+        raise AssertionError("a failed run must not publish its exports")
+
+def test_sinks_are_published_with_the_output(scrape_page, tmp_path):
+    output_file = tmp_path / "constitution.json"
+    ndjson_file = tmp_path / "dispositivos.jsonl"
+    assert scrape_page(
+        page(), (output_file, {"sinks": [NDJSONExporter(str(ndjson_file))]})
+    ) == [True]
+    assert [record["texto"] for record in read_records(str(ndjson_file))] == [
+        text for _, _, _, text in elements()
+    ]
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_failing_sink_fails_the_run(scrape_page, tmp_path, streaming):
+    output_file = tmp_path / "constitution.json"
+    ndjson_file = tmp_path / "dispositivos.jsonl"
+    sinks = [NDJSONExporter(str(ndjson_file)), BrokenSink(capacity=3)]
+    assert scrape_page(
+        page(), (output_file, {"sinks": sinks, "streaming": streaming})
+    ) == [False]
+    assert not output_file.exists()
+    assert not ndjson_file.exists()
+    assert not sinks[0].tmp_path.exists()
@@ -0,0 +1,72 @@
+"""
+Tests for the SQLite export and its full-text search.
+Author: gabes-machado
+Created: 2026-10-17 02:38:27 UTC
+"""
+
+import sqlite3
+from collections import defaultdict
+
+import pytest
+
+from utils.sqlite_export import SQLiteExporter, SQLiteExportError, search
+
+from pages import elements
+
+@pytest.fixture
+def export(process, tmp_path):
+    """Export an element stream to a database and return its path"""
+    def build(parsed, **options) -> str:
+        db_file = tmp_path / "constitution.db"
+        exporter = SQLiteExporter(str(db_file), **options)
+        process(parsed, sinks=[exporter])
+        assert not db_file.exists()
+        exporter.close()
+        return str(db_file)
+
+    return build
+
+def test_one_row_per_element(export, law):
+    db_file = export(law, batch_size=64)
+    with sqlite3.connect(db_file) as connection:
+        rows = connection.execute(
+            "SELECT id, parent_id, type, number, ordinal, title, text, path FROM nodes ORDER BY id"
+        ).fetchall()
+
+    assert [row[0] for row in rows] == list(range(1, len(law) + 1))
+    assert [(row[2], row[3], row[5], row[6]) for row in rows] == [
+        (element_type.lower(), number, title, text) for element_type, number, title, text in law
+    ]
+    paths = {row[0]: row[7] for row in rows}
+    children = defaultdict(list)
+    for row in rows:
+        if row[1] is not None:
+            assert row[1] < row[0]
+            assert row[7].startswith(paths[row[1]] + "/")
+        children[row[1]].append(row[4])
+    assert all(ordinals == list(range(1, len(ordinals) + 1)) for ordinals in children.values())
+
+@pytest.mark.parametrize("query, expected", [
+    ("aplicacao imediata", "§ 1º As normas têm aplicação imediata."),
+    ("CIDADANIA", "II - a cidadania;"),
+    ("soberania", "I - a soberania;"),
+])
+def test_search_ignores_accents_and_case(export, query, expected):
+    results = search(export(elements()), query)
+    assert [result["text"] for result in results] == [expected]
+    assert "[" in results[0]["snippet"]
+
+def test_search_matches_titles(export):
+    results = search(export(elements()), "principios")
+    assert [(result["type"], result["number"]) for result in results] == [("titulo", "I")]
+
+def test_invalid_query_is_reported(export):
+    with pytest.raises(SQLiteExportError):
+        search(export(elements()), 'AND "')
+
+def test_abort_removes_the_partial_database(process, tmp_path):
+    exporter = SQLiteExporter(str(tmp_path / "constitution.db"))
+    process(elements(), sinks=[exporter])
+    assert exporter.tmp_path.exists()
+    exporter.abort()
+    assert list(tmp_path.iterdir()) == []